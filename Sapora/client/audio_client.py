@@ -2,46 +2,203 @@
 Sapora LAN Collaboration Suite - Audio Client (optimized)
 Handles microphone capture (sender) and playback (receiver).
 Improvements:
- - robust PyAudio handling
- - controlled send timing to match chunk duration
+ - callback-driven capture/playback via sounddevice (PortAudio schedules I/O)
+ - capture cadence set by the input callback, no wall-clock throttling
  - non-blocking/timeout recv loop for low latency playback
  - safer resource cleanup
+ - Opus-encoded uplink/downlink at OPUS_RATE when opuslib is installed
+   (44.1 kHz raw PCM otherwise, the legacy wire format)
+ - queued logging so audio threads never block on console output
 """
 import threading
 import socket
+import struct
 import time
-import pyaudio
+import queue
+import itertools
+import selectors
+import logging
+import logging.handlers
+import atexit
+import numpy as np
+import sounddevice as sd
 import sys
 import os
 
+# Optional Opus codec; opuslib raises a plain Exception at import if libopus is missing
+try:
+    import opuslib
+except Exception:
+    opuslib = None
+
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from shared.constants import (
-    AUDIO_PORT, UDP_STREAM_BUFFER, AUDIO_RATE, AUDIO_CHANNELS, AUDIO_CHUNK,
-    CONNECTION_TIMEOUT
+    AUDIO_PORT, UDP_STREAM_BUFFER, UDP_TUNED_BUFFER, AUDIO_RATE, AUDIO_CHANNELS,
+    AUDIO_CHUNK, AUDIO_FORMAT_PCM, CONNECTION_TIMEOUT, OPUS_RATE, OPUS_FRAME, OPUS_BITRATE
+)
+from shared.protocol import STREAM_AUDIO, STREAM_AUDIO_OPUS, CMD_REGISTER
+from shared.resample import LinearResampler
+from client.utils import (
+    pack_message, unpack_message, pack_header, PAYLOAD_LENGTH_OFFSET, json_dumps,
+    set_udp_buffers, available_cores, pin_current_thread, HAS_SENDMSG
 )
-from shared.protocol import STREAM_AUDIO, CMD_REGISTER
-from client.utils import pack_message, unpack_message
 
-AUDIO_FORMAT = pyaudio.paInt16
+AUDIO_DTYPE = 'int16'
+CHUNK_BYTES = AUDIO_CHUNK * AUDIO_CHANNELS * AUDIO_FORMAT_PCM
+PLAYBACK_RING_CHUNKS = 8          # ring capacity; writes beyond this are dropped
+PLAYBACK_MAX_LATENCY_CHUNKS = 4   # backlog the output callback tolerates (~80-90 ms)
+
+# Playback gain is fixed-point Q15: 32768 == 1.0 (unity, no processing)
+GAIN_Q15_UNITY = 1 << 15
+MAX_PLAYBACK_GAIN = 2.0
+# Precompiled codec for the header's payload-length field
+PAYLOAD_LENGTH_STRUCT = struct.Struct('!I')
+# Non-blocking recv flag (absent on Windows, where the selector alone guarantees readiness)
+RECV_FLAGS = getattr(socket, 'MSG_DONTWAIT', 0)
+RECV_POLL_INTERVAL = 0.05   # selector timeout; bounds shutdown/keepalive reaction time
+KEEPALIVE_INTERVAL = 5.0
+
+# Audio threads only enqueue log records; formatting and stderr I/O happen
+# on the QueueListener thread so a slow console can't stall playback.
+logger = logging.getLogger('sapora.audio')
+logger.setLevel(logging.DEBUG if os.environ.get('SAPORA_DEBUG') else logging.WARNING)
+logger.propagate = False
+_log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener_lock = threading.Lock()
+_log_listener_started = False
+
+
+def _ensure_log_listener():
+    """Starts the log listener thread on first use and flushes it at interpreter exit.
+    Records logged before this only sit in the queue; importing the module spawns no thread.
+    """
+    global _log_listener_started
+    with _log_listener_lock:
+        if _log_listener_started:
+            return
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+        _log_listener_started = True
+
+
+class PCMRingBuffer:
+    """Single-producer/single-consumer byte ring between the network and playback.
+
+    The receive thread is the only writer (advances ``_w``) and the output
+    callback the only reader (advances ``_r``). Both counters only grow, so
+    each side owns its index and no lock is needed in steady state. On
+    overrun the writer also advances ``_r`` to drop the oldest audio; that
+    and the reader's copy-out hold ``_lock`` so the two never cross.
+    """
+
+    def __init__(self, capacity, max_latency):
+        self.capacity = capacity
+        self.max_latency = max_latency
+        self._buf = bytearray(capacity)
+        self._mv = memoryview(self._buf)
+        self._silence = bytes(capacity)
+        self._w = 0
+        self._r = 0
+        self._lock = threading.Lock()
+        self.overruns = 0
+        self.underruns = 0
+
+    def available(self):
+        return self._w - self._r
+
+    def write(self, data):
+        """Copy data into the ring; if the reader has stalled, the oldest audio makes room."""
+        data = memoryview(data)
+        if len(data) > self.capacity:
+            data = data[-self.capacity:]
+        n = len(data)
+        if n > self.capacity - (self._w - self._r):
+            self.overruns += 1
+            # Keep latency bounded: skip the reader past the bytes this write overwrites.
+            # Positions being written now all lie before the new _r, so no read overlaps.
+            with self._lock:
+                self._r = max(self._r, self._w + n - self.capacity)
+        pos = self._w % self.capacity
+        first = min(n, self.capacity - pos)
+        self._mv[pos:pos + first] = data[:first]
+        if first < n:
+            self._mv[:n - first] = data[first:]
+        self._w += n
+
+    def read_into(self, out):
+        """Fill out from the ring, padding with silence on underrun."""
+        n = len(out)
+        with self._lock:
+            w = self._w
+            # Drop the oldest audio when the backlog grows past max_latency
+            if w - self._r > self.max_latency:
+                self._r = w - self.max_latency
+            take = min(n, w - self._r)
+            pos = self._r % self.capacity
+            first = min(take, self.capacity - pos)
+            out[:first] = self._mv[pos:pos + first]
+            if first < take:
+                out[first:take] = self._mv[:take - first]
+            self._r += take
+        if take < n:
+            out[take:n] = self._silence[:n - take]
+            self.underruns += 1
+
+    def clear(self):
+        with self._lock:
+            self._r = self._w
+
 
 class AudioClient:
-    """Handles all audio I/O: sender, receiver, and PyAudio management."""
+    """Handles all audio I/O: sender, receiver, and PortAudio stream management."""
 
-    def __init__(self, server_ip, username=None, meeting_id: str = 'default'):
+    # Round-robin over allowed cores, shared by every client's audio threads
+    _core_cycle = None
+    _core_lock = threading.Lock()
+
+    def __init__(self, server_ip, username=None, meeting_id: str = 'default',
+                 rcvbuf: int = None, sndbuf: int = None, use_opus: bool = None):
         self.server_ip = server_ip
         self.server_port = AUDIO_PORT
         self.username = username or "user"
         self.meeting_id = meeting_id
+
+        # Opus when available unless disabled (kwarg or SAPORA_AUDIO_CODEC=pcm)
+        if use_opus is None:
+            use_opus = os.environ.get('SAPORA_AUDIO_CODEC', 'opus').lower() != 'pcm'
+        self.use_opus = bool(use_opus) and opuslib is not None
+        self._enc = None
+        self._dec = None
+        # Opus has no 44.1 kHz mode: with it the devices run at OPUS_RATE in
+        # OPUS_FRAME blocks, otherwise at the AUDIO_RATE PCM wire format
+        self._rate = OPUS_RATE if self.use_opus else AUDIO_RATE
+        self._frame = OPUS_FRAME if self.use_opus else AUDIO_CHUNK
+        self._frame_bytes = self._frame * AUDIO_CHANNELS * AUDIO_FORMAT_PCM
+        # A server without opuslib still sends AUDIO_RATE PCM; bring it to our rate
+        self._pcm_resampler = LinearResampler(AUDIO_RATE, OPUS_RATE) if self.use_opus else None
+
+        # UDP buffer targets: kwargs > SAPORA_UDP_RCVBUF/SAPORA_UDP_SNDBUF > default
+        self.rcvbuf = rcvbuf or int(os.environ.get('SAPORA_UDP_RCVBUF') or UDP_TUNED_BUFFER)
+        self.sndbuf = sndbuf or int(os.environ.get('SAPORA_UDP_SNDBUF') or UDP_TUNED_BUFFER)
         
         # Lifecycle flags
         self.running = False          # Any audio activity
         self.sending = False          # Mic capture -> send active
         self.playing = False          # Playback active
         
-        self.audio = None
         self.stream_out = None
         self.stream_in = None
+
+        # Input callback -> sender thread (SimpleQueue is C-level, safe from the PortAudio thread)
+        self._capture_q = queue.SimpleQueue()
+        # Receiver thread -> output callback (lock-free SPSC ring)
+        self._playback_rb = PCMRingBuffer(
+            PLAYBACK_RING_CHUNKS * self._frame_bytes,
+            PLAYBACK_MAX_LATENCY_CHUNKS * self._frame_bytes
+        )
         
         # FIX: Use single socket for both send and receive
         self.sock = None
@@ -49,6 +206,18 @@ class AudioClient:
         self.send_thread = None
         self.recv_thread = None
         
+        # Reusable audio header; only the length field is patched per packet
+        self._audio_header = bytearray(pack_header(
+            STREAM_AUDIO_OPUS if self.use_opus else STREAM_AUDIO, self._frame_bytes
+        ))
+        self._keepalive_pkt = b''
+        # Preallocated receive buffer; _recv_loop parses packets in place
+        self._recv_buf = bytearray(UDP_STREAM_BUFFER)
+        self._recv_mv = memoryview(self._recv_buf)
+
+        # Playback volume as a Q15 multiplier (see set_volume)
+        self._gain_q15 = GAIN_Q15_UNITY
+
         # Mic mute state (True = sending audio, False = muted)
         self.mic_enabled = True
 
@@ -56,37 +225,33 @@ class AudioClient:
 
     def start_streaming(self, status_callback=None):
         """Starts microphone capture and transmission loop (idempotent)."""
+        _ensure_log_listener()
         try:
             # Already sending?
             if self.send_thread and self.send_thread.is_alive():
                 return True
-            if not self.audio:
-                self.audio = pyaudio.PyAudio()
             
-            # Input stream (microphone)
+            # Input stream (microphone); PortAudio invokes _input_callback per block
             if not self.stream_in:
-                self.stream_in = self.audio.open(
-                    format=AUDIO_FORMAT,
+                self.stream_in = sd.RawInputStream(
+                    samplerate=self._rate,
                     channels=AUDIO_CHANNELS,
-                    rate=AUDIO_RATE,
-                    input=True,
-                    frames_per_buffer=AUDIO_CHUNK
+                    dtype=AUDIO_DTYPE,
+                    blocksize=self._frame,
+                    callback=self._input_callback
                 )
+
+            if self.use_opus and self._enc is None:
+                self._enc = opuslib.Encoder(OPUS_RATE, AUDIO_CHANNELS, 'voip')
+                self._enc.bitrate = OPUS_BITRATE
             
-            # FIX: Single socket for both send and receive
-            # Bind to ephemeral port so we can receive on same socket
-            if not self.sock:
-                self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, UDP_STREAM_BUFFER)
-                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_STREAM_BUFFER)
-                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                self.sock.bind(('', 0))  # Bind to ephemeral port
-                self.sock.settimeout(CONNECTION_TIMEOUT)
+            self._ensure_socket()
 
             self.running = True
             self.sending = True
             self.send_thread = threading.Thread(target=self._send_loop, daemon=True)
             self.send_thread.start()
+            self.stream_in.start()
             if status_callback:
                 status_callback("🎤 Streaming audio...")
             return True
@@ -96,43 +261,83 @@ class AudioClient:
             self.sending = False
             return False
 
+    def _ensure_socket(self):
+        """Creates the single send/receive UDP socket once (shared by both directions)."""
+        if self.sock:
+            return
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        set_udp_buffers(sock, self.rcvbuf, self.sndbuf)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            # Lets several receiver processes share the port on platforms that support it
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            except OSError:
+                pass
+        # Bind to ephemeral port so the server can send to us on the same socket
+        sock.bind(('', 0))
+        sock.settimeout(CONNECTION_TIMEOUT)
+        self.sock = sock
+
+    def _input_callback(self, indata, frames, time_info, status):
+        """PortAudio input callback: hands captured blocks to the sender thread."""
+        # Muted mic: drop the block here instead of queueing it
+        if self.mic_enabled:
+            self._capture_q.put(bytes(indata))
+
+    def _pin_audio_thread(self):
+        """Pins the calling audio thread to its own core when SAPORA_PIN_AUDIO=1 (opt-in)."""
+        if os.environ.get('SAPORA_PIN_AUDIO') != '1':
+            return
+        with AudioClient._core_lock:
+            if AudioClient._core_cycle is None:
+                AudioClient._core_cycle = itertools.cycle(available_cores())
+            core_id = next(AudioClient._core_cycle)
+        pinned = pin_current_thread(core_id)
+        logger.debug("AudioClient: %s pinned to core %s: %s", threading.current_thread().name, core_id, pinned)
+
     def _send_loop(self):
-        """Continuously reads audio chunks and sends to server."""
-        # compute ideal sleep per chunk based on sample params:
-        chunk_duration = float(AUDIO_CHUNK) / float(AUDIO_RATE)  # seconds
+        """Drains captured audio blocks and sends them to the server."""
+        self._pin_audio_thread()
+        server_addr = (self.server_ip, self.server_port)
+        header = self._audio_header
+        # Hot-loop locals: avoid global/attribute lookups per packet
+        _get = self._capture_q.get
+        _pack_len = PAYLOAD_LENGTH_STRUCT.pack_into
+        _send = self.sock.sendmsg if HAS_SENDMSG else self.sock.sendto
+        _encode = self._enc.encode if self._enc is not None else None
         try:
             while self.sending:
-                loop_start = time.time()
                 try:
-                    audio_data = self.stream_in.read(AUDIO_CHUNK, exception_on_overflow=False)
-                except IOError:
-                    # Overflows happen under load; skip this chunk
-                    audio_data = None
-                except Exception as e:
-                    print(f"AudioClient Send read error: {e}")
-                    audio_data = None
+                    # Blocks until the input callback delivers the next chunk
+                    audio_data = _get(timeout=CONNECTION_TIMEOUT)
+                except queue.Empty:
+                    continue
 
-                # If mic is enabled and we have data, send it; otherwise drop it (mute)
+                # None is the wake-up sentinel posted by stop_streaming
                 if audio_data and self.mic_enabled:
-                    packet = pack_message(STREAM_AUDIO, audio_data)
+                    if _encode is not None:
+                        try:
+                            audio_data = _encode(audio_data, OPUS_FRAME)
+                        except Exception as e:
+                            logger.debug("AudioClient Opus encode error: %s", e)
+                            continue
+                    _pack_len(header, PAYLOAD_LENGTH_OFFSET, len(audio_data))
                     try:
-                        # FIX: Use single socket
-                        self.sock.sendto(packet, (self.server_ip, self.server_port))
+                        # FIX: Use single socket; header and payload go out without concatenation
+                        if HAS_SENDMSG:
+                            _send([header, audio_data], (), 0, server_addr)
+                        else:
+                            _send(header + audio_data, server_addr)
                     except Exception:
                         # Ignore transient send errors
                         pass
 
-                # Throttle to maintain consistent capture->send cadence
-                elapsed = time.time() - loop_start
-                sleep_time = max(0, chunk_duration - elapsed)
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-
         finally:
             # Ensure sender cleaned when loop exits (keep playback/socket alive)
             try:
                 if self.stream_in:
-                    self.stream_in.stop_stream()
+                    self.stream_in.stop()
                     self.stream_in.close()
             except:
                 pass
@@ -145,101 +350,141 @@ class AudioClient:
     
     def start_receiving(self):
         """Initializes playback stream and starts receiver thread (idempotent)."""
+        _ensure_log_listener()
         try:
             if self.recv_thread and self.recv_thread.is_alive():
                 return
-            if not self.audio:
-                self.audio = pyaudio.PyAudio()
 
-            # Output stream
+            # Output stream; PortAudio pulls buffered audio via _output_callback
             if not self.stream_out:
-                self.stream_out = self.audio.open(
-                    format=AUDIO_FORMAT,
+                self.stream_out = sd.RawOutputStream(
+                    samplerate=self._rate,
                     channels=AUDIO_CHANNELS,
-                    rate=AUDIO_RATE,
-                    output=True,
-                    frames_per_buffer=AUDIO_CHUNK
+                    dtype=AUDIO_DTYPE,
+                    blocksize=self._frame,
+                    callback=self._output_callback
                 )
             
             # FIX: Use single socket (create if not already created by start_streaming)
-            if not self.sock:
-                self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_STREAM_BUFFER)
-                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, UDP_STREAM_BUFFER)
-                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                # bind to ephemeral port so server can send to us
-                self.sock.bind(('', 0))
-                self.sock.settimeout(CONNECTION_TIMEOUT)
+            self._ensure_socket()
             
             self.running = True
+            if self.use_opus and self._dec is None:
+                self._dec = opuslib.Decoder(OPUS_RATE, AUDIO_CHANNELS)
+
             self.playing = True
             self._register_receiver()
             self.recv_thread = threading.Thread(target=self._recv_loop, daemon=True)
             self.recv_thread.start()
+            self.stream_out.start()
         except Exception as e:
-            print(f"AudioClient Recv Setup Error: {e}")
+            logger.error("AudioClient Recv Setup Error: %s", e)
 
     def _register_receiver(self):
         """Sends registration packet to the server's audio port with username and room info."""
         try:
-            import json
             reg_data = {
                 'username': self.username,
                 'stream_type': 'audio',
                 'room': self.meeting_id or 'default'
             }
-            register_packet = pack_message(CMD_REGISTER, json.dumps(reg_data).encode('utf-8'))
+            if self.use_opus:
+                # Ask the server to Opus-encode the mix it sends back to us
+                reg_data['codec'] = 'opus'
+            register_packet = pack_message(CMD_REGISTER, json_dumps(reg_data))
+            # Same bytes are reused as the periodic keepalive from _recv_loop
+            self._keepalive_pkt = register_packet
             
             for _ in range(3):
                 try:
                     # Use single socket - this ensures server knows our receive address
                     self.sock.sendto(register_packet, (self.server_ip, self.server_port))
                 except Exception as e:
-                    if os.environ.get('SAPORA_DEBUG'):
-                        print(f"AudioClient Registration Error: {e}")
+                    logger.debug("AudioClient Registration Error: %s", e)
                 time.sleep(0.05)
         except Exception as e:
-            if os.environ.get('SAPORA_DEBUG'):
-                print(f"AudioClient Registration Setup Error: {e}")
+            logger.debug("AudioClient Registration Setup Error: %s", e)
 
     def _recv_loop(self):
         """Continuously receives mixed audio and plays it back (with UDP keepalive)."""
-        last_keepalive = 0.0
-        import json
+        self._pin_audio_thread()
+        server_addr = (self.server_ip, self.server_port)
+        recv_buf = self._recv_buf
+        recv_mv = self._recv_mv
+        sel = selectors.DefaultSelector()
+        try:
+            sel.register(self.sock, selectors.EVENT_READ)
+        except Exception as e:
+            logger.warning("AudioClient Recv Error (selector): %s", e)
+            sel.close()
+            return
+        # Hot-loop locals: avoid global/attribute lookups per packet
+        _select = sel.select
+        _recv_into = self.sock.recv_into
+        _unpack = unpack_message
+        _write = self._playback_rb.write
+        # Monotonic schedule so wall-clock jumps don't stall or burst keepalives
+        next_keepalive = time.monotonic()
         while self.playing:
             # periodic keepalive so server retains our listener mapping
-            now = time.time()
-            if now - last_keepalive > 5.0:
+            now = time.monotonic()
+            if now >= next_keepalive:
                 try:
-                    reg = {'username': self.username, 'stream_type': 'audio', 'room': self.meeting_id or 'default'}
-                    self.sock.sendto(pack_message(CMD_REGISTER, json.dumps(reg).encode('utf-8')), (self.server_ip, self.server_port))
+                    self.sock.sendto(self._keepalive_pkt, server_addr)
                 except Exception:
                     pass
-                last_keepalive = now
+                next_keepalive = now + KEEPALIVE_INTERVAL
             try:
+                if not _select(timeout=RECV_POLL_INTERVAL):
+                    continue
                 # FIX: Use single socket
-                data, addr = self.sock.recvfrom(UDP_STREAM_BUFFER)
-            except socket.timeout:
+                n = _recv_into(recv_buf, UDP_STREAM_BUFFER, RECV_FLAGS)
+            except (BlockingIOError, socket.timeout):
                 continue
             except Exception as e:
                 if self.playing:
-                    print(f"AudioClient Recv Error (socket): {e}")
+                    logger.warning("AudioClient Recv Error (socket): %s", e)
                 break
 
             try:
-                version, msg_type, _, _, payload = unpack_message(data)
+                version, msg_type, _, _, payload = _unpack(recv_mv[:n])
             except ValueError:
                 continue
 
             if msg_type == STREAM_AUDIO:
+                # Only enqueue here; payload is a view into recv_buf, copied straight into the ring
+                if self._pcm_resampler is not None:
+                    payload = self._pcm_resampler.process(payload)
+                if self._gain_q15 != GAIN_Q15_UNITY:
+                    payload = self._apply_gain(payload)
+                _write(payload)
+            elif msg_type == STREAM_AUDIO_OPUS and self._dec is not None:
                 try:
-                    # Play mixed audio chunk (non-blocking write)
-                    if self.stream_out:
-                        self.stream_out.write(payload)
+                    pcm = self._dec.decode(bytes(payload), OPUS_FRAME)
+                    if self._gain_q15 != GAIN_Q15_UNITY:
+                        pcm = self._apply_gain(pcm)
+                    _write(pcm)
                 except Exception as e:
-                    # ignore bursts/underruns
-                    # print(f"AudioClient Playback error: {e}")
-                    pass
+                    logger.debug("AudioClient Opus decode error: %s", e)
+        sel.close()
+
+    def _output_callback(self, outdata, frames, time_info, status):
+        """PortAudio output callback: plays buffered audio, silence on underrun."""
+        self._playback_rb.read_into(outdata)
+
+    def _apply_gain(self, pcm):
+        """Scales int16 PCM by the Q15 playback gain with NumPy, saturating to int16."""
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.int32)
+        samples *= self._gain_q15
+        samples >>= 15
+        np.clip(samples, -32768, 32767, out=samples)
+        # Byte view so the ring's unsigned-byte memoryview accepts it
+        return samples.astype(np.int16).view(np.uint8)
+
+    def set_volume(self, gain: float):
+        """Set playback volume (0.0 = silent, 1.0 = unchanged, up to MAX_PLAYBACK_GAIN)."""
+        gain = min(max(float(gain), 0.0), MAX_PLAYBACK_GAIN)
+        self._gain_q15 = int(round(gain * GAIN_Q15_UNITY))
 
     # --- Cleanup ---
 
@@ -252,6 +497,8 @@ class AudioClient:
         self.running = False
         self.sending = False
         self.playing = False
+        # Wake the sender thread if it is waiting on the capture queue
+        self._capture_q.put(None)
         
         # Close socket (single socket for both send and receive)
         if self.sock:
@@ -264,7 +511,7 @@ class AudioClient:
         # Close streams
         if self.stream_in:
             try:
-                self.stream_in.stop_stream()
+                self.stream_in.stop()
                 self.stream_in.close()
             except:
                 pass
@@ -272,17 +519,11 @@ class AudioClient:
 
         if self.stream_out:
             try:
-                self.stream_out.stop_stream()
+                self.stream_out.stop()
                 self.stream_out.close()
             except:
                 pass
             self.stream_out = None
+        self._playback_rb.clear()
 
-        if self.audio:
-            try:
-                self.audio.terminate()
-            except:
-                pass
-            self.audio = None
-
-        print("AudioClient: stopped.")
\ No newline at end of file
+        logger.debug("AudioClient: stopped.")
\ No newline at end of file
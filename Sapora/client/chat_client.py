@@ -10,11 +10,36 @@ import json
 import sys
 import os
 import time
+import queue
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from shared.constants import CONTROL_PORT, BUFFER_SIZE, CONNECTION_TIMEOUT
-from shared.protocol import CMD_REGISTER, CMD_HEARTBEAT, CMD_USER_LIST, MSG_CHAT, CMD_DISCONNECT
-from client.utils import pack_message, unpack_message, read_tcp_message
+from shared.protocol import (
+    CMD_REGISTER, CMD_HEARTBEAT, CMD_USER_LIST, MSG_CHAT, CMD_DISCONNECT, FILE_NOTIFY_AVAILABLE
+)
+from client.utils import (
+    pack_message, unpack_message, read_tcp_message, json_dumps, json_loads, set_tcp_low_latency,
+    peek_msg_type, send_buffers
+)
+
+# Read once; the listener checks this on every message
+_DEBUG = bool(os.environ.get('SAPORA_DEBUG'))
+
+# Max queued packets gathered into one write by the sender thread
+_TX_BATCH_MAX = 64
+
+# Waits between reconnect attempts (1.5x backoff, precomputed)
+_RECONNECT_DELAYS = (1.0, 1.5, 2.25)
+
+# Targets that mean "deliver to everyone in the room"
+_BROADCAST_TARGETS = frozenset({'all', 'everyone', ''})
+# File notifications need an explicit broadcast target; an empty one is not
+_FILE_BROADCAST_TARGETS = frozenset({'all', 'everyone'})
+
+
+def _lower(value):
+    """Strips and lowercases a JSON field, only falling back to str() for non-string values."""
+    return (value if isinstance(value, str) else str(value)).strip().lower()
 
 
 class ChatClient:
@@ -25,6 +50,8 @@ class ChatClient:
         self.server_port = server_port
         self.username = username
         self.meeting_id = meeting_id
+        # Folded once; compared against every incoming target/sender
+        self._username_lower = (username or '').strip().lower()
 
         self.running = False
         self.sock = None
@@ -34,8 +61,14 @@ class ChatClient:
         self.message_callback = None
         self.file_callback = None
 
-        # Lock for thread-safe send
-        self.send_lock = threading.Lock()
+        # Outbound packets; a single writer thread owns sock.sendall so callers never block
+        self._tx_q = queue.SimpleQueue()
+        self._tx_thread = None
+        # True while a writer is draining _tx_q; the writer clears it before it exits
+        self._tx_open = False
+        self._tx_lock = threading.Lock()
+        # Set by disconnect(); aborts any pending reconnect wait immediately
+        self._stop_event = threading.Event()
 
     def set_callbacks(self, user_list_cb, message_cb):
         """Sets callbacks for user list and message updates."""
@@ -48,32 +81,46 @@ class ChatClient:
 
     def connect(self):
         """Establishes TCP connection and registers with the server."""
+        self._stop_event.clear()
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.settimeout(CONNECTION_TIMEOUT)
             self.sock.connect((self.server_ip, self.server_port))
+            # Chat packets are tiny and latency-sensitive; surface dead peers within 2x the timeout
+            set_tcp_low_latency(self.sock, user_timeout_ms=int(CONNECTION_TIMEOUT * 2000))
 
             # Register username + meeting_id
-            reg_payload = json.dumps({'username': self.username, 'meeting_id': self.meeting_id})
-            reg_packet = pack_message(CMD_REGISTER, reg_payload.encode('utf-8'))
+            reg_payload = json_dumps({'username': self.username, 'meeting_id': self.meeting_id})
+            reg_packet = pack_message(CMD_REGISTER, reg_payload)
             self.sock.sendall(reg_packet)
             
             print(f"[ChatClient] Connected and registered as '{self.username}' in room '{self.meeting_id}'")
 
             self.running = True
+            # Fresh queue per connection so nothing queued for a dead socket leaks onto the new one
+            with self._tx_lock:
+                self._tx_q = queue.SimpleQueue()
+                self._tx_open = True
+            self._tx_thread = threading.Thread(target=self._tx_loop, args=(self._tx_q,), daemon=True)
+            self._tx_thread.start()
             threading.Thread(target=self._listen_loop, daemon=True).start()
             return True
 
         except Exception as e:
             print(f"[ChatClient] Connection Error: {e}")
-            self.disconnect()
+            # Tear down without setting _stop_event so a reconnect loop can keep trying
+            self._close()
             return False
 
-    def _attempt_reconnect(self, attempts: int = 3, backoff: float = 1.5):
-        """Try to reconnect and re-register with exponential backoff."""
-        for i in range(attempts):
+    def _attempt_reconnect(self):
+        """Try to reconnect and re-register with backoff; aborts as soon as disconnect() is called."""
+        # Retire the dead socket and its writer before opening a new connection
+        self._close()
+        attempts = len(_RECONNECT_DELAYS)
+        for i, delay in enumerate(_RECONNECT_DELAYS):
+            if self._stop_event.wait(delay):
+                return False
             try:
-                time.sleep(backoff ** i)
                 print(f"[ChatClient] Reconnecting... attempt {i+1}/{attempts}")
                 if self.connect():
                     print("[ChatClient] Reconnected")
@@ -102,18 +149,19 @@ class ChatClient:
                 'timestamp': time.time()
             }
             
-            payload = json.dumps(payload_obj).encode('utf-8')
+            payload = json_dumps(payload_obj)
             packet = pack_message(MSG_CHAT, payload)
             
-            with self.send_lock:
-                self.sock.sendall(packet)
+            # Queued for the writer thread; send errors are reported from there
+            if not self._enqueue(packet):
+                print(f"[ChatClient] Cannot send: connection lost, reconnecting")
+                return False
             
             print(f"[ChatClient] ✅ Sent message to '{target}': {text[:50]}...")
             return True
 
         except Exception as e:
             print(f"[ChatClient] Send Error: {e}")
-            self.disconnect()
             return False
 
     def send_file_announce(self, filename, target: str = 'all'):
@@ -127,11 +175,12 @@ class ChatClient:
                 'meeting_id': self.meeting_id,
                 'timestamp': time.time()
             }
-            payload = json.dumps(obj).encode('utf-8')
+            payload = json_dumps(obj)
             packet = pack_message(MSG_CHAT, payload)
             
-            with self.send_lock:
-                self.sock.sendall(packet)
+            if not self._enqueue(packet):
+                print(f"[ChatClient] Cannot announce '{filename}': connection lost, reconnecting")
+                return False
             
             print(f"[ChatClient] Announced file '{filename}' to {target}")
             return True
@@ -139,31 +188,103 @@ class ChatClient:
             print(f"[ChatClient] File announce error: {e}")
             return False
 
+    def _enqueue(self, packet):
+        """Hands packet to the live writer thread; False if none would send it (e.g. while reconnecting)."""
+        with self._tx_lock:
+            if not self.running or not self._tx_open:
+                return False
+            self._tx_q.put(packet)
+            return True
+
+    def _close_tx(self, tx_q):
+        """Stops accepting packets for tx_q (unless connect() already replaced it)."""
+        with self._tx_lock:
+            if self._tx_q is tx_q:
+                self._tx_open = False
+
+    def _tx_loop(self, tx_q):
+        """Writer thread: sends queued packets in order until the None sentinel.
+
+        Whatever is already queued when it wakes up goes out in one gather
+        write, so bursts share segments without waiting for more input.
+        """
+        try:
+            self._tx_send_loop(tx_q)
+        finally:
+            # Anything queued from here on would never be sent
+            self._close_tx(tx_q)
+
+    def _tx_send_loop(self, tx_q):
+        """Body of _tx_loop; returns when the sentinel arrives or a send fails."""
+        stop = False
+        while not stop:
+            batch = [tx_q.get()]
+            while len(batch) < _TX_BATCH_MAX:
+                try:
+                    batch.append(tx_q.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                batch = batch[:batch.index(None)]
+                stop = True
+            sock = self.sock
+            if sock is None:
+                break
+            if not batch:
+                continue
+            try:
+                self._send_batch(sock, batch)
+            except Exception as e:
+                print(f"[ChatClient] Send Error: {e}")
+                # Refuse new packets before the reconnect window opens
+                self._close_tx(tx_q)
+                # Shut the socket down so the listener's read fails and it runs the reconnect path
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                break
+
+    @staticmethod
+    def _send_batch(sock, batch):
+        """Writes all packets in batch, finishing any partial gather write with sendall."""
+        if len(batch) == 1:
+            sock.sendall(batch[0])
+        else:
+            send_buffers(sock, batch)
+
     def _listen_loop(self):
         """Continuously listens for incoming messages."""
+        # Local bindings for the per-message calls (self.sock can change on reconnect)
+        _read = read_tcp_message
+        _unpack = unpack_message
+        _peek = peek_msg_type
         while self.running:
             try:
-                raw = read_tcp_message(self.sock)
+                raw = _read(self.sock)
                 if not raw:
                     print("[ChatClient] Connection closed by server")
                     if not self._attempt_reconnect():
                         break
+                    # connect() started a fresh listener for the new socket
+                    return
 
-                version, msg_type, _, _, payload = unpack_message(raw)
+                # Heartbeats are the most frequent message; skip them before a full unpack
+                if _peek(raw) == CMD_HEARTBEAT:
+                    continue
+
+                version, msg_type, _, _, payload = _unpack(raw)
 
                 if msg_type == MSG_CHAT:
                     self._handle_chat(payload)
                 elif msg_type == CMD_USER_LIST:
                     self._handle_user_list(payload)
-                elif msg_type == CMD_HEARTBEAT:
-                    continue
                 elif msg_type == CMD_DISCONNECT:
                     print("[ChatClient] Server requested disconnect")
                     break
                 else:
                     # Try file notify
                     try:
-                        from shared.protocol import FILE_NOTIFY_AVAILABLE
                         if msg_type == FILE_NOTIFY_AVAILABLE:
                             self._handle_file_notify(payload)
                             continue
@@ -171,11 +292,14 @@ class ChatClient:
                         pass
 
             except (ConnectionResetError, OSError) as e:
-                if os.environ.get('SAPORA_DEBUG'):
+                if _DEBUG:
                     print(f"[ChatClient] Connection error: {e}")
+                # A local disconnect() also lands here; only a dropped link reconnects
+                if not self._stop_event.is_set() and self._attempt_reconnect():
+                    return
                 break
             except Exception as e:
-                if os.environ.get('SAPORA_DEBUG'):
+                if _DEBUG:
                     print(f"[ChatClient] Listen Error: {e}")
                 continue
 
@@ -191,25 +315,23 @@ class ChatClient:
         4. It's a system message
         """
         try:
-            raw = payload.decode('utf-8', errors='ignore')
-            
             try:
-                obj = json.loads(raw)
+                # Parse the bytes directly; only legacy plain-text messages get decoded
+                obj = json_loads(payload)
                 sender = obj.get('sender', 'SYSTEM')
                 text = obj.get('text', '')
                 target = obj.get('target', 'all')
                 msg_type = obj.get('type', '')
                 
                 # Debug logging
-                if os.environ.get('SAPORA_DEBUG'):
+                if _DEBUG:
                     print(f"[ChatClient] Received from '{sender}' to '{target}': type={msg_type}, text={text[:50]}")
                 
                 # Handle file announcements separately
                 if msg_type == 'file_announce':
-                    target_lower = str(target).strip().lower()
-                    username_lower = str(self.username).strip().lower()
+                    target_lower = _lower(target)
                     
-                    if target_lower == 'all' or target_lower == username_lower:
+                    if target_lower == 'all' or target_lower == self._username_lower:
                         if self.file_callback:
                             self.file_callback(obj)
                     return
@@ -217,54 +339,51 @@ class ChatClient:
                 # Skip delivery confirmations from being displayed as messages
                 if msg_type == 'delivery_confirm':
                     # Only log in debug mode
-                    if os.environ.get('SAPORA_DEBUG'):
+                    if _DEBUG:
                         print(f"[ChatClient] Delivery confirmation: {text}")
                     return
                 
                 # Handle error messages - always show to intended recipient
                 if msg_type == 'error':
-                    target_lower = str(target).strip().lower()
-                    username_lower = str(self.username).strip().lower()
-                    
-                    if target_lower == username_lower:
+                    if _lower(target) == self._username_lower:
                         if self.message_callback:
                             self.message_callback('SYSTEM', text)
                     return
                 
                 # CRITICAL FIX: Case-insensitive message filtering
-                target_lower = str(target).strip().lower()
-                username_lower = str(self.username).strip().lower()
-                sender_lower = str(sender).strip().lower()
+                target_lower = _lower(target)
+                username_lower = self._username_lower
+                sender_lower = _lower(sender)
                 
                 # Determine if we should receive this message
                 should_receive = False
                 
-                if target_lower in ['all', 'everyone', '']:
+                if target_lower in _BROADCAST_TARGETS:
                     # Broadcast message - everyone receives
                     should_receive = True
-                    if os.environ.get('SAPORA_DEBUG'):
+                    if _DEBUG:
                         print(f"[ChatClient] ✅ Broadcast message")
                 elif target_lower == username_lower:
                     # Private message TO us
                     should_receive = True
-                    if os.environ.get('SAPORA_DEBUG'):
+                    if _DEBUG:
                         print(f"[ChatClient] ✅ Private message TO us")
                 elif sender_lower == username_lower:
                     # Message FROM us (echo for confirmation) - DON'T show, sender already has local echo
                     should_receive = False
-                    if os.environ.get('SAPORA_DEBUG'):
+                    if _DEBUG:
                         print(f"[ChatClient] ⏭️  Skip - our own message echo")
                 else:
                     # Private message for someone else - don't show
                     should_receive = False
-                    if os.environ.get('SAPORA_DEBUG'):
+                    if _DEBUG:
                         print(f"[ChatClient] ⏭️  Skip - private message for {target}")
                 
                 if not should_receive:
                     return
                 
                 # Add annotation for private messages
-                if target_lower not in ['all', 'everyone', '']:
+                if target_lower not in _BROADCAST_TARGETS:
                     if sender_lower == username_lower:
                         text = f"(to {target}) {text}"
                     else:
@@ -273,11 +392,12 @@ class ChatClient:
                 # Deliver to UI
                 if self.message_callback:
                     self.message_callback(sender.strip(), text.strip())
-                    if os.environ.get('SAPORA_DEBUG'):
+                    if _DEBUG:
                         print(f"[ChatClient] 📨 Delivered to UI: {sender} -> {text[:50]}")
                     
             except json.JSONDecodeError:
                 # Fallback for legacy messages
+                raw = payload.decode('utf-8', errors='ignore')
                 if ':' in raw:
                     sender, text = raw.split(':', 1)
                 else:
@@ -288,7 +408,7 @@ class ChatClient:
                     self.message_callback(sender.strip(), text.strip())
                     
         except Exception as e:
-            if os.environ.get('SAPORA_DEBUG'):
+            if _DEBUG:
                 print(f"[ChatClient] Chat decode error: {e}")
                 import traceback
                 traceback.print_exc()
@@ -296,15 +416,13 @@ class ChatClient:
     def _handle_file_notify(self, payload):
         """Handles file availability notifications."""
         try:
-            raw = payload.decode('utf-8', errors='ignore')
-            obj = json.loads(raw)
+            obj = json_loads(payload)
             target = obj.get('target', 'all')
             
             # Case-insensitive filtering
-            target_lower = str(target).strip().lower()
-            username_lower = str(self.username).strip().lower()
+            target_lower = _lower(target)
             
-            if target_lower not in ['all', 'everyone'] and target_lower != username_lower:
+            if target_lower not in _FILE_BROADCAST_TARGETS and target_lower != self._username_lower:
                 return
             
             if self.file_callback:
@@ -315,8 +433,8 @@ class ChatClient:
     def _handle_user_list(self, payload):
         """Handles updated user list from the server."""
         try:
-            user_list = json.loads(payload.decode('utf-8'))
-            if os.environ.get('SAPORA_DEBUG'):
+            user_list = json_loads(payload)
+            if _DEBUG:
                 print(f"[ChatClient] Received user list: {len(user_list)} users")
             
             if self.user_list_callback:
@@ -325,15 +443,25 @@ class ChatClient:
             print(f"[ChatClient] User list decode error: {e}")
 
     def disconnect(self):
-        """Cleanly disconnects from server."""
+        """Cleanly disconnects from server (and cancels any pending reconnect)."""
+        self._stop_event.set()
+        self._close()
+
+    def _close(self):
+        """Flushes the writer, sends CMD_DISCONNECT and closes the socket."""
         if not self.sock:
             return
         
         self.running = False
         try:
-            packet = pack_message(CMD_DISCONNECT)
-            with self.send_lock:
-                self.sock.sendall(packet)
+            # Flush queued messages plus the disconnect notice, then stop the writer
+            tx_q = self._tx_q
+            self._close_tx(tx_q)
+            tx_q.put(pack_message(CMD_DISCONNECT))
+            tx_q.put(None)
+            tx_thread = self._tx_thread
+            if tx_thread and tx_thread is not threading.current_thread():
+                tx_thread.join(timeout=CONNECTION_TIMEOUT)
         except:
             pass
         finally:
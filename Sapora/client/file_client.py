@@ -5,7 +5,11 @@ Handles reliable TCP file upload and download operations.
 
 import socket
 import os
-import hashlib
+import mmap
+import queue
+import select
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
 import sys
 import time
@@ -13,59 +17,155 @@ import time
 # Add parent path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from shared.constants import (
-    FILE_TRANSFER_PORT, FILE_CHUNK_SIZE, MAX_FILE_SIZE, CONNECTION_TIMEOUT,
+    FILE_TRANSFER_PORT, FILE_CHUNK_SIZE, MAX_FILE_CHUNK_SIZE, MAX_FILE_SIZE, CONNECTION_TIMEOUT,
+    FILE_SOCKET_BUFFER, CHECKSUM_ALGO, FILE_POOL_SIZE, VERIFY_MIN_SIZE,
 )
 from shared.protocol import (
-    FILE_REQUEST_UPLOAD, FILE_REQUEST_DOWNLOAD, FILE_METADATA, FILE_CHUNK,
-    FILE_ACK_SUCCESS, FILE_ACK_FAILURE
+    FILE_REQUEST_UPLOAD, FILE_METADATA, FILE_CHUNK,
+    FILE_CHUNK_STREAM, FILE_METADATA_CHECKSUM, FILE_REQUEST_END, FILE_ACK_SUCCESS, FILE_ACK_FAILURE,
+    FILE_REQUEST_DOWNLOAD_OPTS
 )
-from client.utils import pack_message, unpack_message, read_tcp_message, format_size
-from shared.helpers import pack_file_metadata, unpack_file_metadata
+from client.utils import (
+    pack_message, pack_header, unpack_message, read_tcp_message, format_size,
+    raise_socket_buffers, set_tcp_low_latency, send_buffers, FrameReader
+)
+from shared.helpers import pack_upload_metadata, unpack_file_metadata, preallocate_file, json_dumps
+from shared.checksum import (
+    cached_file_checksum, checksum_buffer, new_hasher, resolve_algo, supported_algos,
+    checksum_cache_key, cached_checksum, remember_checksum
+)
+
+# Kernel-side file->socket copy; elsewhere (Windows) uploads use framed mmap chunks only
+HAS_SENDFILE = hasattr(os, 'sendfile')
+# Bytes per sendfile() call inside one FILE_CHUNK_STREAM run (bounds progress update gaps)
+SENDFILE_SLICE = 8 * 1024 * 1024
+# Framed FILE_CHUNKs (header + payload pairs) flushed per gather write
+CHUNKS_PER_SEND = 16
+# Framed uploads double their chunk size (up to MAX_FILE_CHUNK_SIZE) while the
+# throughput measured over each window stays above this rate
+FAST_LINK_RATE = 100 * 1024 * 1024
+CHUNK_RATE_WINDOW = 0.25
+# Status updates at most once per interval; the per-chunk download loop only
+# reads the clock every PROGRESS_CHECK_EVERY chunks (power of two)
+PROGRESS_INTERVAL_NS = 1_000_000_000
+PROGRESS_CHECK_EVERY = 16
+# Read-ahead hint for mapped uploads (Python 3.8+ on Linux/macOS)
+HAS_MADVISE = hasattr(mmap.mmap, 'madvise') and hasattr(mmap, 'MADV_WILLNEED')
+# Upload checksums run here while the data is sent (hashlib releases the GIL)
+_HASH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sapora-hash')
+
+
+def _hash_mapping(mm, algo, cache_key):
+    """Hashes a mapped upload and remembers the digest for repeat uploads."""
+    digest = checksum_buffer(mm, algo)
+    remember_checksum(cache_key, digest)
+    return digest
 
 
 class FileTransferClient:
-    """Handles file upload and download operations."""
+    """Handles file upload and download operations.
+
+    Connections that finish a transfer cleanly are kept in a small pool and
+    reused by the next one, so back-to-back transfers skip the TCP handshake.
+    """
 
     def __init__(self, server_ip, server_port=FILE_TRANSFER_PORT, status_callback=None):
         self.server_ip = server_ip
         self.server_port = server_port
         self.status_callback = status_callback or (lambda msg: None)
-        self.sock = None
+        # Each transfer thread works on its own connection
+        self._local = threading.local()
+        self._idle = queue.LifoQueue(maxsize=FILE_POOL_SIZE)
+
+    @property
+    def sock(self):
+        return getattr(self._local, 'sock', None)
+
+    @sock.setter
+    def sock(self, value):
+        self._local.sock = value
+
+    @staticmethod
+    def _is_reusable(sock):
+        """An idle connection must have nothing to read; EOF/RST means the server dropped it."""
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            return not readable
+        except Exception:
+            return False
 
     def _connect(self):
-        """Establishes a temporary TCP connection for the transfer."""
+        """Takes a warm pooled connection or establishes a new TCP connection for the transfer."""
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._is_reusable(pooled):
+                pooled.settimeout(CONNECTION_TIMEOUT)
+                self.sock = pooled
+                return True
+            try:
+                pooled.close()
+            except Exception:
+                pass
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.settimeout(CONNECTION_TIMEOUT)
             self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            # Large buffers must be in place before connect to get a matching window scale
+            raise_socket_buffers(self.sock, FILE_SOCKET_BUFFER, FILE_SOCKET_BUFFER)
             self.sock.connect((self.server_ip, self.server_port))
+            # Headers and tails are small writes; don't let Nagle hold them back
+            set_tcp_low_latency(self.sock)
             return True
         except Exception as e:
             self.status_callback(f"❌ File connection error: {e}")
             self._disconnect()
             return False
 
-    def _disconnect(self):
-        if self.sock:
+    def _disconnect(self, reuse=False):
+        """Ends this thread's transfer; a cleanly finished connection goes back to the pool."""
+        sock, self.sock = self.sock, None
+        if not sock:
+            return
+        if reuse:
             try:
-                self.sock.close()
-            except:
+                self._idle.put_nowait(sock)
+                return
+            except queue.Full:
                 pass
-        self.sock = None
-
-    def _calculate_md5(self, file_path: Path):
-        """Calculates MD5 checksum of file."""
-        md5_hash = hashlib.md5()
         try:
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(FILE_CHUNK_SIZE), b''):
-                    md5_hash.update(chunk)
-            return md5_hash.hexdigest()
-        except Exception:
-            return None
+            sock.close()
+        except:
+            pass
+
+    def close(self):
+        """Closes all pooled connections, telling the server they are done."""
+        while True:
+            try:
+                sock = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                sock.sendall(pack_message(FILE_REQUEST_END))
+            except Exception:
+                pass
+            try:
+                sock.close()
+            except Exception:
+                pass
+
+    def _calculate_checksum(self, file_path: Path, algo='md5'):
+        """Calculates the checksum of a file (cached while the file is unchanged)."""
+        return cached_file_checksum(file_path, algo)
 
-    def upload_file(self, file_path_str, target='all'):
-        """Uploads a file to the server with target routing. Returns True/False."""
+    def upload_file(self, file_path_str, target='all', verify=None):
+        """Uploads a file to the server with target routing. Returns True/False.
+
+        verify=False skips the checksum pass on both ends (TCP already checksums
+        every segment); None verifies only files of VERIFY_MIN_SIZE and up.
+        """
         file_path = Path(file_path_str)
         if not file_path.exists() or file_path.stat().st_size == 0:
             self.status_callback(f"❌ File not found or empty: {file_path.name}")
@@ -79,44 +179,45 @@ class FileTransferClient:
         if not self._connect():
             return False
 
-        checksum = self._calculate_md5(file_path) or ""
         filename = file_path.name
+        reusable = False
+        if verify is None:
+            verify = file_size >= VERIFY_MIN_SIZE
 
         try:
-            # Create enhanced metadata with target information
-            import json
-            metadata_obj = {
-                'filename': filename,
-                'filesize': file_size,
-                'checksum': checksum,
-                'target': target
-            }
-            metadata_payload = json.dumps(metadata_obj).encode('utf-8')
-            
-            # Send upload request with enhanced metadata
-            request_packet = pack_message(FILE_REQUEST_UPLOAD, metadata_payload)
-            self.sock.sendall(request_packet)
-            self.status_callback(f"📤 Uploading {filename} ({format_size(file_size)}) to {target}...")
-
-            bytes_sent = 0
-            last_report = time.time()
-            with open(file_path, 'rb') as f:
-                while True:
-                    chunk = f.read(FILE_CHUNK_SIZE)
-                    if not chunk:
-                        break
-                    try:
-                        self.sock.sendall(pack_message(FILE_CHUNK, chunk))
-                    except Exception as e:
-                        self.status_callback(f"❌ Send error: {e}")
-                        raise
-
-                    bytes_sent += len(chunk)
-
-                    # occasional progress update (every 1s)
-                    if time.time() - last_report >= 1.0:
-                        self.status_callback(f"📤 Sent {format_size(bytes_sent)} / {format_size(file_size)}")
-                        last_report = time.time()
+            # One read-only mapping serves both the checksum and the chunk sends,
+            # so the file is paged in once and chunks are sliced without copies
+            with open(file_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                    memoryview(mm) as view:
+                # The digest follows the data in a FILE_METADATA_CHECKSUM trailer.
+                # sendfile() never brings the bytes into user space, so there the hash
+                # runs on a worker thread alongside; framed-only uploads hash each
+                # chunk in the send loop while it is still hot in cache.
+                checksum_algo = resolve_algo(CHECKSUM_ALGO)
+                cache_key = checksum_cache_key(file_path, checksum_algo) if verify else None
+                cached = cached_checksum(cache_key)
+                hasher = None
+                checksum_future = None
+                if not verify:
+                    pass  # No checksum and no trailer
+                elif cached:
+                    # Same unchanged file shared again (e.g. to another target)
+                    checksum_future = Future()
+                    checksum_future.set_result(cached)
+                elif HAS_SENDFILE:
+                    checksum_future = _HASH_POOL.submit(_hash_mapping, mm, checksum_algo, cache_key)
+                else:
+                    hasher = new_hasher(checksum_algo)
+                try:
+                    self._send_upload(f, mm, view, filename, file_size, target, checksum_algo,
+                                      checksum_future, hasher)
+                finally:
+                    # A worker hash holds the mapping; let it finish before it is closed
+                    if checksum_future is not None:
+                        wait([checksum_future])
+                if hasher is not None:
+                    remember_checksum(cache_key, hasher.hexdigest())
 
             # wait for ack
             ack_raw = read_tcp_message(self.sock)
@@ -126,6 +227,7 @@ class FileTransferClient:
 
             _, ack_type, _, _, ack_payload = unpack_message(ack_raw)
             if ack_type == FILE_ACK_SUCCESS:
+                reusable = True
                 self.status_callback(f"✅ Upload successful: {filename}")
                 return True
             else:
@@ -137,10 +239,107 @@ class FileTransferClient:
             self.status_callback(f"❌ Upload error: {e}")
             return False
         finally:
-            self._disconnect()
-
-    def download_file(self, file_name, save_path):
-        """Downloads a file from the server. Returns True/False."""
+            self._disconnect(reuse=reusable)
+
+    def _send_upload(self, f, mm, view, filename, file_size, target, checksum_algo, checksum_future,
+                     hasher=None):
+        """Sends the upload request, the file data from the mapping, then the checksum trailer.
+
+        With a hasher, every framed chunk is hashed just before it is sent and
+        the trailer carries its digest; otherwise checksum_future provides it.
+        With neither, the upload is unverified and no trailer is sent.
+        """
+        deferred = hasher is not None or checksum_future is not None
+        # Fixed binary metadata header with target information
+        metadata_payload = pack_upload_metadata(
+            filename, file_size, target=target, checksum_algo=checksum_algo, checksum_deferred=deferred
+        )
+
+        # Send upload request with enhanced metadata
+        request_packet = pack_message(FILE_REQUEST_UPLOAD, metadata_payload)
+        self.sock.sendall(request_packet)
+        self.status_callback(f"📤 Uploading {filename} ({format_size(file_size)}) to {target}...")
+
+        bytes_sent = 0
+        last_report = time.monotonic_ns()
+
+        # Whole chunks go out as one raw run copied in-kernel by sendfile();
+        # the sub-chunk tail below keeps the regular FILE_CHUNK framing
+        bulk = file_size - file_size % FILE_CHUNK_SIZE if HAS_SENDFILE else 0
+        if bulk:
+            self.sock.sendall(pack_header(FILE_CHUNK_STREAM, bulk))
+            while bytes_sent < bulk:
+                try:
+                    bytes_sent += self.sock.sendfile(
+                        f, bytes_sent, min(SENDFILE_SLICE, bulk - bytes_sent)
+                    )
+                except Exception as e:
+                    self.status_callback(f"❌ Send error: {e}")
+                    raise
+                if time.monotonic_ns() - last_report >= PROGRESS_INTERVAL_NS:
+                    self.status_callback(f"📤 Sent {format_size(bytes_sent)} / {format_size(file_size)}")
+                    last_report = time.monotonic_ns()
+
+        # Remaining framed chunks: up to CHUNKS_PER_SEND header/payload
+        # pairs go out per sendmsg() instead of one sendall() each. Every
+        # FILE_CHUNK is length-prefixed, so the size can grow mid-transfer.
+        _pack_header = pack_header
+        chunk_size = FILE_CHUNK_SIZE
+        window_start = time.monotonic()
+        window_bytes = 0
+        batch_start = bytes_sent
+        while batch_start < file_size:
+            batch_span = chunk_size * CHUNKS_PER_SEND
+            batch_end = min(batch_start + batch_span, file_size)
+            # Have the kernel page in the next batch while this one is on the wire
+            if HAS_MADVISE and batch_end < file_size:
+                mm.madvise(mmap.MADV_WILLNEED, batch_end, min(batch_span, file_size - batch_end))
+            parts = []
+            for offset in range(batch_start, batch_end, chunk_size):
+                chunk = view[offset:min(offset + chunk_size, batch_end)]
+                if hasher is not None:
+                    hasher.update(chunk)
+                parts.append(_pack_header(FILE_CHUNK, len(chunk)))
+                parts.append(chunk)
+            try:
+                send_buffers(self.sock, parts)
+            except Exception as e:
+                self.status_callback(f"❌ Send error: {e}")
+                raise
+            finally:
+                # Drop the slices so the mapping can close afterwards
+                for part in parts:
+                    if isinstance(part, memoryview):
+                        part.release()
+            window_bytes += batch_end - batch_start
+            bytes_sent = batch_start = batch_end
+
+            # Fast link: fewer, larger chunks cut the per-chunk syscall/header cost
+            if chunk_size < MAX_FILE_CHUNK_SIZE:
+                elapsed = time.monotonic() - window_start
+                if elapsed >= CHUNK_RATE_WINDOW:
+                    if window_bytes / elapsed > FAST_LINK_RATE:
+                        chunk_size = min(chunk_size * 2, MAX_FILE_CHUNK_SIZE)
+                    window_start += elapsed
+                    window_bytes = 0
+
+            # occasional progress update (every 1s)
+            if time.monotonic_ns() - last_report >= PROGRESS_INTERVAL_NS:
+                self.status_callback(f"📤 Sent {format_size(bytes_sent)} / {format_size(file_size)}")
+                last_report = time.monotonic_ns()
+
+        if not deferred:
+            return
+        # Only now wait for the digest, which has been computing alongside the sends
+        checksum = hasher.hexdigest() if hasher is not None else checksum_future.result()
+        self.sock.sendall(pack_message(FILE_METADATA_CHECKSUM, checksum.encode('ascii')))
+
+    def download_file(self, file_name, save_path, verify=None):
+        """Downloads a file from the server. Returns True/False.
+
+        verify=False asks the server to skip the checksum; None leaves the
+        choice to the server's VERIFY_MIN_SIZE rule.
+        """
         try:
             output_dir = Path(save_path)
             output_dir.mkdir(parents=True, exist_ok=True)
@@ -151,9 +350,14 @@ class FileTransferClient:
         if not self._connect():
             return False
 
+        reusable = False
         try:
-            # request download
-            request_packet = pack_message(FILE_REQUEST_DOWNLOAD, file_name.encode('utf-8'))
+            # request download, advertising the checksums this side can verify;
+            # verify=None leaves the choice to the server
+            options = {'filename': file_name, 'algos': supported_algos(CHECKSUM_ALGO)}
+            if verify is not None:
+                options['verify'] = bool(verify)
+            request_packet = pack_message(FILE_REQUEST_DOWNLOAD_OPTS, json_dumps(options))
             self.sock.sendall(request_packet)
 
             # read metadata
@@ -183,32 +387,53 @@ class FileTransferClient:
 
             output_file = output_dir / file_name
             bytes_received = 0
-            last_report = time.time()
-            with open(output_file, 'wb') as f:
-                while bytes_received < filesize:
-                    chunk_raw = read_tcp_message(self.sock)
-                    if chunk_raw is None:
+            chunks_received = 0
+            last_report = time.monotonic_ns()
+            # Hash each chunk as it arrives instead of re-reading the file afterwards
+            hasher = new_hasher(metadata.get('checksum_algo')) if checksum else None
+            if checksum and hasher is None:
+                self.status_callback(
+                    f"❌ Download failed: unsupported checksum '{metadata.get('checksum_algo')}'."
+                )
+                return False
+            # Allocate the file up front and write chunks straight into a shared mapping
+            with open(output_file, 'w+b') as f:
+                preallocate_file(f, filesize)
+                with mmap.mmap(f.fileno(), filesize) as mm:
+                    # Several chunks are parsed out of each large recv_into()
+                    reader = FrameReader(self.sock)
+                    for chunk_type, chunk_payload in reader.frames():
+                        if chunk_type != FILE_CHUNK:
+                            raise ValueError("Unexpected message received during download.")
+
+                        end = bytes_received + len(chunk_payload)
+                        if end > filesize:
+                            raise IOError("Server sent more data than announced.")
+                        mm[bytes_received:end] = chunk_payload
+                        if hasher is not None:
+                            hasher.update(chunk_payload)
+                        bytes_received = end
+
+                        # occasional progress update
+                        chunks_received += 1
+                        if not chunks_received & (PROGRESS_CHECK_EVERY - 1):
+                            now = time.monotonic_ns()
+                            if now - last_report >= PROGRESS_INTERVAL_NS:
+                                self.status_callback(f"📥 Received {format_size(bytes_received)} / {format_size(filesize)}")
+                                last_report = now
+                        if bytes_received >= filesize:
+                            break
+                    else:
                         raise ConnectionAbortedError("Connection lost during download.")
 
-                    _, chunk_type, _, _, chunk_payload = unpack_message(chunk_raw)
-                    if chunk_type != FILE_CHUNK:
-                        raise ValueError("Unexpected message received during download.")
-
-                    f.write(chunk_payload)
-                    bytes_received += len(chunk_payload)
-
-                    # occasional progress update
-                    if time.time() - last_report >= 1.0:
-                        self.status_callback(f"📥 Received {format_size(bytes_received)} / {format_size(filesize)}")
-                        last_report = time.time()
-
             if bytes_received != filesize:
                 raise IOError("Incomplete download received.")
+            # Whole file consumed: the connection is clean for another transfer
+            reusable = True
 
             # verify checksum
-            if checksum:
-                actual_checksum = self._calculate_md5(output_file) or ""
-                if actual_checksum != checksum:
+            if hasher is not None:
+                if hasher.hexdigest() != checksum:
                     try:
                         output_file.unlink()
                     except Exception:
@@ -223,4 +448,4 @@ class FileTransferClient:
             self.status_callback(f"❌ Download error: {e}")
             return False
         finally:
-            self._disconnect()
+            self._disconnect(reuse=reusable)
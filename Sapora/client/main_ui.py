@@ -6,6 +6,7 @@ Modern Zoom-like interface integrating video, audio, chat, file transfer, and sc
 
 import sys
 import os
+import asyncio
 from pathlib import Path
 
 from PyQt6.QtWidgets import (
@@ -14,61 +15,157 @@ from PyQt6.QtWidgets import (
     QFileDialog, QMessageBox, QScrollArea, QFrame, QDialog,
     QDialogButtonBox, QSizePolicy, QGridLayout
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize, QObject, QUrl
-from PyQt6.QtGui import QPixmap, QImage, QFont, QIcon, QDesktopServices
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, pyqtSlot, QTimer, QSize, QObject, QUrl, QMetaObject, QProcess
+from PyQt6.QtGui import (
+    QPixmap, QImage, QFont, QIcon, QDesktopServices, QPainter, QTextCursor,
+    QTextCharFormat, QTextBlockFormat, QColor
+)
+from PyQt6 import sip
 import cv2
 import numpy as np
 import json
-import subprocess
 from datetime import datetime
 from typing import Optional, Dict
 import math
+import time
+import html
+import threading
+import traceback
+from collections import deque, OrderedDict
 
 # Import client modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from client.video_client import VideoClient
-# Robustly load AudioClient from the local file to avoid namespace collisions
-import importlib.util as _ilu
-from pathlib import Path as _Path
-_audio_client_cls = None
-try:
-    _ac_path = (_Path(__file__).parent / 'audio_client.py').resolve()
-    _spec = _ilu.spec_from_file_location('sapora_audio_client', str(_ac_path))
-    _mod = _ilu.module_from_spec(_spec)
-    assert _spec and _spec.loader
-    _spec.loader.exec_module(_mod)
-    _audio_client_cls = getattr(_mod, 'AudioClient', None)
-except Exception:
-    from client.audio_client import AudioClient as _FallbackAudioClient
-    _audio_client_cls = _FallbackAudioClient
+from client.audio_client import AudioClient
 from client.chat_client import ChatClient
 from client.file_client import FileTransferClient
 from client.screen_share_client import ScreenShareClient
+from client.utils import jpeg_reduce_factor
 from shared.constants import DEFAULT_SERVER_IP, VIDEO_PORT, CONTROL_PORT
 from shared.lan_discovery import start_client_discovery
 
+# Frames closer together than this (seconds) count as streaming and get the
+# fast bilinear prescale; a source that goes still is re-fitted smoothly once
+FAST_SCALE_INTERVAL = 0.08
+
+# Source tag stored with the pending screen frame
+SCREEN_LOCAL = 0   # presenter's own preview
+SCREEN_REMOTE = 1  # frame received as a viewer
+
+# Deletes the emoji prefixes of chat target dropdown entries in one str.translate pass
+_TARGET_EMOJI_STRIP = str.maketrans('', '', '📢👤')
+
+# Chat timestamp string for the current minute; "%H:%M" only changes once a minute
+_hhmm_minute = None
+_hhmm_str = ''
+
+
+def _hhmm():
+    """Current local time as HH:MM, re-formatted only when the minute rolls over."""
+    global _hhmm_minute, _hhmm_str
+    # Local-time minute boundaries coincide with epoch ones (UTC offsets are whole minutes)
+    minute = int(time.time() // 60)
+    if minute != _hhmm_minute:
+        _hhmm_str = datetime.now().strftime("%H:%M")
+        _hhmm_minute = minute
+    return _hhmm_str
+
+
+# Chat bubbles are inserted as text runs with cached formats (no HTML parsing,
+# no escaping needed): style name -> (colour, bold, italic)
+_CHAT_STYLES = {
+    'ts': ('#888', False, False),
+    'you': ('#4CAF50', True, False),
+    'sender': ('#2196F3', True, False),
+    'system': ('#FFC107', True, False),
+    'error': ('#f44336', True, False),
+    'to_all': ('#aaa', False, False),
+    'private': ('#FF9800', False, False),
+    'text': ('#fff', False, False),
+    'text_italic': ('#fff', False, True),
+    'hint': ('#888', False, True),
+}
+_CHAT_BUBBLE_BG = '#2a2a2a'
+# Line break inside one bubble block (what <br/> used to be)
+_CHAT_BR = ('\u2028', 'text')
+
 
 # ============================================================================
 # WORKER THREADS FOR NON-BLOCKING OPERATIONS
 # ============================================================================
 
-class VideoStreamThread(QThread):
-    """Thread for handling video streaming operations"""
-    # Note: frames are emitted by the VideoClient's callback which now emits a signal.
+class NetIOReactor(QThread):
+    """Single network I/O thread shared by the stream and file transfer workers.
+
+    Runs an asyncio selector loop: stream sockets are serviced by add_reader
+    callbacks on this one thread, and blocking client calls (registration,
+    file transfers) run on the loop's reusable executor threads instead of a
+    fresh QThread each. All methods are safe to call from any thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Selector loop everywhere: the Windows proactor loop has no add_reader
+        self.loop = asyncio.SelectorEventLoop()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def add_reader(self, sock, callback):
+        self.loop.call_soon_threadsafe(self.loop.add_reader, sock, callback)
+
+    def remove_reader(self, sock, close=False):
+        def _remove():
+            try:
+                self.loop.remove_reader(sock)
+            except Exception:
+                pass
+            if close:
+                try:
+                    sock.close()
+                except Exception:
+                    pass
+        self.loop.call_soon_threadsafe(_remove)
+
+    def call_later(self, delay, callback):
+        self.loop.call_soon_threadsafe(self.loop.call_later, delay, callback)
+
+    def submit(self, fn, *args):
+        """Runs a blocking call on an executor thread."""
+        self.loop.call_soon_threadsafe(self.loop.run_in_executor, None, fn, *args)
+
+    def stop(self):
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class VideoStreamThread(QObject):
+    """Starts the video receiver on the shared reactor (frames arrive via the VideoClient callback)"""
     status_update = pyqtSignal(str)
     
-    def __init__(self, video_client):
+    def __init__(self, video_client, reactor):
         super().__init__()
         self.video_client = video_client
+        self.reactor = reactor
         self._running = False
     
-    def run(self):
+    def start(self):
         self._running = True
+        self.reactor.submit(self._start_receiving)
+
+    def _start_receiving(self):
         try:
-            # VideoClient.start_receiving should invoke the frame callback in its own thread
-            self.video_client.start_receiving()
+            self.video_client.start_receiving(reactor=self.reactor)
         except Exception as e:
+            self._running = False
             self.status_update.emit(f"VideoThread error: {e}")
+
+    def isRunning(self):
+        return self._running
     
     def stop(self):
         self._running = False
@@ -77,23 +174,34 @@ class VideoStreamThread(QThread):
         except Exception:
             pass
 
+    def wait(self, msecs=None):
+        return True
 
-class AudioStreamThread(QThread):
-    """Thread for handling audio streaming operations"""
+
+class AudioStreamThread(QObject):
+    """Starts audio playback via the shared reactor's executor"""
     status_update = pyqtSignal(str)
     
-    def __init__(self, audio_client):
+    def __init__(self, audio_client, reactor):
         super().__init__()
         self.audio_client = audio_client
+        self.reactor = reactor
         self._running = False
     
-    def run(self):
+    def start(self):
         self._running = True
+        self.reactor.submit(self._start_receiving)
+
+    def _start_receiving(self):
         try:
-            # AudioClient manages its own send/receive threads; call start_receiving to begin playback thread
+            # AudioClient keeps its own latency-critical receive thread; this only starts playback
             self.audio_client.start_receiving()
         except Exception as e:
+            self._running = False
             self.status_update.emit(f"AudioThread error: {e}")
+
+    def isRunning(self):
+        return self._running
     
     def stop(self):
         self._running = False
@@ -102,19 +210,31 @@ class AudioStreamThread(QThread):
         except Exception:
             pass
 
+    def wait(self, msecs=None):
+        return True
+
 
-class FileTransferThread(QThread):
-    """Thread for file upload/download operations"""
+class FileTransferThread(QObject):
+    """File upload/download run on the shared reactor's executor"""
     status_update = pyqtSignal(str)
     transfer_complete = pyqtSignal(bool)
     
-    def __init__(self, file_client, operation, file_path, save_path=None, target='all'):
+    def __init__(self, file_client, operation, file_path, reactor, save_path=None, target='all'):
         super().__init__()
         self.file_client = file_client
         self.operation = operation
         self.file_path = file_path
+        self.reactor = reactor
         self.save_path = save_path
         self.target = target
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self.reactor.submit(self.run)
+
+    def isRunning(self):
+        return self._running
     
     def run(self):
         try:
@@ -129,6 +249,8 @@ class FileTransferThread(QThread):
         except Exception as e:
             self.status_update.emit(f"File thread error: {e}")
             self.transfer_complete.emit(False)
+        finally:
+            self._running = False
 
 
 # ============================================================================
@@ -334,6 +456,268 @@ class SchedulerDialog(QDialog):
 # VIDEO TILE WIDGET FOR MULTI-PARTICIPANT GRID
 # ============================================================================
 
+def _fit_size(w, h, width, height):
+    """(target_w, target_h, scale) fitting w x h into width x height with the same aspect ratio."""
+    scale = min(width / w, height / h)
+    return max(1, int(w * scale)), max(1, int(h * scale)), scale
+
+
+def _resize_interpolation(scale):
+    # Bilinear reads only 2x2 source pixels per output pixel and does not alias
+    # visibly down to half size; below that INTER_AREA's box filter is needed
+    return cv2.INTER_AREA if scale < 0.5 else cv2.INTER_LINEAR
+
+
+def _grid_cols(num_tiles):
+    """Columns of the near-square tile grid, ceil(sqrt(n)) in integer math; 0 for no tiles."""
+    return math.isqrt(num_tiles - 1) + 1 if num_tiles > 0 else 0
+
+
+def fit_frame(frame, width, height, fast=False):
+    """Resizes a frame with OpenCV to fit width x height, keeping its aspect ratio.
+
+    fast=True always uses bilinear, trading some aliasing on large downscales
+    for speed while a source is streaming at full rate.
+    """
+    h, w = frame.shape[:2]
+    tw, th, scale = _fit_size(w, h, width, height)
+    if (tw, th) == (w, h):
+        return frame
+    interpolation = cv2.INTER_LINEAR if fast else _resize_interpolation(scale)
+    return cv2.resize(frame, (tw, th), interpolation=interpolation)
+
+
+class QImagePool:
+    """Recycles fitted frame QImages from the GUI back to the producer threads.
+
+    An image goes back on the free list only once the view has replaced it,
+    and pop() hands each one to a single caller, so a recycled image is never
+    written while it is on screen.
+    """
+
+    def __init__(self, limit=2):
+        self._free = deque(maxlen=limit)
+
+    def acquire(self, width, height):
+        """Any thread: a BGR888 image of exactly width x height, reused when possible."""
+        while True:
+            try:
+                image = self._free.pop()
+            except IndexError:
+                return QImage(width, height, QImage.Format.Format_BGR888)
+            # Sizes only differ around a resize; let those go
+            if image.width() == width and image.height() == height:
+                return image
+
+    def release(self, image):
+        """GUI thread: returns an image that is no longer displayed."""
+        if image is not None and not image.isNull() and image.format() == QImage.Format.Format_BGR888:
+            self._free.append(image)
+
+
+def frame_to_qimage(frame, pool=None):
+    """Copies a BGR frame (or a slice of one) as-is into a QImage that owns its pixels."""
+    h, w = frame.shape[:2]
+    image = pool.acquire(w, h) if pool is not None else QImage(w, h, QImage.Format.Format_BGR888)
+    np.copyto(_qimage_array(image), frame)
+    return image
+
+
+def _qimage_array(image):
+    """Writable (h, w, 3) numpy view of a BGR888 QImage's pixels."""
+    bits = image.bits()
+    bits.setsize(image.sizeInBytes())
+    return np.ndarray((image.height(), image.width(), 3), dtype=np.uint8, buffer=bits,
+                      strides=(image.bytesPerLine(), 3, 1))
+
+
+# Above this share of changed pixels a full frame is cheaper than a patch
+DIRTY_RECT_MAX_FRACTION = 0.5
+
+
+def _union_rect(a, b):
+    """Bounding box of two (x, y, w, h) rects; None (the whole frame) absorbs anything."""
+    if a is None or b is None:
+        return None
+    if not b[2]:
+        return a
+    x0, y0 = min(a[0], b[0]), min(a[1], b[1])
+    x1, y1 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+class DirtyRectTracker:
+    """Producer side of the screen share view: fits frames and finds what changed.
+
+    Keeps the last fitted frame the view has (or is about to get) and reports
+    only the bounding box of the pixels that differ from it, so the GUI can
+    paint that patch into the image it already shows. Desktop content usually
+    changes in a small area, so most frames move a fraction of the pixels.
+    """
+
+    def __init__(self):
+        self._prev = None
+        self._scratch = None
+        self._diff = None
+        # One-slot mailbox: reset() posts, update() pops, so no reset is lost between threads
+        self._resync = deque(maxlen=1)
+
+    def reset(self):
+        """Any thread: the next update reports a full frame."""
+        self._resync.append(True)
+
+    def update(self, frame, width, height):
+        """Fits frame to width x height; returns (fitted, rect).
+
+        rect is None when the whole frame must be shown, else the (x, y, w, h)
+        box of changed pixels, with w == 0 if nothing changed. fitted stays
+        valid until the next call.
+        """
+        h, w = frame.shape[:2]
+        tw, th, scale = _fit_size(w, h, width, height)
+        cur = self._scratch
+        if cur is None or cur.shape != (th, tw, 3):
+            cur = np.empty((th, tw, 3), dtype=np.uint8)
+        if frame.shape[2] == 4:
+            # BGRA from the presenter's own capture: drop alpha at the fitted size
+            if (tw, th) != (w, h):
+                frame = cv2.resize(frame, (tw, th), interpolation=_resize_interpolation(scale))
+            cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=cur)
+        elif (tw, th) == (w, h):
+            np.copyto(cur, frame)
+        else:
+            cv2.resize(frame, (tw, th), dst=cur, interpolation=_resize_interpolation(scale))
+
+        try:
+            self._resync.pop()
+            prev = None
+        except IndexError:
+            prev = self._prev
+        # This frame becomes the reference; the old reference is the next scratch buffer
+        self._scratch, self._prev = self._prev, cur
+        if prev is None or prev.shape != cur.shape:
+            return cur, None
+
+        diff = self._diff
+        if diff is None or diff.shape != cur.shape:
+            diff = self._diff = np.empty_like(cur)
+        cv2.absdiff(cur, prev, dst=diff)
+        # Box over the rows of bytes, so a change in any channel counts; then bytes -> pixels
+        x, y, bw, bh = cv2.boundingRect(diff.reshape(th, tw * 3))
+        if not bw:
+            return cur, (0, 0, 0, 0)
+        x0, x1 = x // 3, (x + bw + 2) // 3
+        if (x1 - x0) * bh > DIRTY_RECT_MAX_FRACTION * tw * th:
+            return cur, None
+        return cur, (x0, y, x1 - x0, bh)
+
+
+class FrameImageBuffer:
+    """Builds display QImages for one view; Qt reads BGR888 natively, so no colour conversion.
+
+    Frames that already fit are wrapped as-is. Frames that need resizing are
+    scaled into a persistent buffer (grown only when the view gets larger)
+    instead of a fresh array per frame.
+    """
+
+    def __init__(self):
+        self._frame = None
+        self._buf = None
+
+    def to_qimage(self, frame_bgr, width=None, height=None):
+        """Returns a QImage of the frame fitted to width x height, valid until the next call."""
+        h, w = frame_bgr.shape[:2]
+        if width and height:
+            tw, th, scale = _fit_size(w, h, width, height)
+            if (tw, th) != (w, h):
+                return self._resize_into_buffer(frame_bgr, tw, th, scale)
+        return self._wrap(frame_bgr)
+
+    def _wrap(self, frame_bgr):
+        """QImage over the frame's own memory; row padding is fine, only pixels must be packed."""
+        if (frame_bgr.dtype != np.uint8 or frame_bgr.ndim != 3
+                or frame_bgr.strides[1:] != (3, 1) or frame_bgr.strides[0] < 0):
+            frame_bgr = np.ascontiguousarray(frame_bgr, dtype=np.uint8)
+        # The QImage only points into the array, so keep it alive alongside
+        self._frame = frame_bgr
+        h, w = frame_bgr.shape[:2]
+        return QImage(sip.voidptr(frame_bgr.ctypes.data), w, h, frame_bgr.strides[0],
+                      QImage.Format.Format_BGR888)
+
+    def _resize_into_buffer(self, frame_bgr, tw, th, scale):
+        if self._buf is None or self._buf.shape[0] < th or self._buf.shape[1] < tw:
+            bh = max(th, self._buf.shape[0] if self._buf is not None else 0)
+            bw = max(tw, self._buf.shape[1] if self._buf is not None else 0)
+            self._buf = np.empty((bh, bw, 3), dtype=np.uint8)
+        roi = self._buf[:th, :tw]
+        out = cv2.resize(frame_bgr, (tw, th), dst=roi, interpolation=_resize_interpolation(scale))
+        # OpenCV may decline the ROI and allocate; either way show what it wrote
+        return self._wrap(roi if out.ctypes.data == roi.ctypes.data else out)
+
+
+class FrameLabel(QLabel):
+    """QLabel that paints a frame QImage directly, skipping the per-frame QPixmap conversion.
+
+    Text (placeholders, "No Video") still works as on a plain QLabel; setting
+    text or clearing drops the image.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._image = None
+        # (width, height) as of the last resize; a plain tuple so producer
+        # threads can read it to fit frames before they reach the GUI
+        self.frame_size = None
+
+    def resizeEvent(self, event):
+        self.frame_size = (self.width(), self.height())
+        super().resizeEvent(event)
+
+    def set_image(self, image):
+        """Shows image (already fitted to the label) on the next paint; returns the one it replaces."""
+        previous = self._image
+        if previous is None:
+            super().clear()
+        self._image = image
+        self.update()
+        return previous
+
+    def patch_image(self, x, y, patch, size):
+        """Paints patch at (x, y) into the shown image if it is still size; returns False if not."""
+        image = self._image
+        if image is None or image.isNull() or (image.width(), image.height()) != size:
+            return False
+        painter = QPainter(image)
+        painter.drawImage(x, y, patch)
+        painter.end()
+        rect = self.contentsRect()
+        self.update(rect.x() + (rect.width() - image.width()) // 2 + x,
+                    rect.y() + (rect.height() - image.height()) // 2 + y,
+                    patch.width(), patch.height())
+        return True
+
+    def setText(self, text):
+        self._image = None
+        super().setText(text)
+
+    def clear(self):
+        self._image = None
+        super().clear()
+
+    def paintEvent(self, event):
+        # Base paint draws the stylesheet background/border (and any text)
+        super().paintEvent(event)
+        image = self._image
+        if image is None or image.isNull():
+            return
+        rect = self.contentsRect()
+        x = rect.x() + (rect.width() - image.width()) // 2
+        y = rect.y() + (rect.height() - image.height()) // 2
+        painter = QPainter(self)
+        painter.drawImage(x, y, image)
+        painter.end()
+
+
 class VideoTileWidget(QWidget):
     """Individual video tile showing a participant's video feed and username"""
     
@@ -342,6 +726,8 @@ class VideoTileWidget(QWidget):
         self.username = username
         self.is_local = is_local
         self.last_frame = None
+        self._shown_size = None  # label size last_frame was rendered at
+        self._image_buffer = FrameImageBuffer()
         
         # Setup UI
         layout = QVBoxLayout(self)
@@ -349,7 +735,7 @@ class VideoTileWidget(QWidget):
         layout.setSpacing(5)
         
         # Video display label
-        self.video_label = QLabel()
+        self.video_label = FrameLabel()
         self.video_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.video_label.setMinimumSize(160, 120)
         self.video_label.setScaledContents(False)
@@ -389,29 +775,26 @@ class VideoTileWidget(QWidget):
             return
         
         try:
-            # Convert BGR to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_frame.shape
-            bytes_per_line = ch * w
-            
-            # Create QImage
-            qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(qt_image)
-            
-            # Scale to fit label while maintaining aspect ratio
-            scaled_pixmap = pixmap.scaled(
-                self.video_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            
-            self.video_label.setPixmap(scaled_pixmap)
+            # Scale to fit the label with OpenCV (SIMD) instead of Qt's smooth scaler
+            # on the GUI thread, into the tile's reused buffer; the label paints that
+            # QImage as-is, so the buffer must stay untouched until the next frame
+            size = self.video_label.size()
+            size = (size.width(), size.height())
+            if frame is self.last_frame and size == self._shown_size:
+                # Same frame at the same size (e.g. the camera has not produced a
+                # new one since the last tick): the label already shows it
+                return
+            qt_image = self._image_buffer.to_qimage(frame, size[0], size[1])
+            self.video_label.set_image(qt_image)
             self.last_frame = frame
+            self._shown_size = size
         except Exception as e:
             pass
     
     def update_username(self, username):
         """Update the displayed username"""
+        if username == self.username:
+            return
         self.username = username
         display_name = f"{username} (You)" if self.is_local else username
         self.username_label.setText(display_name)
@@ -421,6 +804,50 @@ class VideoTileWidget(QWidget):
         self.video_label.clear()
         self.video_label.setText("\n\nNo Video")
         self.last_frame = None
+        self._shown_size = None
+
+
+class FileOfferWidget(QFrame):
+    """Inline banner for an incoming file: Accept / Save As / Decline without a modal dialog"""
+    
+    accepted = pyqtSignal()
+    save_as = pyqtSignal()
+    declined = pyqtSignal()
+    
+    def __init__(self, filename, sender, size=None, parent=None):
+        super().__init__(parent)
+        self.filename = filename
+        self.sender_name = sender
+        self.setStyleSheet("""
+            QFrame {
+                background-color: #2a2a2a;
+                border: 1px solid #2196F3;
+                border-radius: 5px;
+            }
+            QLabel {
+                border: none;
+                color: #fff;
+                font-size: 11px;
+            }
+        """)
+        
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 6, 8, 6)
+        layout.setSpacing(4)
+        
+        size_text = f" ({size} bytes)" if size else ""
+        label = QLabel(f"📥 {sender} shared {filename}{size_text}")
+        # Names come from the peer: never let Qt's AutoText render them as rich text
+        label.setTextFormat(Qt.TextFormat.PlainText)
+        label.setWordWrap(True)
+        layout.addWidget(label)
+        
+        buttons = QHBoxLayout()
+        for text, signal in (("Accept", self.accepted), ("Save As...", self.save_as), ("Decline", self.declined)):
+            button = QPushButton(text)
+            button.clicked.connect(signal.emit)
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
 
 
 class SaporaMainWindow(QMainWindow):
@@ -429,9 +856,7 @@ class SaporaMainWindow(QMainWindow):
     # Thread-safe signals for updating UI from other threads
     chat_message_signal = pyqtSignal(str, str)   # sender, message
     user_list_signal = pyqtSignal(object)        # list of users
-    frame_signal = pyqtSignal(object)            # (source_ip, frame) or frame
-    screen_frame_signal = pyqtSignal(object)     # screen share frame (BGR)
-    local_screen_signal = pyqtSignal(object)     # local presenter preview frame (BGR)
+    screen_signal = pyqtSignal()                 # a screen frame is pending in _screen_pending
     file_status_signal = pyqtSignal(str)         # file status messages
     status_signal = pyqtSignal(str)              # generic status updates
     file_announce_signal = pyqtSignal(object)    # file announce events (thread-safe)
@@ -454,7 +879,9 @@ class SaporaMainWindow(QMainWindow):
         self.file_client = None
         self.screen_client = None
         
-        # Worker threads
+        # Worker threads (stream and file I/O share one reactor thread)
+        self.net_reactor = NetIOReactor()
+        self.net_reactor.start()
         self.video_thread = None
         self.audio_thread = None
         self.file_thread = None
@@ -466,21 +893,61 @@ class SaporaMainWindow(QMainWindow):
         
         # Multi-tile video grid state
         self.video_tiles: Dict[str, VideoTileWidget] = {}  # key: source_id (IP or 'local')
+        self._grid_cols = 0  # columns of the current tile grid; 0 while the placeholder shows
         self.video_grid_layout = None
         self.video_grid_container = None
         self.ip_to_username: Dict[str, str] = {}  # Map IP addresses to usernames
         self.user_list_data = []  # Store user list for IP mapping
-        self.last_frame_ts_by_source: Dict[str, float] = {}
+        # Chat HTML waiting for the next flush: a burst costs one document layout
+        self._chat_pending = []
+        self._chat_timer = QTimer(self)
+        self._chat_timer.setSingleShot(True)
+        self._chat_timer.setInterval(50)
+        self._chat_timer.timeout.connect(self._flush_chat)
+        # Formats for chat bubbles, built once and reused for every message
+        self._chat_formats = {}
+        # Incoming file offers (FIFO); only the oldest one's banner is visible
+        self._file_offers = deque()
+        self._chat_bubble_block = QTextBlockFormat()
+        self._chat_bubble_block.setBackground(QColor(_CHAT_BUBBLE_BG))
+        self._chat_bubble_block.setTopMargin(5)
+        self._chat_bubble_block.setBottomMargin(5)
+        # What the participant widgets last showed, so unchanged user-list pushes skip relayout
+        self._chat_target_names = None
+        self._participants_html = None
+        # Last frame time per remote source, oldest first (see _touch_source)
+        self.last_frame_ts_by_source: Dict[str, float] = OrderedDict()
+        # Network thread touches, GUI thread retires: both hold this around the dict
+        self._source_ts_lock = threading.Lock()
+        # Display size per tile, read by the network thread to prescale frames before the signal hop
+        self._tile_sizes: Dict[str, tuple] = {}
+        # Frame-rate governor: last arrival per source, and the full frame behind a
+        # fast-scaled paint, kept so a source that goes still can be re-fitted smoothly
+        self._frame_arrivals: Dict[str, float] = {}
+        self._fast_scaled: Dict[str, np.ndarray] = {}
+        # Latest undisplayed frame per source, written by the network/capture threads
+        # and drained by update_video_display (deque append/pop are atomic)
+        self._frame_bufs: Dict[str, deque] = {}
+        # Set while an update_video_display call is queued, so bursts post one wakeup
+        self._frame_wakeup_pending = False
         
         # Frame storage for display
         self.current_frame = None
+        # Per source (SCREEN_LOCAL preview thread, SCREEN_REMOTE viewer thread; both
+        # can run at once): the latest update not yet shown, where a null image means
+        # sharing stopped, plus the source's image pool and dirty-rect tracker.
+        # The flag keeps it to one queued screen_signal at a time
+        screen_sources = (SCREEN_LOCAL, SCREEN_REMOTE)
+        self._screen_pending = {s: deque(maxlen=1) for s in screen_sources}
+        self._screen_image_pools = {s: QImagePool() for s in screen_sources}
+        self._screen_trackers = {s: DirtyRectTracker() for s in screen_sources}
+        self._screen_shown_source = None  # source whose full frame screen_label holds
+        self._screen_wakeup_pending = False
         
         # Connect signals to slots (must be done before clients may emit)
         self.chat_message_signal.connect(self._on_chat_message_signal)
         self.user_list_signal.connect(self._on_user_list_signal)
-        self.frame_signal.connect(self._on_frame_signal)
-        self.screen_frame_signal.connect(self._on_screen_frame_signal)
-        self.local_screen_signal.connect(self._on_screen_frame_signal)
+        self.screen_signal.connect(self._on_screen_frame_signal)
         self.file_status_signal.connect(self._on_file_status_signal)
         self.status_signal.connect(self._on_status_signal)
         self.file_announce_signal.connect(self._on_file_announce)
@@ -511,17 +978,27 @@ class SaporaMainWindow(QMainWindow):
         # We don't assume exact signature, so wrap in a safe function:
         def video_frame_callback(*args):
             """
-            Accepts either (frame,) or (source_ip, frame). Normalize and emit via frame_signal.
+            Accepts either (frame,) or (source_ip, frame). Normalize and hand the
+            frame to the GUI thread through the per-source buffer.
             """
             try:
                 if len(args) == 1:
-                    self.frame_signal.emit(args[0])
+                    source_id, frame = 'remote', args[0]
                 elif len(args) >= 2:
                     # (source_ip, frame)
-                    self.frame_signal.emit((args[0], args[1]))
+                    source_id, frame = args[0], args[1]
                 else:
                     # unknown form
-                    pass
+                    return
+                if frame is None:
+                    # Unchanged frame from a live sender: keep its tile, and repaint
+                    # only if the current paint was fast-scaled (once, smoothly)
+                    self._touch_source(source_id)
+                    raw = self._fast_scaled.pop(source_id, None)
+                    if raw is not None:
+                        self._queue_frame(source_id, raw, smooth=True)
+                    return
+                self._queue_frame(source_id, frame)
             except Exception:
                 pass
         
@@ -530,12 +1007,12 @@ class SaporaMainWindow(QMainWindow):
             server_port=VIDEO_PORT,
             username=self.username,
             frame_callback=video_frame_callback,
-            meeting_id=self.meeting_id
+            meeting_id=self.meeting_id,
+            local_frame_callback=lambda frame: self._queue_frame('local', frame)
         )
         
         # Audio Client: file/audio status callbacks will emit signals
-        # Instantiate AudioClient via robust loader
-        self.audio_client = _audio_client_cls(
+        self.audio_client = AudioClient(
             server_ip=self.server_ip,
             username=self.username,
             meeting_id=self.meeting_id
@@ -569,13 +1046,13 @@ class SaporaMainWindow(QMainWindow):
         self.screen_presenter = ScreenShareClient(
             server_ip=self.server_ip,
             mode="presenter",
-            local_preview_callback=self.local_screen_signal.emit,
+            local_preview_callback=self._screen_frame_callback(SCREEN_LOCAL),
             status_callback=self.status_signal.emit
         )
         self.screen_viewer = ScreenShareClient(
             server_ip=self.server_ip,
             mode="viewer",
-            frame_callback=self.screen_frame_signal.emit,
+            frame_callback=self._screen_frame_callback(SCREEN_REMOTE),
             status_callback=self.status_signal.emit
         )
     
@@ -617,15 +1094,22 @@ class SaporaMainWindow(QMainWindow):
         # Control bar
         main_layout.addWidget(self.create_control_bar())
         
-        # Timer for updating video display
-        self.display_timer = QTimer()
-        self.display_timer.timeout.connect(self.update_video_display)
-        self.display_timer.start(33)  # ~30 FPS
+        # Frames are painted as they arrive (see _queue_frame); this only retires
+        # tiles whose sender went quiet
+        self.stale_tile_timer = QTimer()
+        self.stale_tile_timer.timeout.connect(self._remove_stale_tiles)
+        self.stale_tile_timer.start(500)
         
         # Scheduler timer (checks every 30s)
         self.scheduler_timer = QTimer()
         self.scheduler_timer.timeout.connect(self._check_scheduled_meetings)
         self.scheduler_timer.start(30000)
+        # Parsed meetings.json as [(time, meeting_id)], reused while (mtime, size) is unchanged
+        self._meetings_stat = None
+        self._meetings_data = []
+        # (meeting_id, time) of scheduled meetings already launched, so a meeting
+        # still inside the 30 s window on the next tick is not opened twice
+        self._launched_meetings = set()
 
     def load_stylesheet(self):
         """Load style.qss if available"""
@@ -724,8 +1208,8 @@ class SaporaMainWindow(QMainWindow):
         
         # Calculate optimal grid dimensions
         num_tiles = len(tiles)
-        cols = math.ceil(math.sqrt(num_tiles))
-        rows = math.ceil(num_tiles / cols)
+        cols = _grid_cols(num_tiles)
+        self._grid_cols = cols
         
         # Add tiles to grid
         for i, tile in enumerate(tiles):
@@ -741,33 +1225,104 @@ class SaporaMainWindow(QMainWindow):
             display_name = username or (self.username if is_local else source_id)
             tile = VideoTileWidget(username=display_name, is_local=is_local)
             self.video_tiles[source_id] = tile
-            self.reorganize_video_grid()
+            # Tiles fill slots 0..N-1 row-major, so while the column count holds
+            # the newcomer just takes the next slot; reflow only when it changes
+            num_tiles = len(self.video_tiles)
+            cols = _grid_cols(num_tiles)
+            if cols == self._grid_cols:
+                self.video_grid_layout.addWidget(tile, (num_tiles - 1) // cols, (num_tiles - 1) % cols)
+            else:
+                self.reorganize_video_grid()
         
         # Update frame
         tile = self.video_tiles[source_id]
         tile.update_frame(frame)
+        label_size = tile.video_label.size()
+        self._tile_sizes[source_id] = (label_size.width(), label_size.height())
         
         # Update username if provided and changed
         if username and tile.username != username:
             tile.update_username(username)
     
+    def _queue_frame(self, source_id, frame, smooth=False):
+        """Any thread: stores the newest frame for source_id and wakes the GUI thread once."""
+        if not isinstance(frame, np.ndarray):
+            return
+        frame = self._prescale_frame(source_id, frame, smooth)
+        # maxlen=1: a newer frame replaces one the GUI has not shown yet
+        self._frame_bufs.setdefault(source_id, deque(maxlen=1)).append(frame)
+        if not self._frame_wakeup_pending:
+            self._frame_wakeup_pending = True
+            QMetaObject.invokeMethod(self, 'update_video_display', Qt.ConnectionType.QueuedConnection)
+
+    def _prescale_frame(self, source_id, frame, smooth=False):
+        """Network thread: resizes a frame to its tile's last known size (cv2 releases the GIL),
+        so the GUI slot only wraps and blits it."""
+        size = self._tile_sizes.get(source_id)
+        if size and isinstance(frame, np.ndarray):
+            # Streaming at >= ~12 FPS: nobody sees aliasing in motion, so scale fast
+            now = time.monotonic()
+            last = self._frame_arrivals.get(source_id)
+            self._frame_arrivals[source_id] = now
+            fast = not smooth and last is not None and now - last < FAST_SCALE_INTERVAL
+            if fast:
+                self._fast_scaled[source_id] = frame
+            else:
+                self._fast_scaled.pop(source_id, None)
+            if source_id != 'local':
+                # Let the decoder do most of the downscale in the DCT domain for the
+                # next frame: pick the reduction from the sender's full frame size
+                reduce = self.video_client.decode_reduce.get(source_id, 1)
+                h, w = frame.shape[:2]
+                scale = min(size[0] / (w * reduce), size[1] / (h * reduce))
+                self.video_client.decode_reduce[source_id] = jpeg_reduce_factor(scale)
+            return fit_frame(frame, size[0], size[1], fast)
+        return frame
+
     def remove_video_tile(self, source_id):
         """Remove a video tile"""
         if source_id in self.video_tiles:
             tile = self.video_tiles.pop(source_id)
+            self._tile_sizes.pop(source_id, None)
+            self._frame_arrivals.pop(source_id, None)
+            self._fast_scaled.pop(source_id, None)
+            # A static sender that resumes with the same JPEG must still bring the tile back
+            try:
+                self.video_client.forget_source(source_id)
+            except Exception:
+                pass
+            index = self.video_grid_layout.indexOf(tile)
+            slot = self.video_grid_layout.getItemPosition(index)[:2] if index >= 0 else None
+            self.video_grid_layout.removeWidget(tile)
             tile.setParent(None)
             tile.deleteLater()
-            self.reorganize_video_grid()
+            num_tiles = len(self.video_tiles)
+            cols = _grid_cols(num_tiles)
+            if slot is None or cols != self._grid_cols:
+                self.reorganize_video_grid()
+                return
+            # Same grid: move the tile in the last slot into the hole
+            last_slot = (num_tiles // cols, num_tiles % cols)
+            if slot != last_slot:
+                last_item = self.video_grid_layout.itemAtPosition(*last_slot)
+                if last_item is None or last_item.widget() is None:
+                    self.reorganize_video_grid()
+                    return
+                last_tile = last_item.widget()
+                self.video_grid_layout.removeWidget(last_tile)
+                self.video_grid_layout.addWidget(last_tile, slot[0], slot[1])
     
     def update_ip_to_username_mapping(self):
-        """Update the IP to username mapping from user list"""
-        self.ip_to_username.clear()
-        for user in self.user_list_data:
-            if isinstance(user, dict):
-                ip = user.get('ip')
-                username = user.get('username')
-                if ip and username:
-                    self.ip_to_username[ip] = username
+        """Update the IP to username mapping from user list; returns True if it changed"""
+        mapping = {
+            user.get('ip'): user.get('username')
+            for user in self.user_list_data
+            if isinstance(user, dict) and user.get('ip') and user.get('username')
+        }
+        if mapping == self.ip_to_username:
+            return False
+        self.ip_to_username = mapping
+        return True
     
     def get_username_for_ip(self, ip_address):
         """Get username for a given IP address"""
@@ -784,7 +1339,7 @@ class SaporaMainWindow(QMainWindow):
         title.setFont(QFont("Arial", 11, QFont.Weight.Bold))
         layout.addWidget(title)
         
-        self.screen_label = QLabel()
+        self.screen_label = FrameLabel()
         self.screen_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.screen_label.setMinimumSize(480, 270)
         self.screen_label.setStyleSheet("background-color: #121212; border-radius: 10px;")
@@ -866,6 +1421,11 @@ class SaporaMainWindow(QMainWindow):
             }
         """)
         layout.addWidget(self.chat_display)
+        
+        # Pending file offers, shown one at a time below the messages
+        self.file_offer_area = QVBoxLayout()
+        self.file_offer_area.setSpacing(4)
+        layout.addLayout(self.file_offer_area)
         
         # Recipient selector (more prominent)
         from PyQt6.QtWidgets import QComboBox
@@ -1013,15 +1573,12 @@ class SaporaMainWindow(QMainWindow):
         # Connect chat client (TCP control)
         if self.chat_client.connect():
             # Start screen viewer in background to receive remote shares
-            import threading
             threading.Thread(target=self.screen_viewer.start, daemon=True).start()
 
             # Start video receiver immediately so we can watch others without turning on camera
             try:
-                if self.video_client:
-                    self.video_client.start_receiving()
                 if not self.video_thread or not self.video_thread.isRunning():
-                    self.video_thread = VideoStreamThread(self.video_client)
+                    self.video_thread = VideoStreamThread(self.video_client, self.net_reactor)
                     self.video_thread.status_update.connect(self.show_notification)
                     self.video_thread.start()
             except Exception:
@@ -1030,7 +1587,7 @@ class SaporaMainWindow(QMainWindow):
             # Start audio playback (receive-only) so we can hear others without unmuting
             try:
                 if not self.audio_thread or not self.audio_thread.isRunning():
-                    self.audio_thread = AudioStreamThread(self.audio_client)
+                    self.audio_thread = AudioStreamThread(self.audio_client, self.net_reactor)
                     self.audio_thread.status_update.connect(self.show_notification)
                     self.audio_thread.start()
             except Exception:
@@ -1049,7 +1606,7 @@ class SaporaMainWindow(QMainWindow):
                 <span style='color: #888; font-size: 10px; font-style: italic;'>Use the dropdown above to send private messages</span>
             </div>
             """
-            self.chat_display.append(welcome_msg)
+            self._append_chat(welcome_msg)
         else:
             self.status_label.setText("● Connection Failed")
             self.status_label.setStyleSheet("color: #f44336;")
@@ -1076,7 +1633,8 @@ class SaporaMainWindow(QMainWindow):
             except Exception:
                 pass
             
-            # Remove local video tile
+            # Remove local video tile (and any frame still queued for it)
+            self._frame_bufs.pop('local', None)
             self.remove_video_tile('local')
             
             self.video_enabled = False
@@ -1088,54 +1646,55 @@ class SaporaMainWindow(QMainWindow):
         # The video client will call this from its thread; route via signal to ensure UI-safe actions
         self.status_signal.emit(message)
     
-    def _on_frame_signal(self, payload):
-        """Slot invoked in GUI thread when a frame arrives via signal"""
-        # payload could be either: frame OR (source_ip, frame)
-        try:
-            source_ip = None
-            frame = None
-            
-            if isinstance(payload, tuple) and len(payload) >= 2:
-                source_ip, frame = payload[0], payload[1]
-            else:
-                frame = payload
-            
-            if isinstance(frame, np.ndarray):
-                # Update the remote video tile
-                if source_ip:
-                    username = self.get_username_for_ip(source_ip)
-                    self.add_or_update_video_tile(source_ip, frame, username)
-                    try:
-                        import time as _t
-                        self.last_frame_ts_by_source[source_ip] = _t.time()
-                    except Exception:
-                        pass
-                else:
-                    # Old style frame without source IP, treat as generic remote
-                    self.add_or_update_video_tile('remote', frame, 'Remote')
-        except Exception as e:
-            pass
-    
+    @pyqtSlot()
     def update_video_display(self):
-        """Update the local video tile with camera feed"""
-        # Update local camera feed tile if video is enabled
-        if self.video_enabled and self.video_client:
+        """Blit the pending local and remote frames; queued from _queue_frame"""
+        # Clear first: a frame queued while draining posts a fresh wakeup
+        self._frame_wakeup_pending = False
+        # One paint per source per wakeup, however many frames arrived meanwhile
+        for source_id, buf in list(self._frame_bufs.items()):
+            try:
+                frame = buf.pop()
+            except IndexError:
+                continue
             try:
-                if hasattr(self.video_client, "last_frame") and self.video_client.last_frame is not None:
-                    frame = self.video_client.last_frame
-                    self.add_or_update_video_tile('local', frame, self.username)
+                if source_id == 'local':
+                    # A capture that raced with stopping the camera must not revive the tile
+                    if self.video_enabled:
+                        self.add_or_update_video_tile('local', frame, self.username)
+                elif source_id == 'remote':
+                    # Old style frame without source IP, treat as generic remote
+                    self.add_or_update_video_tile('remote', frame, 'Remote')
+                else:
+                    self._touch_source(source_id)
+                    # Only a new tile needs the name; existing tiles keep theirs and
+                    # _on_user_list_signal pushes renames to them
+                    username = None if source_id in self.video_tiles else self.get_username_for_ip(source_id)
+                    self.add_or_update_video_tile(source_id, frame, username)
             except Exception:
                 pass
-        # Clean up stale remote tiles to avoid freeze when a sender stops
+    
+    def _touch_source(self, source_id):
+        """Any thread: marks source_id as alive now, moving it to the young end."""
+        # pop + insert rather than move_to_end: no KeyError if the GUI just retired it
+        with self._source_ts_lock:
+            self.last_frame_ts_by_source.pop(source_id, None)
+            self.last_frame_ts_by_source[source_id] = time.time()
+    
+    def _remove_stale_tiles(self):
+        """Clean up stale remote tiles to avoid freeze when a sender stops"""
         try:
-            import time as _t
-            now_ts = _t.time()
-            stale_keys = []
-            for src, ts in list(self.last_frame_ts_by_source.items()):
-                if now_ts - ts > 2.0:
-                    stale_keys.append(src)
-            for src in stale_keys:
-                self.last_frame_ts_by_source.pop(src, None)
+            now_ts = time.time()
+            # Entries are in touch order, so only the head can be stale
+            while True:
+                # Check and pop under the lock so a touch in between keeps the tile
+                with self._source_ts_lock:
+                    if not self.last_frame_ts_by_source:
+                        break
+                    src = next(iter(self.last_frame_ts_by_source))
+                    if now_ts - self.last_frame_ts_by_source[src] <= 2.0:
+                        break
+                    del self.last_frame_ts_by_source[src]
                 self.remove_video_tile(src)
         except Exception:
             pass
@@ -1152,7 +1711,7 @@ class SaporaMainWindow(QMainWindow):
                 success = self.audio_client.start_streaming(self.on_audio_status)
                 if success:
                     # Start playback receiver thread once
-                    self.audio_thread = AudioStreamThread(self.audio_client)
+                    self.audio_thread = AudioStreamThread(self.audio_client, self.net_reactor)
                     self.audio_thread.status_update.connect(self.show_notification)
                     self.audio_thread.start()
                     self.audio_enabled = True
@@ -1199,14 +1758,7 @@ class SaporaMainWindow(QMainWindow):
         
         try:
             # Get target from dropdown and clean it
-            if hasattr(self, 'chat_target') and self.chat_target.currentIndex() >= 0:
-                val = self.chat_target.currentText().strip()
-                # Remove emoji prefixes
-                val_clean = val.replace('📢', '').replace('👤', '').strip()
-                
-                if val_clean and val_clean.lower() not in ['all', 'everyone']:
-                    target = val_clean
-                    target_display = val_clean
+            target, target_display = self._resolve_chat_target()
             
             print(f"[UI] Sending message to '{target}': {text}")
             
@@ -1218,67 +1770,97 @@ class SaporaMainWindow(QMainWindow):
                 print(f"[UI] Chat client not ready: running={getattr(self.chat_client, 'running', None)}")
             
             # Local echo with enhanced formatting
-            timestamp = datetime.now().strftime("%H:%M")
+            timestamp = _hhmm()
             
             if sent:
                 if target.lower() == 'all':
                     # Public message
-                    formatted_msg = f"""
-                    <div style='margin: 5px 0; padding: 8px; background-color: #2a2a2a; border-radius: 5px; border-left: 3px solid #4CAF50;'>
-                        <span style='color: #888; font-size: 10px;'>{timestamp}</span>
-                        <span style='color: #4CAF50; font-weight: bold;'> You </span>
-                        <span style='color: #aaa;'>→ Everyone</span><br/>
-                        <span style='color: #fff;'>{text}</span>
-                    </div>
-                    """
+                    self._append_bubble('#4CAF50', [(timestamp, 'ts'), (' You ', 'you'), ('→ Everyone', 'to_all'),
+                                                    _CHAT_BR, (text, 'text')])
                 else:
                     # Private message
-                    formatted_msg = f"""
-                    <div style='margin: 5px 0; padding: 8px; background-color: #2a2a2a; border-radius: 5px; border-left: 3px solid #FF9800;'>
-                        <span style='color: #888; font-size: 10px;'>{timestamp}</span>
-                        <span style='color: #4CAF50; font-weight: bold;'> You </span>
-                        <span style='color: #FF9800;'>→ {target_display} (private)</span><br/>
-                        <span style='color: #fff;'>{text}</span>
-                    </div>
-                    """
-                
-                self.chat_display.append(formatted_msg)
+                    self._append_bubble('#FF9800', [(timestamp, 'ts'), (' You ', 'you'),
+                                                    (f'→ {target_display} (private)', 'private'),
+                                                    _CHAT_BR, (text, 'text')])
             else:
                 # Show error message
-                error_msg = f"""
-                <div style='margin: 5px 0; padding: 8px; background-color: #2a2a2a; border-radius: 5px; border-left: 3px solid #f44336;'>
-                    <span style='color: #888; font-size: 10px;'>{timestamp}</span>
-                    <span style='color: #f44336; font-weight: bold;'> ERROR </span><br/>
-                    <span style='color: #fff;'>Failed to send: {text}</span><br/>
-                    <span style='color: #888; font-size: 10px; font-style: italic;'>Check your connection</span>
-                </div>
-                """
-                self.chat_display.append(error_msg)
+                self._append_bubble('#f44336', [(timestamp, 'ts'), (' ERROR ', 'error'), _CHAT_BR,
+                                                (f'Failed to send: {text}', 'text'), _CHAT_BR,
+                                                ('Check your connection', 'hint')])
                 self.show_notification("❌ Failed to send message - check connection")
             
-            # Auto-scroll to bottom
-            cursor = self.chat_display.textCursor()
-            cursor.movePosition(cursor.MoveOperation.End)
-            self.chat_display.setTextCursor(cursor)
-            
         except Exception as e:
-            error_msg = f"""
-            <div style='margin: 5px 0; padding: 8px; background-color: #2a2a2a; border-radius: 5px; border-left: 3px solid #f44336;'>
-                <span style='color: #f44336; font-weight: bold;'> ERROR </span><br/>
-                <span style='color: #fff;'>Exception: {str(e)}</span>
-            </div>
-            """
-            self.chat_display.append(error_msg)
+            self._append_bubble('#f44336', [(' ERROR ', 'error'), _CHAT_BR, (f'Exception: {e}', 'text')])
             self.show_notification(f"❌ Chat error: {e}")
             print(f"[UI] Chat exception: {e}")
-            import traceback
             traceback.print_exc()
     
+    def _resolve_chat_target(self):
+        """(target, display name) picked in the chat dropdown; ('all', 'Everyone') by default"""
+        if hasattr(self, 'chat_target') and self.chat_target.currentIndex() >= 0:
+            # Remove emoji prefixes
+            val_clean = self.chat_target.currentText().translate(_TARGET_EMOJI_STRIP).strip()
+            if val_clean and val_clean.lower() not in ('all', 'everyone'):
+                return val_clean, val_clean
+        return 'all', 'Everyone'
+    
+    def _append_chat(self, entry):
+        """Queues a chat entry (HTML string or bubble); _flush_chat adds everything queued within 50 ms at once"""
+        self._chat_pending.append(entry)
+        if not self._chat_timer.isActive():
+            self._chat_timer.start()
+    
+    def _append_bubble(self, accent, runs):
+        """Queues a chat bubble: an accent bar plus (text, style) runs from _CHAT_STYLES"""
+        self._append_chat((accent, runs))
+    
+    def _chat_char_format(self, style):
+        """Cached QTextCharFormat for a _CHAT_STYLES name or an accent colour"""
+        fmt = self._chat_formats.get(style)
+        if fmt is None:
+            color, bold, italic = _CHAT_STYLES.get(style, (style, True, False))
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            if bold:
+                fmt.setFontWeight(QFont.Weight.Bold)
+            fmt.setFontItalic(italic)
+            self._chat_formats[style] = fmt
+        return fmt
+    
+    def _flush_chat(self):
+        """Appends the queued chat entries in one edit block and scrolls to the bottom"""
+        pending, self._chat_pending = self._chat_pending, []
+        if not pending or not hasattr(self, 'chat_display'):
+            return
+        document = self.chat_display.document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        # One edit block: the document re-lays out once for the whole batch
+        cursor.beginEditBlock()
+        for i, entry in enumerate(pending):
+            # Same as append(): each entry gets its own block, none before the first
+            block_format = self._chat_bubble_block if isinstance(entry, tuple) else QTextBlockFormat()
+            if i or not document.isEmpty():
+                cursor.insertBlock(block_format, QTextCharFormat())
+            else:
+                cursor.setBlockFormat(block_format)
+            if isinstance(entry, tuple):
+                accent, runs = entry
+                cursor.insertText('▌ ', self._chat_char_format(accent))
+                for text, style in runs:
+                    cursor.insertText(str(text), self._chat_char_format(style))
+            else:
+                cursor.insertHtml(entry)
+        cursor.endEditBlock()
+        # Auto-scroll to bottom
+        self.chat_display.setTextCursor(cursor)
+        self.chat_display.ensureCursorVisible()
+    
     # ---- Signal slots (these run in GUI thread) ----
     def _on_chat_message_signal(self, sender, message):
         """Thread-safe slot for appending incoming chat messages with enhanced formatting"""
         try:
-            timestamp = datetime.now().strftime("%H:%M")
+            timestamp = _hhmm()
             
             # Check if it's a private message
             is_private = '(to ' in message or message.startswith('(private)')
@@ -1288,44 +1870,21 @@ class SaporaMainWindow(QMainWindow):
             
             if is_system:
                 # System message (gold border)
-                formatted_msg = f"""
-                <div style='margin: 5px 0; padding: 8px; background-color: #2a2a2a; border-radius: 5px; border-left: 3px solid #FFC107;'>
-                    <span style='color: #888; font-size: 10px;'>{timestamp}</span>
-                    <span style='color: #FFC107; font-weight: bold;'> {sender} </span><br/>
-                    <span style='color: #fff; font-style: italic;'>{message}</span>
-                </div>
-                """
+                self._append_bubble('#FFC107', [(timestamp, 'ts'), (f' {sender} ', 'system'), _CHAT_BR,
+                                                (message, 'text_italic')])
             elif is_private:
                 # Private message (orange border)
-                formatted_msg = f"""
-                <div style='margin: 5px 0; padding: 8px; background-color: #2a2a2a; border-radius: 5px; border-left: 3px solid #FF9800;'>
-                    <span style='color: #888; font-size: 10px;'>{timestamp}</span>
-                    <span style='color: #2196F3; font-weight: bold;'> {sender} </span>
-                    <span style='color: #FF9800;'>(private)</span><br/>
-                    <span style='color: #fff;'>{message}</span>
-                </div>
-                """
+                self._append_bubble('#FF9800', [(timestamp, 'ts'), (f' {sender} ', 'sender'), ('(private)', 'private'),
+                                                _CHAT_BR, (message, 'text')])
             else:
                 # Public message (blue border)
-                formatted_msg = f"""
-                <div style='margin: 5px 0; padding: 8px; background-color: #2a2a2a; border-radius: 5px; border-left: 3px solid #2196F3;'>
-                    <span style='color: #888; font-size: 10px;'>{timestamp}</span>
-                    <span style='color: #2196F3; font-weight: bold;'> {sender} </span><br/>
-                    <span style='color: #fff;'>{message}</span>
-                </div>
-                """
-            
-            self.chat_display.append(formatted_msg)
-            
-            # Auto-scroll to bottom
-            cursor = self.chat_display.textCursor()
-            cursor.movePosition(cursor.MoveOperation.End)
-            self.chat_display.setTextCursor(cursor)
+                self._append_bubble('#2196F3', [(timestamp, 'ts'), (f' {sender} ', 'sender'), _CHAT_BR,
+                                                (message, 'text')])
             
         except Exception as e:
             # Fallback to simple display
             try:
-                self.chat_display.append(f"<b>{sender}:</b> {message}")
+                self._append_chat(f"<b>{html.escape(str(sender))}:</b> {html.escape(str(message))}")
             except:
                 pass
     
@@ -1334,7 +1893,7 @@ class SaporaMainWindow(QMainWindow):
         try:
             # Store user list for IP mapping
             self.user_list_data = users
-            self.update_ip_to_username_mapping()
+            names_changed = self.update_ip_to_username_mapping()
             
             # users may be a list of dicts or usernames; normalize to usernames
             usernames = []
@@ -1349,26 +1908,23 @@ class SaporaMainWindow(QMainWindow):
                     user_details.append({'username': str(u), 'last_seen_formatted': 'Unknown'})
             
             # Update chat target dropdown with enhanced styling
+            target_names = tuple(sorted(name for name in usernames if name and name != (self.username or "")))
             current = self.chat_target.currentText() if hasattr(self, 'chat_target') else '📢 Everyone'
-            if hasattr(self, 'chat_target'):
+            if hasattr(self, 'chat_target') and target_names != self._chat_target_names:
+                self._chat_target_names = target_names
                 self.chat_target.blockSignals(True)
                 self.chat_target.clear()
                 
-                # Add "Everyone" option with emoji
-                self.chat_target.addItem("📢 Everyone")
-                
-                # Add individual participants with emoji (excluding self)
-                for name in sorted(usernames):
-                    if name and name != (self.username or ""):
-                        self.chat_target.addItem(f"👤 {name}")
+                # Add "Everyone" option plus individual participants (excluding self) in one call
+                self.chat_target.addItems(["📢 Everyone"] + [f"👤 {name}" for name in target_names])
                 
                 # Restore previous selection if possible
                 # Clean up current selection for matching
-                current_clean = current.replace('📢', '').replace('👤', '').strip()
+                current_clean = current.translate(_TARGET_EMOJI_STRIP).strip()
                 found_idx = -1
                 for i in range(self.chat_target.count()):
                     item_text = self.chat_target.itemText(i)
-                    item_clean = item_text.replace('📢', '').replace('👤', '').strip()
+                    item_clean = item_text.translate(_TARGET_EMOJI_STRIP).strip()
                     if item_clean.lower() == current_clean.lower():
                         found_idx = i
                         break
@@ -1378,21 +1934,26 @@ class SaporaMainWindow(QMainWindow):
             
             # Update participants display with online status and count
             participant_count = len(usernames)
-            participants_html = f"<div style='color: #4CAF50; font-weight: bold; margin-bottom: 5px;'>● {participant_count} Online</div>"
+            parts = [f"<div style='color: #4CAF50; font-weight: bold; margin-bottom: 5px;'>● {participant_count} Online</div>"]
             
             # Sort by username but show details
             sorted_details = sorted(user_details, key=lambda x: x.get('username', ''))
             for user_detail in sorted_details:
                 name = user_detail.get('username', 'Unknown')
-                last_seen = user_detail.get('last_seen_formatted', 'Unknown')
+                last_seen = html.escape(str(user_detail.get('last_seen_formatted', 'Unknown')))
                 is_you = (name == self.username)
+                name = html.escape(str(name))
                 
                 if is_you:
-                    participants_html += f"<div style='color: #4CAF50; margin: 3px 0;'>● {name} <b>(You)</b> <span style='color: #888; font-size: 10px;'>• {last_seen}</span></div>"
+                    parts.append(f"<div style='color: #4CAF50; margin: 3px 0;'>● {name} <b>(You)</b> <span style='color: #888; font-size: 10px;'>• {last_seen}</span></div>")
                 else:
-                    participants_html += f"<div style='color: #2196F3; margin: 3px 0;'>● {name} <span style='color: #888; font-size: 10px;'>• {last_seen}</span></div>"
+                    parts.append(f"<div style='color: #2196F3; margin: 3px 0;'>● {name} <span style='color: #888; font-size: 10px;'>• {last_seen}</span></div>")
             
-            self.participants_display.setHtml(participants_html)
+            # setHtml re-lays out the whole document; skip it when nothing visible changed
+            participants_html = "".join(parts)
+            if participants_html != self._participants_html:
+                self._participants_html = participants_html
+                self.participants_display.setHtml(participants_html)
             
             # Update online status indicator
             if hasattr(self, 'chat_status_indicator'):
@@ -1404,9 +1965,10 @@ class SaporaMainWindow(QMainWindow):
                     self.chat_status_indicator.setStyleSheet("color: #FFC107; font-size: 10px; font-weight: bold;")
             
             # Update usernames in existing video tiles
-            for source_id, tile in self.video_tiles.items():
-                if source_id != 'local' and source_id in self.ip_to_username:
-                    tile.update_username(self.ip_to_username[source_id])
+            if names_changed:
+                for source_id, tile in self.video_tiles.items():
+                    if source_id != 'local' and source_id in self.ip_to_username:
+                        tile.update_username(self.ip_to_username[source_id])
                     
         except Exception as e:
             print(f"Error updating user list: {e}")
@@ -1448,15 +2010,10 @@ class SaporaMainWindow(QMainWindow):
             self._current_upload_name = None
         
         # Determine target from chat dropdown
-        target = 'all'
-        if hasattr(self, 'chat_target') and self.chat_target.currentIndex() >= 0:
-            val = self.chat_target.currentText().strip()
-            val_clean = val.replace('📢', '').replace('👤', '').strip()
-            if val_clean and val_clean.lower() not in ['all', 'everyone']:
-                target = val_clean
+        target, _ = self._resolve_chat_target()
         
         # Create enhanced file transfer thread with target
-        self.file_thread = FileTransferThread(self.file_client, "upload", file_path, target=target)
+        self.file_thread = FileTransferThread(self.file_client, "upload", file_path, self.net_reactor, target=target)
         self.file_thread.status_update.connect(self.file_status_signal.emit)
         self.file_thread.transfer_complete.connect(self.on_file_transfer_complete)
         self.file_thread.start()
@@ -1468,20 +2025,12 @@ class SaporaMainWindow(QMainWindow):
         if success:
             self.show_notification("✅ File transfer successful!")
             try:
-                self.chat_display.append(f"<i style='color:#4CAF50;'>✅ Uploaded {fname or ''} successfully</i>")
+                self._append_chat(f"<i style='color:#4CAF50;'>✅ Uploaded {fname or ''} successfully</i>")
             except Exception:
                 pass
             # Announce file to target (or All)
             try:
-                target = 'all'
-                if hasattr(self, 'chat_target') and self.chat_target.currentIndex() >= 0:
-                    val = self.chat_target.currentText().strip()
-                    # Remove emoji prefixes and normalize
-                    val_clean = val.replace('📢', '').replace('👤', '').strip()
-                    if val_clean and val_clean.lower() not in ['all', 'everyone']:
-                        target = val_clean
-                    else:
-                        target = 'all'
+                target, _ = self._resolve_chat_target()
                 # Send announce (routed via chat); receivers auto-download
                 if hasattr(self, 'chat_client') and self.chat_client:
                     self.chat_client.send_file_announce(fname or '', target=target)
@@ -1490,7 +2039,7 @@ class SaporaMainWindow(QMainWindow):
         else:
             self.show_notification("❌ File transfer failed")
             try:
-                self.chat_display.append(f"<i style='color:#f44336;'>❌ Upload failed for {fname or ''}</i>")
+                self._append_chat(f"<i style='color:#f44336;'>❌ Upload failed for {fname or ''}</i>")
             except Exception:
                 pass
         # clear current filename
@@ -1505,59 +2054,67 @@ class SaporaMainWindow(QMainWindow):
             fname = obj.get('filename')
             sender = obj.get('sender', 'someone')
             size = obj.get('size')
-            self.chat_display.append(f"<i>📥 {sender} shared {fname} ({size or ''} bytes)</i>")
+            self._append_chat(f"<i>📥 {html.escape(str(sender))} shared {html.escape(str(fname))} ({size or ''} bytes)</i>")
 
-            # Ask user where to save
-            choice = QMessageBox.question(
-                self,
-                "File Received",
-                f"Download '{fname}' to default Downloads folder?\nChoose 'No' to select a folder.",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel
-            )
-            if choice == QMessageBox.StandardButton.Cancel:
-                return
+            # Non-modal banner instead of QMessageBox.question: a dialog's nested
+            # event loop would hold up video, screen share and chat until answered
+            offer = FileOfferWidget(fname, sender, size)
+            offer.accepted.connect(lambda: self._resolve_file_offer(offer, 'accept'))
+            offer.save_as.connect(lambda: self._resolve_file_offer(offer, 'save_as'))
+            offer.declined.connect(lambda: self._resolve_file_offer(offer, 'decline'))
+            self._file_offers.append(offer)
+            self.file_offer_area.addWidget(offer)
+            offer.setVisible(offer is self._file_offers[0])
+        except Exception as e:
+            self.show_notification(f"File announce error: {e}")
 
-            if choice == QMessageBox.StandardButton.Yes:
+    def _resolve_file_offer(self, offer, choice):
+        """Handles a file offer banner's button, then shows the next pending offer"""
+        try:
+            self._file_offers.remove(offer)
+        except ValueError:
+            return
+        offer.hide()
+        offer.deleteLater()
+        if self._file_offers:
+            self._file_offers[0].show()
+
+        try:
+            if choice == 'decline':
+                return
+            if choice == 'accept':
                 save_dir = (Path(__file__).parent / 'downloads')
             else:
                 dir_path = QFileDialog.getExistingDirectory(self, "Select Download Folder", str(Path(__file__).parent))
                 if not dir_path:
                     return
                 save_dir = Path(dir_path)
+            self._start_file_download(offer.filename, offer.sender_name, save_dir)
+        except Exception as e:
+            self.show_notification(f"File download error: {e}")
 
-            save_dir.mkdir(parents=True, exist_ok=True)
+    def _start_file_download(self, fname, sender, save_dir):
+        save_dir.mkdir(parents=True, exist_ok=True)
 
-            self.file_thread = FileTransferThread(self.file_client, 'download', fname, save_path=str(save_dir))
-            self.file_thread.status_update.connect(self.file_status_signal.emit)
-            def _after(ok):
+        self.file_thread = FileTransferThread(self.file_client, 'download', fname, self.net_reactor, save_path=str(save_dir))
+        self.file_thread.status_update.connect(self.file_status_signal.emit)
+        def _after(ok):
+            try:
+                self._append_chat(
+                    f"<i style='color:{'#4CAF50' if ok else '#f44336'};'>{'✅ Downloaded' if ok else '❌ Download failed'} {html.escape(str(fname))}</i>")
+            except Exception:
+                pass
+            # Send private ack back to sender when known
+            if ok and sender and hasattr(self, 'chat_client') and self.chat_client:
                 try:
-                    self.chat_display.append(
-                        f"<i style='color:{'#4CAF50' if ok else '#f44336'};'>{'✅ Downloaded' if ok else '❌ Download failed'} {fname}</i>")
+                    self.chat_client.send_message(f"Downloaded {fname}", target=sender)
                 except Exception:
                     pass
-                # Send private ack back to sender when known
-                if ok and sender and hasattr(self, 'chat_client') and self.chat_client:
-                    try:
-                        self.chat_client.send_message(f"Downloaded {fname}", target=sender)
-                    except Exception:
-                        pass
-                # Offer to open folder
-                if ok:
-                    try:
-                        open_choice = QMessageBox.question(
-                            self,
-                            "Open Folder",
-                            "Open downloads folder?",
-                            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                        )
-                        if open_choice == QMessageBox.StandardButton.Yes:
-                            QDesktopServices.openUrl(QUrl.fromLocalFile(str(save_dir.resolve())))
-                    except Exception:
-                        pass
-            self.file_thread.transfer_complete.connect(_after)
-            self.file_thread.start()
-        except Exception as e:
-            self.show_notification(f"File announce error: {e}")
+            # Point at the folder instead of asking with another modal dialog
+            if ok:
+                self.show_notification(f"Downloaded {fname} to {save_dir}")
+        self.file_thread.transfer_complete.connect(_after)
+        self.file_thread.start()
 
     def open_downloads_folder(self):
         try:
@@ -1571,29 +2128,79 @@ class SaporaMainWindow(QMainWindow):
     # SCREEN SHARE HANDLING
     # ========================================================================
     
-    def _on_screen_frame_signal(self, frame_bgr):
-        try:
+    def _screen_frame_callback(self, source):
+        """Screen share frame callback that fits frames on the sender's thread and emits a QImage"""
+        # Each source's callback runs on its own thread and only touches its own state
+        pending = self._screen_pending[source]
+        pool = self._screen_image_pools[source]
+        tracker = self._screen_trackers[source]
+        def callback(frame):
             # Handle stop signal (None frame)
-            if frame_bgr is None:
-                self.screen_label.clear()
-                self.screen_label.setText("🖥\n\nScreen sharing stopped\n\nWaiting for presenter...")
-                return
-            
-            if isinstance(frame_bgr, tuple) and len(frame_bgr) >= 2:
-                frame_bgr = frame_bgr[1]
-            rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(rgb.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(qt_image)
-            scaled = pixmap.scaled(
-                self.screen_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            self.screen_label.setPixmap(scaled)
-        except Exception:
-            pass
+            if frame is None:
+                tracker.reset()
+                pending.append((QImage(), None, None))
+            else:
+                size = self.screen_label.frame_size or (frame.shape[1], frame.shape[0])
+                fitted, rect = tracker.update(frame, size[0], size[1])
+                try:
+                    queued = pending.pop()
+                except IndexError:
+                    queued = None
+                if queued is not None:
+                    # The GUI has not applied the queued update: this one must cover both
+                    rect = _union_rect(queued[1], rect)
+                if rect is None:
+                    item = (frame_to_qimage(fitted, pool), None, None)
+                elif not rect[2]:
+                    # Nothing changed since what the view has
+                    return
+                else:
+                    x, y, w, h = rect
+                    item = (frame_to_qimage(fitted[y:y + h, x:x + w]), rect,
+                            (fitted.shape[1], fitted.shape[0]))
+                pending.append(item)
+            if not self._screen_wakeup_pending:
+                self._screen_wakeup_pending = True
+                self.screen_signal.emit()
+        return callback
+    
+    def _on_screen_frame_signal(self):
+        # Clear first: a frame stored while painting posts a fresh wakeup
+        self._screen_wakeup_pending = False
+        for source, pending in self._screen_pending.items():
+            try:
+                image, rect, frame_size = pending.pop()
+            except IndexError:
+                continue
+            try:
+                self._show_screen_update(source, image, rect, frame_size)
+            except Exception:
+                pass
+    
+    def _show_screen_update(self, source, image, rect, frame_size):
+        """GUI thread: applies one source's full frame, patch or stop to screen_label."""
+        if image.isNull():
+            self._screen_shown_source = None
+            self.screen_label.clear()
+            self.screen_label.setText("🖥\n\nScreen sharing stopped\n\nWaiting for presenter...")
+            return
+        
+        if rect is not None:
+            if source != self._screen_shown_source or not self.screen_label.patch_image(
+                    rect[0], rect[1], image, frame_size):
+                # The view no longer shows the frame this patch applies to
+                self._screen_trackers[source].reset()
+            return
+        
+        size = self.screen_label.size()
+        if image.width() > size.width() or image.height() > size.height():
+            # Only for a frame fitted before the label's latest resize
+            image = image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.FastTransformation)
+        previous = self.screen_label.set_image(image)
+        previous_source, self._screen_shown_source = self._screen_shown_source, source
+        if previous_source is not None:
+            self._screen_image_pools[previous_source].release(previous)
     
     def toggle_screen_share(self):
         """Start/stop screen sharing"""
@@ -1607,7 +2214,6 @@ class SaporaMainWindow(QMainWindow):
             )
             if reply != QMessageBox.StandardButton.Yes:
                 return
-            import threading
             threading.Thread(target=self.screen_presenter.start, daemon=True).start()
             self._presenting = True
             self.show_notification("🖥 Screen sharing started")
@@ -1638,7 +2244,6 @@ class SaporaMainWindow(QMainWindow):
             print(f"[NOTIFICATION] {message}")
         try:
             # Use QMetaObject.invokeMethod for thread-safe UI updates
-            from PyQt6.QtCore import QMetaObject, Qt
             QMetaObject.invokeMethod(
                 self.status_label, 
                 "setText", 
@@ -1670,18 +2275,26 @@ class SaporaMainWindow(QMainWindow):
         """Checks meetings.json and auto-launches due meetings."""
         try:
             storage = Path(__file__).parent / 'meetings.json'
-            if not storage.exists():
+            try:
+                st = storage.stat()
+            except FileNotFoundError:
                 return
-            data = json.loads(storage.read_text(encoding='utf-8'))
+            stat_key = (st.st_mtime_ns, st.st_size)
+            if stat_key != self._meetings_stat:
+                # File changed: parse it and the ISO times once, not on every tick
+                meetings = []
+                for e in json.loads(storage.read_text(encoding='utf-8')):
+                    try:
+                        meetings.append((datetime.fromisoformat(e.get('time')), e.get('meeting_id')))
+                    except Exception:
+                        continue
+                self._meetings_data = meetings
+                self._meetings_stat = stat_key
             now = datetime.now()
-            for e in data:
-                try:
-                    t = datetime.fromisoformat(e.get('time'))
-                    if 0 <= (t - now).total_seconds() <= 30:
-                        # Launch a new client for this meeting
-                        subprocess.Popen([sys.executable, str(Path(__file__).parent / 'main_ui.py'), '--meeting', e.get('meeting_id')])
-                except Exception:
-                    continue
+            for t, meeting_id in self._meetings_data:
+                if 0 <= (t - now).total_seconds() <= 30 and (meeting_id, t) not in self._launched_meetings:
+                    if launch_meeting(meeting_id):
+                        self._launched_meetings.add((meeting_id, t))
         except Exception as e:
             print(f"Scheduler check error: {e}")
     
@@ -1738,6 +2351,17 @@ class SaporaMainWindow(QMainWindow):
                 self.chat_client.disconnect()
             except Exception:
                 pass
+
+        # Release pooled file transfer connections
+        if self.file_client:
+            try:
+                self.file_client.close()
+            except Exception:
+                pass
+
+        # Stop the shared network I/O thread
+        self.net_reactor.stop()
+        self.net_reactor.wait(2000)
     
     def closeEvent(self, event):
         """Handle window close event"""
@@ -1749,6 +2373,22 @@ class SaporaMainWindow(QMainWindow):
 # APPLICATION ENTRY POINT
 # ============================================================================
 
+def launch_meeting(meeting_id):
+    """Starts a separate client process for meeting_id; returns True if it started.
+
+    A meeting window owns its own sockets, audio streams and screen viewer, so
+    it needs its own process. QProcess.startDetached returns at once and leaves
+    no child to reap, unlike blocking on or tracking a subprocess.
+    """
+    args = [str(Path(__file__).resolve())]
+    if meeting_id:
+        args += ['--meeting', str(meeting_id)]
+    started, _pid = QProcess.startDetached(sys.executable, args)
+    if not started:
+        print(f"Scheduler: could not start a client for meeting {meeting_id}")
+    return started
+
+
 def main():
     # Parse optional --meeting MEETING_ID
     meeting_cli = None
@@ -1760,6 +2400,11 @@ def main():
     except Exception:
         meeting_cli = None
 
+    # Frames are decoded and resized on the network/capture threads, which
+    # run concurrently; cap OpenCV's parallel_for_ pool so each call can
+    # split across cores without them all contending for every core
+    cv2.setNumThreads(max(2, (os.cpu_count() or 2) // 2))
+
     app = QApplication(sys.argv)
     app.setApplicationName("Sapora Video Conference")
     
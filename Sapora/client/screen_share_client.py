@@ -16,6 +16,7 @@ import numpy as np
 import mss
 import threading
 import time
+import queue
 
 # --- CRITICAL FIX: Add project root for shared imports ---
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -23,8 +24,15 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 # ---------------------------------------------------------
 
-from shared.constants import SCREEN_SHARE_PORT, BUFFER_SIZE
+from shared.constants import SCREEN_SHARE_PORT, SCREEN_SOCKET_BUFFER
 from shared.protocol import SCREEN_SHARE  # keep same constant
+from client.utils import (
+    encode_frame_to_jpeg, decode_jpeg_to_frame, send_buffers, raise_socket_buffers,
+    set_tcp_low_latency, TURBOJPEG_AVAILABLE
+)
+
+# 4-byte big-endian frame length that precedes each JPEG on the stream
+FRAME_LENGTH = struct.Struct('!I')
 # No need for unpack_message here — not used
 
 class ScreenShareClient:
@@ -37,12 +45,18 @@ class ScreenShareClient:
         self.frame_callback = frame_callback              # for viewer frames
         self.local_preview_callback = local_preview_callback  # for presenter local preview
         self.status_callback = status_callback or (lambda msg: None)
+        # The encoder thread and stop() both write to the socket; keep frames whole
+        self._send_lock = threading.Lock()
 
     def connect(self):
         """Connect to the screen share server (non-fatal if fails; allows local preview)."""
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # Several frames of headroom each way; set before connect so the window scale matches
+            raise_socket_buffers(self.socket, SCREEN_SOCKET_BUFFER, SCREEN_SOCKET_BUFFER)
             self.socket.connect((self.server_ip, SCREEN_SHARE_PORT))
+            # Don't let Nagle hold back the tail of a frame (or the stop packet)
+            set_tcp_low_latency(self.socket)
             self.status_callback(f"✅ ScreenShare connected {self.server_ip}:{SCREEN_SHARE_PORT}")
             return True
         except Exception as e:
@@ -70,43 +84,82 @@ class ScreenShareClient:
             self._start_viewer()
 
     def _start_presenter(self):
-        """Capture and send screen frames to the server"""
+        """Capture screen frames and hand them to the encoder thread"""
+        encoder = None
         try:
             with mss.mss() as sct:
                 monitor = sct.monitors[1]
+                # Area averaging for the downscale (SIMD box filter, no aliasing of
+                # text); a 4K+ screen is first decimated 2x by striding, halving
+                # the bytes the filter reads
+                scale = min(960 / monitor['width'], 540 / monitor['height'])
+                decimate = scale <= 0.25
+                interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+                # Downscaled BGRA + BGR (for when it must be converted) buffer pairs.
+                # Three cover the worst case: one being encoded, one queued, one
+                # being captured into; a pair is reused only once it is back here
+                self._free_buffers = queue.SimpleQueue()
+                for _ in range(3):
+                    self._free_buffers.put((np.empty((540, 960, 4), dtype=np.uint8),
+                                            np.empty((540, 960, 3), dtype=np.uint8)))
+                # Latest frame wins: a frame the encoder has not taken yet is replaced
+                self._frame_q = queue.Queue(maxsize=1)
+                decimated = None
+
+                # Encode + send on their own thread, so a stalled TCP send window
+                # does not hold up the capture cadence (not connected: preview only)
+                if self.socket:
+                    encoder = threading.Thread(target=self._encode_loop, daemon=True)
+                    encoder.start()
+
                 while self.running:
+                    buffers = self._free_buffers.get()
+                    small, bgr = buffers
                     # Capture screen using mss (fast and reliable on Windows)
                     img = sct.grab(monitor)
-                    frame = np.array(img)
-                    # mss returns BGRA; convert to BGR
-                    if frame.shape[2] == 4:
-                        frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-                    # Resize for efficiency
-                    frame = cv2.resize(frame, (960, 540))
-
-                    # Local preview callback before encoding
+                    # View the grab buffer in place (np.array would copy the full screen)
+                    raw = np.asarray(img)
+                    if decimate:
+                        # The strided view is not contiguous; gather it into a reused buffer
+                        # rather than letting cv2 allocate a copy every frame
+                        half = raw[::2, ::2]
+                        if decimated is None or decimated.shape != half.shape:
+                            decimated = np.empty(half.shape, dtype=np.uint8)
+                        np.copyto(decimated, half)
+                        raw = decimated
+                    if raw.shape[2] == 4:
+                        cv2.resize(raw, (960, 540), dst=small, interpolation=interpolation)
+                        if TURBOJPEG_AVAILABLE:
+                            # libjpeg-turbo encodes BGRA directly: no BGRA -> BGR pass
+                            frame = small
+                        else:
+                            # Resize first so the BGRA -> BGR pass touches 960x540, not the full screen
+                            cv2.cvtColor(small, cv2.COLOR_BGRA2BGR, dst=bgr)
+                            frame = bgr
+                    else:
+                        cv2.resize(raw, (960, 540), dst=bgr, interpolation=interpolation)
+                        frame = bgr
+
+                    # Local preview callback before encoding (the frame may be BGRA)
                     try:
                         if self.local_preview_callback:
                             self.local_preview_callback(frame)
                     except Exception:
                         pass
 
-                    # Encode as JPEG
-                    ret, encoded_frame = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                    if not ret:
-                        continue
-
-                    frame_data = encoded_frame.tobytes()
-                    frame_size = len(frame_data)
-
-                    # Send size + data if connected; otherwise skip (local preview only)
-                    if self.socket:
+                    if encoder is None:
+                        self._free_buffers.put(buffers)
+                    else:
                         try:
-                            self.socket.sendall(struct.pack('!I', frame_size) + frame_data)
-                        except Exception:
-                            # Connection lost or send error; exit presenter loop gracefully
-                            self.status_callback("⚠️ Presenter connection lost; stopping share")
-                            break
+                            self._frame_q.put_nowait((buffers, frame))
+                        except queue.Full:
+                            # Encoder still busy: drop the stale frame, queue this one
+                            try:
+                                stale_buffers, _ = self._frame_q.get_nowait()
+                                self._free_buffers.put(stale_buffers)
+                            except queue.Empty:
+                                pass
+                            self._frame_q.put_nowait((buffers, frame))
 
                     # Control frame rate
                     time.sleep(0.1)
@@ -114,12 +167,40 @@ class ScreenShareClient:
         except Exception as e:
             self.status_callback(f"⚠️ Presenter error: {e}")
         finally:
+            self.running = False
+            if encoder is not None:
+                encoder.join(1.0)
             try:
                 self.socket.close()
             except Exception:
                 pass
             self.status_callback("🛑 Presenter stopped")
 
+    def _encode_loop(self):
+        """Encoder thread: JPEG-encodes the latest captured frame and sends it"""
+        while self.running:
+            try:
+                buffers, frame = self._frame_q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            try:
+                # Encode as JPEG (libjpeg-turbo when available)
+                frame_data = encode_frame_to_jpeg(frame, 70)
+            except Exception:
+                continue
+            finally:
+                self._free_buffers.put(buffers)
+
+            try:
+                # Header and JPEG go out in one gather write, without joining them first
+                with self._send_lock:
+                    send_buffers(self.socket, (FRAME_LENGTH.pack(len(frame_data)), frame_data))
+            except Exception:
+                # Connection lost or send error; stop the presenter gracefully
+                if self.running:
+                    self.status_callback("⚠️ Presenter connection lost; stopping share")
+                self.running = False
+
     def _start_viewer(self):
         """Receive and display frames from the server"""
         try:
@@ -127,6 +208,7 @@ class ScreenShareClient:
             if self.socket:
                 self.socket.settimeout(30.0)  # 30 second timeout
             
+            last_frame_data = None  # JPEG of the frame on screen, to spot a still desktop
             while self.running:
                 # Read 4-byte size header
                 size_data = self._recv_exact(4)
@@ -135,7 +217,7 @@ class ScreenShareClient:
                     time.sleep(1)
                     continue
                     
-                frame_size = struct.unpack('!I', size_data)[0]
+                frame_size = FRAME_LENGTH.unpack(size_data)[0]
 
                 # Check for stop control packet (frame_size = 0)
                 if frame_size == 0:
@@ -161,11 +243,17 @@ class ScreenShareClient:
                 if not frame_data:
                     break
 
+                # A still desktop re-encodes to the same bytes: keep showing the last frame
+                # (the cv2 window fallback still needs its waitKey pump below)
+                if self.frame_callback and frame_data == last_frame_data:
+                    continue
+
                 # Decode JPEG to image
-                np_frame = np.frombuffer(frame_data, dtype=np.uint8)
-                frame = cv2.imdecode(np_frame, cv2.IMREAD_COLOR)
+                # Full-size screen frames are worth a GPU decode when one is available
+                frame = decode_jpeg_to_frame(frame_data, gpu=True)
                 if frame is None:
                     continue
+                last_frame_data = frame_data
 
                 # If a callback exists, pass frame (in BGR) to it; else fallback to cv2 window
                 if self.frame_callback:
@@ -204,7 +292,8 @@ class ScreenShareClient:
                 # Send stop control packet (4 bytes of zeros)
                 import struct
                 stop_packet = struct.pack('!I', 0)
-                self.socket.sendall(stop_packet)
+                with self._send_lock:
+                    self.socket.sendall(stop_packet)
             except Exception:
                 pass
         
@@ -215,17 +304,19 @@ class ScreenShareClient:
             pass
 
     def _recv_exact(self, num_bytes):
-        """Receive exactly num_bytes"""
-        data = b''
-        while len(data) < num_bytes:
+        """Receive exactly num_bytes into one bytearray (filled in place with recv_into)"""
+        buf = bytearray(num_bytes)
+        view = memoryview(buf)
+        got = 0
+        while got < num_bytes:
             try:
-                chunk = self.socket.recv(min(num_bytes - len(data), BUFFER_SIZE))
-                if not chunk:
+                n = self.socket.recv_into(view[got:])
+                if not n:
                     return None
-                data += chunk
+                got += n
             except Exception:
                 return None
-        return data
+        return buf
 
 
 if __name__ == "__main__":
@@ -3,8 +3,10 @@ Sapora LAN Collaboration Suite - Client Utilities
 Includes helper functions for protocol, audio, and video processing.
 """
 import struct
+import socket
 import sys
 import os
+import threading
 import numpy as np
 import cv2
 
@@ -12,16 +14,64 @@ import cv2
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from shared.constants import (
     HEADER_SIZE, PROTOCOL_VERSION, AUDIO_CHUNK, AUDIO_FORMAT_PCM, 
-    VIDEO_WIDTH, VIDEO_HEIGHT, VIDEO_QUALITY
+    VIDEO_WIDTH, VIDEO_HEIGHT, VIDEO_QUALITY, UDP_STREAM_BUFFER
 )
-from shared.helpers import pack_message, unpack_message
+from shared.helpers import (
+    pack_message, unpack_message, pack_header, PAYLOAD_LENGTH_OFFSET, json_dumps, json_loads,
+    peek_msg_type, HEADER_STRUCT, HAS_SENDMSG, send_buffers
+)
+
+# Optional: libjpeg-turbo via PyTurboJPEG (SIMD Huffman, IDCT and colour conversion);
+# OpenCV's JPEG codec otherwise
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_BGRA, TJSAMP_420
+    _tj = TurboJPEG()
+except Exception:  # package missing, or the libturbojpeg shared library not found
+    _tj = None
+TURBOJPEG_AVAILABLE = _tj is not None
+
+# Optional: NVIDIA nvJPEG via pynvjpeg, for full-size decodes on a CUDA GPU. The
+# handle (and its CUDA context) is only created by the first gpu=True decode; if
+# that fails (no usable GPU) the CPU paths above are used from then on
+try:
+    from nvjpeg import NvJpeg
+except Exception:
+    NvJpeg = None
+NVJPEG_AVAILABLE = NvJpeg is not None
+_nvjpeg = None
+_nvjpeg_lock = threading.Lock()
+
+if os.environ.get('SAPORA_DEBUG'):
+    print(f"[JPEG] libjpeg-turbo: {TURBOJPEG_AVAILABLE}, nvJPEG module: {NVJPEG_AVAILABLE}")
+
+
+def _get_nvjpeg():
+    """The shared NvJpeg handle, created on first use; None without a usable GPU."""
+    global _nvjpeg, NvJpeg
+    if _nvjpeg is None and NvJpeg is not None:
+        with _nvjpeg_lock:
+            if _nvjpeg is None and NvJpeg is not None:
+                try:
+                    _nvjpeg = NvJpeg()
+                except Exception as e:
+                    if os.environ.get('SAPORA_DEBUG'):
+                        print(f"[JPEG] nvJPEG unavailable, using CPU decode: {e}")
+                    NvJpeg = None
+    return _nvjpeg
 
 # --- Protocol Serialization Helpers (Mirroring Server) ---
 
 # --- Video Helpers ---
 
 def encode_frame_to_jpeg(frame, quality=VIDEO_QUALITY):
-    """Compresses an OpenCV frame (numpy array) to JPEG bytes."""
+    """Compresses an OpenCV frame (numpy array) to JPEG bytes.
+
+    With libjpeg-turbo a 4-channel BGRA frame (e.g. a screen grab) is encoded
+    as-is; without it only BGR frames are supported.
+    """
+    if _tj is not None:
+        pixel_format = TJPF_BGRA if frame.ndim == 3 and frame.shape[2] == 4 else TJPF_BGR
+        return _tj.encode(frame, quality=quality, pixel_format=pixel_format, jpeg_subsample=TJSAMP_420)
     encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
     # Use 1 for JPEG quality
     result, encoded_frame = cv2.imencode('.jpg', frame, encode_param)
@@ -31,12 +81,128 @@ def encode_frame_to_jpeg(frame, quality=VIDEO_QUALITY):
     
     return encoded_frame.tobytes()
 
-def decode_jpeg_to_frame(jpeg_bytes):
-    """Decompresses JPEG bytes to an OpenCV frame (numpy array)."""
+# imdecode flags that scale the JPEG during the inverse DCT, by reduction factor
+_JPEG_REDUCE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+def jpeg_reduce_factor(scale):
+    """Largest JPEG decode reduction (1, 2, 4, 8) that still leaves >= scale of the full size."""
+    for factor in (8, 4, 2):
+        if scale * factor <= 1.0:
+            return factor
+    return 1
+
+def decode_jpeg_to_frame(jpeg_bytes, reduce=1, gpu=False):
+    """Decompresses JPEG bytes to an OpenCV frame (numpy array).
+
+    reduce=2/4/8 decodes straight to 1/reduce size, skipping most of the
+    IDCT and colour conversion work for frames shown in small tiles.
+    gpu=True decodes full-size frames with nvJPEG when a GPU is available.
+    Returns None for data that does not decode.
+    """
+    nvjpeg = _get_nvjpeg() if gpu and reduce == 1 else None
+    if nvjpeg is not None:
+        try:
+            frame = nvjpeg.decode(bytes(jpeg_bytes))
+            if frame is not None:
+                return frame
+        except Exception:
+            pass
+    if _tj is not None:
+        try:
+            return _tj.decode(jpeg_bytes, pixel_format=TJPF_BGR,
+                              scaling_factor=(1, reduce) if reduce in (2, 4, 8) else None)
+        except Exception:
+            return None
     nparr = np.frombuffer(jpeg_bytes, np.uint8)
-    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    frame = cv2.imdecode(nparr, _JPEG_REDUCE_FLAGS.get(reduce, cv2.IMREAD_COLOR))
     return frame
 
+# --- Socket Helpers ---
+
+def _set_socket_buffer(sock, opt, desired):
+    """Requests desired, desired//2, ... until the kernel grants it; returns the granted size."""
+    floor = min(desired, UDP_STREAM_BUFFER)
+    size = desired
+    while size > floor:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, opt, size)
+            # Linux reports twice the requested value, capped by net.core.[rw]mem_max
+            if sock.getsockopt(socket.SOL_SOCKET, opt) >= size:
+                break
+        except OSError:
+            pass
+        size //= 2
+    else:
+        sock.setsockopt(socket.SOL_SOCKET, opt, floor)
+    return sock.getsockopt(socket.SOL_SOCKET, opt)
+
+def set_udp_buffers(sock, rcvbuf, sndbuf):
+    """Applies the largest SO_RCVBUF/SO_SNDBUF the kernel allows, up to the requested sizes."""
+    granted_rcv = _set_socket_buffer(sock, socket.SO_RCVBUF, rcvbuf)
+    granted_snd = _set_socket_buffer(sock, socket.SO_SNDBUF, sndbuf)
+    if os.environ.get('SAPORA_DEBUG'):
+        print(f"[UDP] SO_RCVBUF granted {granted_rcv} (wanted {rcvbuf}), "
+              f"SO_SNDBUF granted {granted_snd} (wanted {sndbuf})")
+        if granted_rcv < rcvbuf:
+            print("[UDP] Kernel capped the receive buffer; raise it with "
+                  "'sysctl -w net.core.rmem_max=12582912' (and wmem_max for sends)")
+    return granted_rcv, granted_snd
+
+
+def raise_socket_buffers(sock, rcvbuf, sndbuf):
+    """Raises SO_RCVBUF/SO_SNDBUF toward the targets but never lowers a larger default.
+    Call before connect() so TCP can negotiate a matching window scale.
+    """
+    granted = []
+    for opt, desired in ((socket.SO_RCVBUF, rcvbuf), (socket.SO_SNDBUF, sndbuf)):
+        current = sock.getsockopt(socket.SOL_SOCKET, opt)
+        granted.append(current if current >= desired else _set_socket_buffer(sock, opt, desired))
+    return tuple(granted)
+
+
+def set_tcp_low_latency(sock, user_timeout_ms=None):
+    """Disables Nagle and enables keepalive on a connected TCP socket (Linux extras when available)."""
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # Linux-only knobs: ack immediately, and fail sends that stay unacked too long
+    opts = [('TCP_QUICKACK', 1)]
+    if user_timeout_ms:
+        opts.append(('TCP_USER_TIMEOUT', int(user_timeout_ms)))
+    for name, value in opts:
+        if hasattr(socket, name):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), value)
+            except OSError:
+                pass
+
+# --- Thread Helpers ---
+
+def available_cores():
+    """Returns the CPU cores this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def pin_current_thread(core_id):
+    """Pins the calling thread to a single CPU core. Returns False where unsupported."""
+    try:
+        if hasattr(os, 'sched_setaffinity'):
+            # On Linux pid 0 means the calling thread, not the whole process
+            os.sched_setaffinity(0, {core_id})
+            return True
+        if sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            return bool(kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), 1 << core_id))
+    except (OSError, ValueError, AttributeError):
+        pass
+    return False
+
 # --- General Helpers ---
 
 def format_size(size_bytes):
@@ -47,18 +213,30 @@ def format_size(size_bytes):
         size_bytes /= 1024.0
     return f"{size_bytes:.2f} PB"
 
+def _recv_into_exact(sock, view):
+    """Fills the writable memoryview completely from a TCP socket; False if the peer closed."""
+    offset = 0
+    total = len(view)
+    while offset < total:
+        n = sock.recv_into(view[offset:])
+        if not n:
+            return False
+        offset += n
+    return True
+
 def _recv_exact(sock, num_bytes):
     """Receives exactly num_bytes from a TCP socket."""
-    data = b''
-    while len(data) < num_bytes:
-        chunk = sock.recv(min(num_bytes - len(data), 4096)) # Use a safe internal buffer size
-        if not chunk:
-            return None
-        data += chunk
-    return data
+    buf = bytearray(num_bytes)
+    if not _recv_into_exact(sock, memoryview(buf)):
+        return None
+    return buf
 
 def read_tcp_message(sock):
-    """Reads a complete message packet from a TCP socket."""
+    """Reads a complete message packet from a TCP socket.
+
+    Returns a bytearray holding header + payload (one allocation, filled in
+    place with recv_into), or None if the connection closed mid-message.
+    """
     # 1. Read header (fixed size)
     header = _recv_exact(sock, HEADER_SIZE)
     if header is None:
@@ -66,13 +244,67 @@ def read_tcp_message(sock):
     
     # 2. Parse payload length
     try:
-        payload_length = struct.unpack('!I', header[2:6])[0]
+        payload_length = struct.unpack_from('!I', header, PAYLOAD_LENGTH_OFFSET)[0]
     except struct.error as e:
         return None
 
-    # 3. Read payload (variable size)
-    payload = _recv_exact(sock, payload_length)
-    if payload is None:
+    # 3. Read payload (variable size) straight into the message buffer
+    message = bytearray(HEADER_SIZE + payload_length)
+    message[:HEADER_SIZE] = header
+    if payload_length and not _recv_into_exact(sock, memoryview(message)[HEADER_SIZE:]):
         return None
         
-    return header + payload
+    return message
+
+
+class FrameReader:
+    """Parses framed messages from a TCP socket out of one reusable receive buffer.
+
+    Each recv_into() takes as much as the kernel has queued (up to bufsize) and
+    every complete frame in it is yielded before the next syscall. Payloads are
+    memoryviews into the buffer, valid only until the next frame is requested.
+    """
+
+    def __init__(self, sock, bufsize=262144):
+        self.sock = sock
+        self._buf = bytearray(bufsize)
+        self._view = memoryview(self._buf)
+        self._head = 0  # start of unparsed data
+        self._tail = 0  # end of received data
+
+    def frames(self):
+        """Yields (msg_type, payload) tuples until the peer closes the connection."""
+        while True:
+            need = HEADER_SIZE
+            while self._tail - self._head >= HEADER_SIZE:
+                version, msg_type, length, _, _ = HEADER_STRUCT.unpack_from(self._buf, self._head)
+                if version != PROTOCOL_VERSION:
+                    raise ValueError(f"Protocol version mismatch: expected {PROTOCOL_VERSION}, got {version}")
+                need = HEADER_SIZE + length
+                if self._tail - self._head < need:
+                    break
+                start = self._head + HEADER_SIZE
+                self._head += need
+                yield msg_type, self._view[start:self._head]
+                need = HEADER_SIZE
+            if not self._fill(need):
+                return
+
+    def _fill(self, need):
+        """Makes room for a frame of need bytes and receives once; False on EOF."""
+        pending = self._tail - self._head
+        if need > len(self._buf):
+            # Frame larger than the buffer: continue in a bigger one
+            buf = bytearray(need)
+            buf[:pending] = self._view[self._head:self._tail]
+            self._buf, self._view = buf, memoryview(buf)
+            self._head, self._tail = 0, pending
+        elif self._head + need > len(self._buf) or self._head == self._tail:
+            # Slide the partial frame to the front so the rest fits behind it
+            self._view[:pending] = self._view[self._head:self._tail]
+            self._head, self._tail = 0, pending
+        n = self.sock.recv_into(self._view[self._tail:])
+        if not n:
+            return False
+        self._tail += n
+        return True
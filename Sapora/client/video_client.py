@@ -17,22 +17,32 @@ from shared.constants import (
     CONNECTION_TIMEOUT
 )
 from shared.protocol import STREAM_VIDEO, CMD_REGISTER
-from client.utils import pack_message, unpack_message, encode_frame_to_jpeg, decode_jpeg_to_frame
+from client.utils import pack_message, unpack_message, encode_frame_to_jpeg, decode_jpeg_to_frame, json_dumps
+
+_DEBUG = bool(os.environ.get('SAPORA_DEBUG'))
+# Datagrams drained per readiness callback when serviced by a shared reactor
+REACTOR_RECV_BATCH = 32
+KEEPALIVE_INTERVAL = 5.0
 
 class VideoClient:
     """Handles all video I/O, combining sender and receiver logic."""
 
-    def __init__(self, server_ip, server_port, username, frame_callback, meeting_id: str = 'default'):
+    def __init__(self, server_ip, server_port, username, frame_callback, meeting_id: str = 'default',
+                 local_frame_callback=None):
         self.server_ip = server_ip
         self.server_port = server_port
         self.username = username
         self.frame_callback = frame_callback
+        self.local_frame_callback = local_frame_callback  # Called with each captured frame
         self.meeting_id = meeting_id
         
         self.running = False  # Receiver lifecycle
         self.sending = False  # Sender (camera) lifecycle
         self.cap = None
         self.sock = None  # Single socket for both send and receive
+        self._reactor = None  # Shared I/O loop servicing the receiver, if any
+        self.decode_reduce = {}  # source IP -> JPEG decode reduction, set by the display
+        self._last_payload = {}  # source IP -> (JPEG bytes, reduction) of the last decoded frame
         
         self.last_frame = None # Frame captured by self for local display
 
@@ -90,13 +100,21 @@ class VideoClient:
                     continue
 
                 self.last_frame = frame.copy() # Store for local display
+                if self.local_frame_callback:
+                    try:
+                        self.local_frame_callback(self.last_frame)
+                    except Exception:
+                        pass  # A display problem must not stop the outgoing stream
 
                 # Encode frame to JPEG
                 jpeg_bytes = encode_frame_to_jpeg(frame)
                 
                 # Pack and send using single socket
                 packet = pack_message(STREAM_VIDEO, jpeg_bytes)
-                self.sock.sendto(packet, (self.server_ip, self.server_port))
+                try:
+                    self.sock.sendto(packet, (self.server_ip, self.server_port))
+                except BlockingIOError:
+                    pass  # Reactor-mode socket with a full send buffer: drop this frame
                 
                 # Control frame rate
                 elapsed = time.time() - start_time
@@ -112,8 +130,12 @@ class VideoClient:
 
     # --- Receiver Logic ---
     
-    def start_receiving(self):
-        """Starts the receiver thread and registers with the server."""
+    def start_receiving(self, reactor=None):
+        """Starts receiving and registers with the server.
+
+        With a reactor (add_reader/remove_reader/call_later), the socket is
+        serviced by its shared I/O thread; otherwise a receiver thread is started.
+        """
         # Create socket if not already created by start_streaming
         if not self.sock:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -128,19 +150,24 @@ class VideoClient:
         if not self.running:
             self.running = True
             self._register_receiver()
-            threading.Thread(target=self._recv_loop, daemon=True).start()
+            if reactor is not None:
+                self._reactor = reactor
+                self.sock.setblocking(False)
+                reactor.add_reader(self.sock, self._on_readable)
+                reactor.call_later(KEEPALIVE_INTERVAL, self._keepalive_tick)
+            else:
+                threading.Thread(target=self._recv_loop, daemon=True).start()
 
     def _register_receiver(self):
         """Sends registration packet to the server with username and room info."""
         try:
             # Send registration with username and room info
-            import json
             reg_data = {
                 'username': self.username,
                 'stream_type': 'video',
                 'room': self.meeting_id or 'default'
             }
-            register_packet = pack_message(CMD_REGISTER, json.dumps(reg_data).encode('utf-8'))
+            register_packet = pack_message(CMD_REGISTER, json_dumps(reg_data))
             
             # Send multiple times for reliability
             for _ in range(3):
@@ -148,40 +175,86 @@ class VideoClient:
                     self.sock.sendto(register_packet, (self.server_ip, self.server_port))
                     time.sleep(0.1)
                 except Exception as e:
-                    if os.environ.get('SAPORA_DEBUG'):
+                    if _DEBUG:
                         print(f"VideoClient Registration Error: {e}")
         except Exception as e:
-            if os.environ.get('SAPORA_DEBUG'):
+            if _DEBUG:
                 print(f"VideoClient Registration Setup Error: {e}")
 
+    def _send_keepalive(self):
+        """Re-registers so the server doesn't prune our UDP listener mapping."""
+        try:
+            reg = {'username': self.username, 'stream_type': 'video', 'room': self.meeting_id or 'default'}
+            self.sock.sendto(pack_message(CMD_REGISTER, json_dumps(reg)), (self.server_ip, self.server_port))
+        except Exception:
+            pass
+
+    def _handle_packet(self, data, addr):
+        """Unpacks one datagram and hands decoded video frames to the callback."""
+        version, msg_type, _, _, payload = unpack_message(data)
+
+        if msg_type == STREAM_VIDEO:
+            # Use the source IP for identification (Server's UDP IP)
+            source_ip = addr[0]
+            reduce = self.decode_reduce.get(source_ip, 1)
+            last = self._last_payload.get(source_ip)
+            if last is not None and last[1] == reduce and last[0] == payload:
+                # Byte-identical JPEG (paused or static sender): nothing new to decode
+                # or paint; frame=None only tells the display the source is alive
+                self.frame_callback(source_ip, None)
+                return
+            frame = decode_jpeg_to_frame(payload, reduce)
+            if frame is not None:
+                self._last_payload[source_ip] = (payload, reduce)
+                self.frame_callback(source_ip, frame)
+
+    def forget_source(self, source_ip):
+        """Drops the last-frame memory for source_ip, so its next frame is decoded and
+        delivered even if it is byte-identical (e.g. after its tile was removed)."""
+        self._last_payload.pop(source_ip, None)
+
+    def _on_readable(self):
+        """Reactor callback: drains the queued datagrams without blocking."""
+        for _ in range(REACTOR_RECV_BATCH):
+            if not self.running:
+                return
+            try:
+                data, addr = self.sock.recvfrom(UDP_STREAM_BUFFER)
+            except (BlockingIOError, InterruptedError):
+                return
+            except Exception as e:
+                if self.running and _DEBUG:
+                    print(f"VideoClient Recv Error: {e}")
+                return
+            try:
+                self._handle_packet(data, addr)
+            except ValueError:
+                # Malformed packet, ignore
+                continue
+            except Exception as e:
+                if _DEBUG:
+                    print(f"VideoClient Frame Error: {e}")
+
+    def _keepalive_tick(self):
+        """Reactor timer: periodic keepalive while the receiver runs."""
+        if self.running and self.sock:
+            self._send_keepalive()
+            self._reactor.call_later(KEEPALIVE_INTERVAL, self._keepalive_tick)
+
     def _recv_loop(self):
         """Continuously receives and processes video frames."""
         last_keepalive = 0.0
-        import json
         while self.running:
             try:
                 # Periodic keepalive to prevent server from pruning our UDP listener mapping
                 now = time.time()
-                if now - last_keepalive > 5.0:
-                    try:
-                        reg = {'username': self.username, 'stream_type': 'video', 'room': self.meeting_id or 'default'}
-                        self.sock.sendto(pack_message(CMD_REGISTER, json.dumps(reg).encode('utf-8')), (self.server_ip, self.server_port))
-                    except Exception:
-                        pass
+                if now - last_keepalive > KEEPALIVE_INTERVAL:
+                    self._send_keepalive()
                     last_keepalive = now
 
                 data, addr = self.sock.recvfrom(UDP_STREAM_BUFFER)
-                
-                # Unpack and decode
-                version, msg_type, _, _, payload = unpack_message(data)
-                
-                if msg_type == STREAM_VIDEO:
-                    frame = decode_jpeg_to_frame(payload)
-                    if frame is not None:
-                        # Use the source IP for identification (Server's UDP IP)
-                        source_ip = addr[0] 
-                        self.frame_callback(source_ip, frame) 
-                        
+                self._handle_packet(data, addr)
+
             except socket.timeout:
                 # still loop to send keepalives
                 continue
@@ -215,8 +288,13 @@ class VideoClient:
         self.running = False
         self._stop_sender_only()
         if self.sock:
-            try:
-                self.sock.close()
-            except:
-                pass
+            if self._reactor is not None:
+                # Unregister on the reactor thread before the socket is closed there
+                self._reactor.remove_reader(self.sock, close=True)
+                self._reactor = None
+            else:
+                try:
+                    self.sock.close()
+                except:
+                    pass
             self.sock = None
\ No newline at end of file
@@ -5,8 +5,8 @@ Handles reliable TCP-based file upload and download requests.
 
 import threading
 import socket
+import queue
 import os
-import hashlib
 from pathlib import Path
 import sys
 import time
@@ -20,14 +20,22 @@ if PROJECT_ROOT not in sys.path:
 from shared.constants import (
     FILE_TRANSFER_PORT, FILE_CHUNK_SIZE,
     MAX_FILE_SIZE, BUFFER_SIZE, SOCKET_TIMEOUT,
-    STORAGE_DIR
+    STORAGE_DIR, CHECKSUM_ALGO, FILE_KEEPALIVE_IDLE, VERIFY_MIN_SIZE
 )
 from shared.protocol import (
     FILE_REQUEST_UPLOAD, FILE_REQUEST_DOWNLOAD, FILE_METADATA, FILE_CHUNK,
-    FILE_ACK_SUCCESS, FILE_ACK_FAILURE
+    FILE_CHUNK_STREAM, FILE_METADATA_CHECKSUM, FILE_REQUEST_END, FILE_ACK_SUCCESS, FILE_ACK_FAILURE,
+    FILE_REQUEST_DOWNLOAD_OPTS
 )
-from server.utils import read_tcp_message, unpack_message, pack_message
-from shared.helpers import unpack_file_metadata, pack_file_metadata
+from server.utils import (
+    read_tcp_message, read_tcp_header, recv_to_file, unpack_message, pack_message, pack_header,
+    send_buffers
+)
+from shared.helpers import unpack_file_metadata, pack_file_metadata, preallocate_file, json_loads
+from shared.checksum import cached_file_checksum, new_hasher, negotiate_algo
+
+# Chunks the download reader thread may hold ahead of the socket
+READ_AHEAD_CHUNKS = 4
 
 
 class FileTransferServer(threading.Thread):
@@ -82,7 +90,7 @@ class FileTransferServer(threading.Thread):
 
 
 class FileHandler(threading.Thread):
-    """Handles a single file transfer client connection."""
+    """Handles a file transfer client connection (one or more requests, kept alive between them)."""
 
     def __init__(self, manager, client_socket, address, storage_dir: Path):
         super().__init__(daemon=True)
@@ -97,19 +105,39 @@ class FileHandler(threading.Thread):
     def run(self):
         print(f"[FileHandler] Started for {self.ip}:{self.port}")
         try:
-            raw_message = read_tcp_message(self.sock)
-            if raw_message is None:
-                print(f"[FileHandler] No initial request from {self.ip}.")
-                return
-
-            _, msg_type, _, _, payload = unpack_message(raw_message)
-
-            if msg_type == FILE_REQUEST_UPLOAD:
-                self._handle_upload_request(payload)
-            elif msg_type == FILE_REQUEST_DOWNLOAD:
-                self._handle_download_request(payload)
-            else:
-                print(f"[FileHandler] Unknown request type {msg_type} from {self.ip}")
+            requests_served = 0
+            while True:
+                # Clients keep the connection for their next transfer; wait for it a while
+                if requests_served:
+                    self.sock.settimeout(FILE_KEEPALIVE_IDLE)
+                try:
+                    raw_message = read_tcp_message(self.sock)
+                except socket.timeout:
+                    if not requests_served:
+                        raise
+                    break
+                if raw_message is None:
+                    if not requests_served:
+                        print(f"[FileHandler] No initial request from {self.ip}.")
+                    break
+
+                _, msg_type, _, _, payload = unpack_message(raw_message)
+
+                # Handlers return True only if the request stream was fully consumed
+                if msg_type == FILE_REQUEST_UPLOAD:
+                    reusable = self._handle_upload_request(payload)
+                elif msg_type == FILE_REQUEST_DOWNLOAD:
+                    reusable = self._handle_download_request(payload)
+                elif msg_type == FILE_REQUEST_DOWNLOAD_OPTS:
+                    reusable = self._handle_download_request(payload, with_options=True)
+                elif msg_type == FILE_REQUEST_END:
+                    break
+                else:
+                    print(f"[FileHandler] Unknown request type {msg_type} from {self.ip}")
+                    break
+                if not reusable:
+                    break
+                requests_served += 1
 
         except Exception as e:
             print(f"[FileHandler] Connection error for {self.ip}: {e}")
@@ -121,7 +149,9 @@ class FileHandler(threading.Thread):
             print(f"[FileHandler] Connection closed for {self.ip}:{self.port}")
 
     def _handle_upload_request(self, payload):
-        """Processes an upload initiation request with target routing."""
+        """Processes an upload initiation request with target routing.
+        Returns True if the upload stream was fully consumed and the connection can be reused.
+        """
         if os.environ.get('SAPORA_DEBUG'):
             print(f"[FileHandler] Upload requested from {self.ip}:{self.port}")
         
@@ -134,6 +164,8 @@ class FileHandler(threading.Thread):
             filename = metadata.get('filename')
             filesize = int(metadata.get('filesize', 0))
             checksum = metadata.get('checksum')
+            checksum_algo = metadata.get('checksum_algo')
+            checksum_deferred = metadata.get('checksum_deferred', False)
             
             # Extract target information if present
             target_info = metadata.get('target', 'all')
@@ -158,6 +190,15 @@ class FileHandler(threading.Thread):
             self._safe_send(pack_message(FILE_ACK_FAILURE, b"File too large"))
             return
 
+        # The client names the algorithm; one this side cannot compute fails the
+        # upload instead of silently skipping verification
+        hasher = new_hasher(checksum_algo) if checksum or checksum_deferred else None
+        if (checksum or checksum_deferred) and hasher is None:
+            if os.environ.get('SAPORA_DEBUG'):
+                print(f"[FileHandler] Rejected upload: unsupported checksum '{checksum_algo}' for {filename}.")
+            self._safe_send(pack_message(FILE_ACK_FAILURE, b"Unsupported checksum algorithm"))
+            return
+
         # Adjust timeout dynamically based on file size
         transfer_timeout = max(30, filesize / 1048576 * 2)
         self.sock.settimeout(transfer_timeout)
@@ -175,28 +216,45 @@ class FileHandler(threading.Thread):
             return
 
         bytes_received = 0
+        # Checksum is computed while receiving, so the stored file is never re-read
         try:
             with open(file_path, 'wb') as f:
+                # Reserve the whole file once so chunk writes don't extend it piecemeal
+                preallocate_file(f, filesize)
                 while bytes_received < filesize:
-                    chunk_raw = read_tcp_message(self.sock)
-                    if chunk_raw is None:
+                    header = read_tcp_header(self.sock)
+                    if header is None:
                         raise ConnectionAbortedError("Connection lost during file transfer")
 
-                    _, chunk_type, _, _, chunk_payload = unpack_message(chunk_raw)
+                    _, chunk_type, chunk_length, _, _ = header
 
-                    if chunk_type != FILE_CHUNK:
+                    # FILE_CHUNK carries one framed block; FILE_CHUNK_STREAM announces a
+                    # raw run sent with sendfile(). Either way the bytes go straight to disk.
+                    if chunk_type not in (FILE_CHUNK, FILE_CHUNK_STREAM):
                         raise ValueError(f"Unexpected message type ({chunk_type}) during upload")
+                    if bytes_received + chunk_length > filesize:
+                        raise ValueError("Client sent more data than announced")
 
-                    f.write(chunk_payload)
-                    bytes_received += len(chunk_payload)
+                    if not recv_to_file(self.sock, f, chunk_length, hasher=hasher):
+                        raise ConnectionAbortedError("Connection lost during file transfer")
+                    bytes_received += chunk_length
 
             if bytes_received != filesize:
                 raise IOError(f"Received size mismatch (got {bytes_received}, expected {filesize})")
 
+            # The sender hashed while streaming, so its digest arrives after the data
+            if checksum_deferred:
+                trailer = read_tcp_message(self.sock)
+                if trailer is None:
+                    raise ConnectionAbortedError("Connection lost before checksum trailer")
+                _, trailer_type, _, _, trailer_payload = unpack_message(trailer)
+                if trailer_type != FILE_METADATA_CHECKSUM:
+                    raise ValueError(f"Expected checksum trailer, got message type {trailer_type}")
+                checksum = bytes(trailer_payload).decode('ascii', errors='replace')
+
             # Validate checksum if provided
-            if checksum:
-                actual_checksum = self._calculate_md5(file_path)
-                if actual_checksum != checksum:
+            if hasher is not None and checksum:
+                if hasher.hexdigest() != checksum:
                     try:
                         file_path.unlink(missing_ok=True)
                     except Exception:
@@ -204,7 +262,7 @@ class FileHandler(threading.Thread):
                     if os.environ.get('SAPORA_DEBUG'):
                         print(f"[FileHandler] Checksum mismatch for {filename}. Deleted file.")
                     self._safe_send(pack_message(FILE_ACK_FAILURE, b"Checksum mismatch"))
-                    return
+                    return True
 
             if os.environ.get('SAPORA_DEBUG'):
                 print(f"[FileHandler] Successfully uploaded {filename} ({bytes_received} bytes).")
@@ -212,6 +270,7 @@ class FileHandler(threading.Thread):
             
             # Notify target users about file availability
             self._notify_file_availability(filename, filesize, target_users)
+            return True
 
         except Exception as e:
             if os.environ.get('SAPORA_DEBUG'):
@@ -306,10 +365,21 @@ class FileHandler(threading.Thread):
             if os.environ.get('SAPORA_DEBUG'):
                 print(f"[FileHandler] Broadcast notification error: {e}")
 
-    def _handle_download_request(self, payload):
-        """Processes a download request."""
+    def _handle_download_request(self, payload, with_options=False):
+        """Processes a download request; True if the file was sent completely."""
+        # FILE_REQUEST_DOWNLOAD carries the plain filename (any name, even one that
+        # looks like JSON); FILE_REQUEST_DOWNLOAD_OPTS a JSON {"filename", "verify", "algos"}.
+        # Plain requests come from peers that only know MD5.
+        verify = None
+        checksum_algo = 'md5'
         try:
-            filename = payload.decode('utf-8')
+            if with_options:
+                request = json_loads(payload)
+                filename = str(request['filename'])
+                verify = request.get('verify')
+                checksum_algo = negotiate_algo(request.get('algos'), CHECKSUM_ALGO)
+            else:
+                filename = payload.decode('utf-8')
         except Exception:
             print("[FileHandler] Invalid download request payload.")
             self._safe_send(pack_message(FILE_ACK_FAILURE, b"Invalid request"))
@@ -334,37 +404,74 @@ class FileHandler(threading.Thread):
             return
 
         filesize = file_path.stat().st_size
-        checksum = self._calculate_md5(file_path)
+        if verify is None:
+            verify = filesize >= VERIFY_MIN_SIZE
+        # An empty checksum tells the client to skip verification
+        checksum = self._calculate_checksum(file_path, checksum_algo) if verify else ''
 
         try:
-            metadata = pack_file_metadata(filename, filesize, checksum)
+            metadata = pack_file_metadata(filename, filesize, checksum, checksum_algo=checksum_algo)
             self._safe_send(pack_message(FILE_METADATA, metadata))
 
+            bytes_sent = 0
             with open(file_path, 'rb') as f:
-                while True:
-                    chunk = f.read(FILE_CHUNK_SIZE)
-                    if not chunk:
-                        break
-                    self._safe_send(pack_message(FILE_CHUNK, chunk))
-
+                # Reader thread keeps the next chunks ready while sendall blocks,
+                # so disk reads overlap with network sends
+                chunks = queue.Queue(maxsize=READ_AHEAD_CHUNKS)
+                stop = threading.Event()
+                reader = threading.Thread(target=self._read_ahead, args=(f, chunks, stop), daemon=True)
+                reader.start()
+                try:
+                    while True:
+                        chunk = chunks.get()
+                        if not chunk:
+                            break
+                        # Header and chunk go out together without building a concatenated copy
+                        self._safe_send_parts(pack_header(FILE_CHUNK, len(chunk)), chunk)
+                        bytes_sent += len(chunk)
+                finally:
+                    stop.set()
+                    reader.join()
+
+            if bytes_sent != filesize:
+                raise IOError(f"read {bytes_sent} of {filesize} bytes")
             print(f"[FileHandler] Successfully sent {filename} ({filesize} bytes).")
+            return True
         except Exception as e:
             print(f"[FileHandler] Download failed for {filename}: {e}")
 
-    def _calculate_md5(self, file_path: Path):
-        """Calculates MD5 checksum of a file."""
-        md5_hash = hashlib.md5()
-        try:
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(FILE_CHUNK_SIZE), b''):
-                    md5_hash.update(chunk)
-            return md5_hash.hexdigest()
-        except Exception:
-            return None
+    @staticmethod
+    def _read_ahead(f, chunks, stop):
+        """Download reader thread: queues FILE_CHUNK_SIZE blocks, then b'' at EOF or on error."""
+        chunk = b''
+        while not stop.is_set():
+            try:
+                chunk = f.read(FILE_CHUNK_SIZE)
+            except Exception:
+                chunk = b''
+            while not stop.is_set():
+                try:
+                    chunks.put(chunk, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            if not chunk:
+                return
+
+    def _calculate_checksum(self, file_path: Path, algo='md5'):
+        """Calculates the checksum of a file (cached while the file is unchanged)."""
+        return cached_file_checksum(file_path, algo)
 
     def _safe_send(self, data_bytes: bytes):
         """Send safely (ignore transient send errors)."""
         try:
             self.sock.sendall(data_bytes)
+        except Exception:
+            pass
+
+    def _safe_send_parts(self, *parts):
+        """Like _safe_send, but gathers several buffers into one write."""
+        try:
+            send_buffers(self.sock, parts)
         except Exception:
             pass
\ No newline at end of file
@@ -17,6 +17,8 @@ from shared.constants import CONTROL_PORT, SOCKET_TIMEOUT
 from shared.protocol import CMD_REGISTER, CMD_HEARTBEAT, CMD_DISCONNECT, MSG_CHAT
 from server.utils import read_tcp_message, unpack_message, pack_message, get_message_type_name, broadcast_room_user_list
 
+_DEBUG = bool(os.environ.get('SAPORA_DEBUG'))
+
 
 class TCPHandler(threading.Thread):
     """Handles one TCP client connection."""
@@ -112,7 +114,7 @@ class TCPHandler(threading.Thread):
             target_username = None
             
             # Log in debug mode only
-            if os.environ.get('SAPORA_DEBUG'):
+            if _DEBUG:
                 print(f"[TCPHandler] Chat from {self.username} ({self.ip}): {raw[:100]}")
             
             try:
@@ -207,7 +209,7 @@ class TCPHandler(threading.Thread):
             
         except Exception as e:
             print(f"[TCPHandler] Chat Broadcast Error: {e}")
-            if os.environ.get('SAPORA_DEBUG'):
+            if _DEBUG:
                 import traceback
                 traceback.print_exc()
 
@@ -222,12 +224,12 @@ class TCPHandler(threading.Thread):
                 if client_sock:
                     client_sock.sendall(chat_packet)
                     sent_count += 1
-                    if os.environ.get('SAPORA_DEBUG'):
+                    if _DEBUG:
                         print(f"[TCPHandler] ✅ Sent to {client_sock.getpeername()}")
             except Exception as e:
                 failed_count += 1
                 failed_sockets.append(client_sock)
-                if os.environ.get('SAPORA_DEBUG'):
+                if _DEBUG:
                     print(f"[TCPHandler] ❌ Failed to send to socket: {e}")
         
         # Remove failed sockets
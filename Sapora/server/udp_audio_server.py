@@ -7,6 +7,8 @@ Improvements:
  - skip mixing when no sources available
  - safe send (ignore transient send errors)
  - periodic cleanup of stale clients
+ - Opus uplink decoding / per-listener downlink encoding (needs opuslib),
+   resampled between OPUS_RATE and the 44.1 kHz PCM mixer
 """
 import threading
 import socket
@@ -14,16 +16,34 @@ import time
 import os
 from collections import deque
 
+# Optional Opus codec; opuslib raises a plain Exception at import if libopus is missing
+try:
+    import opuslib
+except Exception:
+    opuslib = None
+
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from shared.constants import UDP_STREAM_BUFFER, AUDIO_PORT, SOCKET_TIMEOUT, AUDIO_CHUNK, AUDIO_RATE
-from shared.protocol import STREAM_AUDIO, CMD_REGISTER
+from shared.constants import (
+    UDP_STREAM_BUFFER, AUDIO_PORT, SOCKET_TIMEOUT, AUDIO_CHUNK, AUDIO_RATE, AUDIO_CHANNELS,
+    AUDIO_FORMAT_PCM, OPUS_RATE, OPUS_FRAME, OPUS_BITRATE
+)
+from shared.protocol import STREAM_AUDIO, STREAM_AUDIO_OPUS, CMD_REGISTER
 from server.utils import unpack_message, pack_message, mix_audio_chunks
+from shared.helpers import json_loads
+from shared.resample import LinearResampler
+
+_DEBUG = bool(os.environ.get('SAPORA_DEBUG'))
 
 # How long to consider a client "active" since last packet (seconds)
 CLIENT_TIMEOUT = 5.0
 
+# One mixer tick of PCM; decoded Opus can yield several of these at once
+CHUNK_BYTES = AUDIO_CHUNK * AUDIO_CHANNELS * AUDIO_FORMAT_PCM
+# One Opus frame of PCM at OPUS_RATE
+OPUS_FRAME_BYTES = OPUS_FRAME * AUDIO_CHANNELS * AUDIO_FORMAT_PCM
+
 class UDPAudioServer(threading.Thread):
     """Handles incoming and outgoing UDP audio streams with mixing."""
     
@@ -40,6 +60,16 @@ class UDPAudioServer(threading.Thread):
         # Track last seen timestamp for clients for cleanup
         self.last_seen = {}
         self.last_seen_lock = threading.Lock()
+
+        # Opus state is per stream: decoders per source (recv thread),
+        # encoders per listener that registered with codec='opus' (mixer thread).
+        # Opus runs at OPUS_RATE while the mixer stays on the AUDIO_RATE PCM wire
+        # format, so each also keeps a resampler and the PCM not yet a whole chunk/frame
+        self.opus_decoders = {}
+        self.opus_encoders = {}
+        self.opus_listeners = set()
+        self.opus_uplink = {}    # source -> (48k -> 44.1k resampler, pending PCM)
+        self.opus_downlink = {}  # listener -> (44.1k -> 48k resampler, pending PCM)
         
         # Match mix interval to chunk duration to reduce jitter artifacts
         self.mix_interval = float(AUDIO_CHUNK) / float(AUDIO_RATE)
@@ -89,6 +119,14 @@ class UDPAudioServer(threading.Thread):
             # Malformed packet
             return
         
+        if msg_type == STREAM_AUDIO_OPUS:
+            # Decode to PCM so the mixer sees the same format as legacy clients
+            payload = self._decode_opus(tuple(sender_addr), payload)
+            if not payload:
+                # Undecodable, or not yet a whole mixer chunk at AUDIO_RATE
+                return
+            msg_type = STREAM_AUDIO
+
         if msg_type == STREAM_AUDIO:
             # Handle audio data
             key = tuple(sender_addr)
@@ -97,21 +135,88 @@ class UDPAudioServer(threading.Thread):
                 if key not in self.audio_buffers:
                     # maxlen bounds stored latency
                     self.audio_buffers[key] = deque(maxlen=10) 
-                self.audio_buffers[key].append(payload)
+                if len(payload) > CHUNK_BYTES and len(payload) % CHUNK_BYTES == 0:
+                    # Several chunks at once (Opus decode): split into mixer-sized chunks
+                    self.audio_buffers[key].extend(
+                        payload[i:i + CHUNK_BYTES] for i in range(0, len(payload), CHUNK_BYTES)
+                    )
+                else:
+                    self.audio_buffers[key].append(payload)
             with self.last_seen_lock:
                 self.last_seen[key] = now
         elif msg_type == CMD_REGISTER:
             # Handle registration with username/room info
             try:
-                import json
-                reg_data = json.loads(payload.decode('utf-8'))
+                reg_data = json_loads(payload)
                 username = reg_data.get('username', 'Unknown')
                 room = reg_data.get('room', 'default')
+                if reg_data.get('codec') == 'opus' and opuslib is not None:
+                    self.opus_listeners.add(tuple(sender_addr))
+                else:
+                    self.opus_listeners.discard(tuple(sender_addr))
                 # Update manager with username mapping
                 self.manager.update_client_status_by_ip(sender_addr[0], username=username, room=room)
             except Exception:
                 pass
 
+    def _decode_opus(self, key, payload):
+        """Decodes one Opus frame from key to whole AUDIO_RATE mixer chunks of PCM.
+
+        Returns b'' while less than a chunk is pending, None if Opus is
+        unavailable or the frame is bad.
+        """
+        if opuslib is None:
+            if _DEBUG:
+                print(f"UDPAudioServer: dropping Opus audio from {key} (opuslib not installed)")
+            return None
+        decoder = self.opus_decoders.get(key)
+        if decoder is None:
+            decoder = self.opus_decoders[key] = opuslib.Decoder(OPUS_RATE, AUDIO_CHANNELS)
+        try:
+            pcm = decoder.decode(bytes(payload), OPUS_FRAME)
+        except Exception as e:
+            if _DEBUG:
+                print(f"UDPAudioServer: Opus decode error from {key}: {e}")
+            return None
+        state = self.opus_uplink.get(key)
+        if state is None:
+            state = self.opus_uplink[key] = (LinearResampler(OPUS_RATE, AUDIO_RATE), bytearray())
+        resampler, pending = state
+        pending += resampler.process(pcm)
+        whole = len(pending) - len(pending) % CHUNK_BYTES
+        chunks = bytes(pending[:whole])
+        del pending[:whole]
+        return chunks
+
+    def _encode_for_target(self, target_key, mixed_audio):
+        """Returns the packets for one listener: Opus frames if it asked for them, raw PCM otherwise.
+
+        One mixer chunk at AUDIO_RATE is not a whole number of Opus frames, so an
+        Opus listener gets zero, one or two packets per tick.
+        """
+        if target_key in self.opus_listeners:
+            encoder = self.opus_encoders.get(target_key)
+            if encoder is None:
+                encoder = opuslib.Encoder(OPUS_RATE, AUDIO_CHANNELS, 'voip')
+                encoder.bitrate = OPUS_BITRATE
+                self.opus_encoders[target_key] = encoder
+            state = self.opus_downlink.get(target_key)
+            if state is None:
+                state = self.opus_downlink[target_key] = (LinearResampler(AUDIO_RATE, OPUS_RATE), bytearray())
+            resampler, pending = state
+            pending += resampler.process(mixed_audio)
+            packets = []
+            try:
+                while len(pending) >= OPUS_FRAME_BYTES:
+                    frame = bytes(pending[:OPUS_FRAME_BYTES])
+                    del pending[:OPUS_FRAME_BYTES]
+                    packets.append(pack_message(STREAM_AUDIO_OPUS, encoder.encode(frame, OPUS_FRAME)))
+                return packets
+            except Exception as e:
+                if _DEBUG:
+                    print(f"UDPAudioServer: Opus encode error for {target_key}: {e}")
+        return [pack_message(STREAM_AUDIO, mixed_audio)]
+
     def _audio_mixer(self):
         """Mixes and broadcasts audio chunks periodically."""
         print("UDPAudioServer: Mixer thread started.")
@@ -172,16 +277,16 @@ class UDPAudioServer(threading.Thread):
                     mixed_audio = mix_audio_chunks(sources_for_mix)
                 except Exception as e:
                     # If mixing fails, skip this target
-                    if os.environ.get('SAPORA_DEBUG'):
+                    if _DEBUG:
                         print(f"UDPAudioServer: mix error for {target}: {e}")
                     continue
 
                 if not mixed_audio:
                     continue
 
-                packet = pack_message(STREAM_AUDIO, mixed_audio)
                 try:
-                    self.sock.sendto(packet, target)
+                    for packet in self._encode_for_target(target_key, mixed_audio):
+                        self.sock.sendto(packet, target)
                     sent_count += 1
                 except Exception:
                     failed_count += 1
@@ -189,7 +294,7 @@ class UDPAudioServer(threading.Thread):
                     self.manager.unregister_stream('audio', target)
             
             # Log stats only in debug mode
-            if os.environ.get('SAPORA_DEBUG') and sent_count > 0:
+            if _DEBUG and sent_count > 0:
                 print(f"[UDPAudioServer] Mixed audio: {sent_count} sent, {failed_count} failed")
 
             # cleanup stale clients and throttle loop properly
@@ -214,6 +319,11 @@ class UDPAudioServer(threading.Thread):
                         del self.audio_buffers[key]
             # Also inform manager that these clients are gone (optional)
             for key in removed:
+                self.opus_decoders.pop(key, None)
+                self.opus_encoders.pop(key, None)
+                self.opus_listeners.discard(key)
+                self.opus_uplink.pop(key, None)
+                self.opus_downlink.pop(key, None)
                 try:
                     self.manager.unregister_stream('audio', key)
                 except Exception:
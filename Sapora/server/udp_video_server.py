@@ -14,6 +14,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from shared.constants import UDP_STREAM_BUFFER, VIDEO_PORT, SOCKET_TIMEOUT
 from shared.protocol import STREAM_VIDEO, CMD_REGISTER
 from server.utils import unpack_message, get_message_type_name
+from shared.helpers import json_loads
+
+_DEBUG = bool(os.environ.get('SAPORA_DEBUG'))
 
 class UDPVideoServer(threading.Thread):
     """Handles incoming and outgoing UDP video streams."""
@@ -49,8 +52,7 @@ class UDPVideoServer(threading.Thread):
                     elif msg_type == CMD_REGISTER:
                         # Handle registration with username/room info
                         try:
-                            import json
-                            reg_data = json.loads(payload.decode('utf-8'))
+                            reg_data = json_loads(payload)
                             username = reg_data.get('username', 'Unknown')
                             room = reg_data.get('room', 'default')
                             # Update manager with username mapping
@@ -100,11 +102,11 @@ class UDPVideoServer(threading.Thread):
                     self.manager.unregister_stream('video', listener_addr)
             
             # Log stats only in debug mode
-            if os.environ.get('SAPORA_DEBUG') and sent_count > 0:
+            if _DEBUG and sent_count > 0:
                 print(f"[UDPVideoServer] Broadcast: {sent_count} sent, {failed_count} failed to room '{room}'")
                 
         except Exception as e:
-            if os.environ.get('SAPORA_DEBUG'):
+            if _DEBUG:
                 print(f"[UDPVideoServer] Broadcast error: {e}") 
                 
     def stop(self):
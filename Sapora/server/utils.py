@@ -21,7 +21,9 @@ from shared.constants import (
 )
 from shared.protocol import MESSAGE_TYPES, CMD_USER_LIST
 
-from shared.helpers import pack_message, unpack_message
+from shared.helpers import (
+    pack_message, unpack_message, pack_header, HEADER_STRUCT, HAS_SENDMSG, send_buffers
+)
 
 # --- Protocol Serialization Helpers ---
 
@@ -63,6 +65,35 @@ def read_tcp_message(sock):
 
     return header + payload
 
+def read_tcp_header(sock):
+    """Reads only a message header: (version, msg_type, payload_length, seq, reserved) or None.
+    The caller is responsible for consuming payload_length bytes afterwards.
+    """
+    header = _recv_exact(sock, HEADER_SIZE)
+    if header is None:
+        return None
+    fields = HEADER_STRUCT.unpack(header)
+    if fields[0] != PROTOCOL_VERSION:
+        raise ValueError(f"Protocol version mismatch: expected {PROTOCOL_VERSION}, got {fields[0]}")
+    return fields
+
+def recv_to_file(sock, f, count, buf_size=BUFFER_SIZE, hasher=None):
+    """Streams exactly count bytes from sock into file object f; False if the peer closed early.
+    If hasher is given (e.g. hashlib.md5()), it is updated with the same bytes as they arrive.
+    """
+    buf = bytearray(min(buf_size, count) or 1)
+    view = memoryview(buf)
+    remaining = count
+    while remaining > 0:
+        n = sock.recv_into(view, min(remaining, len(buf)))
+        if not n:
+            return False
+        f.write(view[:n])
+        if hasher is not None:
+            hasher.update(view[:n])
+        remaining -= n
+    return True
+
 # --- Debug/Logging Helpers ---
 
 def get_message_type_name(msg_type):
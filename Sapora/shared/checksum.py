@@ -0,0 +1,184 @@
+"""
+Sapora LAN Collaboration Suite - File checksum helpers
+Shared by the file transfer client and server so both sides hash the same way.
+"""
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+# Optional fast hashers; MD5 stays the fallback (and the only algorithm old peers know)
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# Fallback read size when a file cannot be memory-mapped; about one readahead window
+_READ_CHUNK = 1024 * 1024
+
+# LRU of digests keyed by (path, mtime_ns, size, algo): re-sharing or re-serving an
+# unchanged file skips the hash pass, and any edit changes the key
+CHECKSUM_CACHE_SIZE = 64
+_checksum_cache = OrderedDict()
+_checksum_cache_lock = threading.Lock()
+
+
+def _cpu_has_sha_extensions():
+    """True if /proc/cpuinfo lists SHA-256 instructions (x86 sha_ni, ARM sha2)."""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith(('flags', 'Features')):
+                    flags = line.split(':', 1)[-1].split()
+                    if 'sha_ni' in flags or 'sha2' in flags:
+                        return True
+    except OSError:
+        pass
+    return False
+
+
+# OpenSSL dispatches SHA-256 to these instructions on its own; with them it
+# outruns MD5, so it is the preferred fallback for a missing CHECKSUM_ALGO
+HAS_SHA_EXTENSIONS = _cpu_has_sha_extensions()
+
+# Algorithm name -> hasher factory, limited to what is importable here
+HASHERS = {
+    'md5': hashlib.md5,
+    'blake2b': hashlib.blake2b,
+    'sha256': hashlib.sha256,
+}
+if xxhash is not None:
+    HASHERS['xxh3_128'] = xxhash.xxh3_128
+if blake3 is not None:
+    HASHERS['blake3'] = blake3.blake3
+
+
+if os.environ.get('SAPORA_DEBUG'):
+    print(f"[Checksum] Available: {sorted(HASHERS)}; hashlib guaranteed: "
+          f"{sorted(hashlib.algorithms_guaranteed)}; SHA extensions: {HAS_SHA_EXTENSIONS}")
+
+
+def resolve_algo(algo):
+    """Returns algo if it can be computed here, else sha256 (hardware SHA) or md5."""
+    if algo in HASHERS:
+        return algo
+    return 'sha256' if HAS_SHA_EXTENSIONS else 'md5'
+
+
+def supported_algos(preferred=None):
+    """Algorithms this side can compute, preferred first, for advertising to a peer."""
+    algos = sorted(HASHERS)
+    if preferred in HASHERS:
+        algos.remove(preferred)
+        algos.insert(0, preferred)
+    return algos
+
+
+def negotiate_algo(offered, preferred=None):
+    """Picks an algorithm both sides can compute from the peer's offered names.
+    preferred wins if the peer offered it; md5 if the peer offered nothing usable.
+    """
+    offered = [a for a in (offered or ()) if isinstance(a, str) and a in HASHERS]
+    if preferred in offered:
+        return preferred
+    return offered[0] if offered else 'md5'
+
+
+def new_hasher(algo='md5'):
+    """Incremental hasher for algo, or None if this side cannot compute it."""
+    factory = HASHERS.get(algo or 'md5')
+    return factory() if factory else None
+
+
+def checksum_buffer(buf, algo='md5'):
+    """Hex digest of a bytes-like object in one C call (the GIL is released while hashing)."""
+    hasher = new_hasher(algo)
+    hasher.update(buf)
+    return hasher.hexdigest()
+
+
+def md5_buffer(buf):
+    """MD5 hex digest of a bytes-like object."""
+    return checksum_buffer(buf, 'md5')
+
+
+def file_checksum(file_path, algo='md5'):
+    """Hex digest of a file, or None if it cannot be read.
+
+    The file is mapped and handed to the hasher as one contiguous buffer, so the
+    whole digest runs in the optimized C/asm core instead of a Python loop.
+    """
+    try:
+        with open(file_path, 'rb', buffering=0) as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    return checksum_buffer(mm, algo)
+            except (ValueError, OSError):
+                # Zero-length or unmappable file: read into one reusable buffer
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                hasher = new_hasher(algo)
+                buf = bytearray(_READ_CHUNK)
+                view = memoryview(buf)
+                while True:
+                    n = f.readinto(buf)
+                    if not n:
+                        break
+                    hasher.update(view[:n])
+                return hasher.hexdigest()
+    except Exception:
+        return None
+
+
+def checksum_cache_key(file_path, algo='md5'):
+    """Cache key for the file's current contents, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return (os.path.abspath(file_path), st.st_mtime_ns, st.st_size, algo)
+
+
+def cached_checksum(key):
+    """Previously computed digest for key, or None."""
+    if key is None:
+        return None
+    with _checksum_cache_lock:
+        digest = _checksum_cache.get(key)
+        if digest is not None:
+            _checksum_cache.move_to_end(key)
+        return digest
+
+
+def remember_checksum(key, digest):
+    """Stores a digest under key, evicting the least recently used entries."""
+    if key is None or not digest:
+        return
+    with _checksum_cache_lock:
+        _checksum_cache[key] = digest
+        _checksum_cache.move_to_end(key)
+        while len(_checksum_cache) > CHECKSUM_CACHE_SIZE:
+            _checksum_cache.popitem(last=False)
+
+
+def cached_file_checksum(file_path, algo='md5'):
+    """file_checksum() that reuses the digest while the file is unchanged."""
+    key = checksum_cache_key(file_path, algo)
+    digest = cached_checksum(key)
+    if digest is None:
+        digest = file_checksum(file_path, algo)
+        remember_checksum(key, digest)
+    return digest
+
+
+def file_md5(file_path):
+    """MD5 hex digest of a file, or None if it cannot be read."""
+    return file_checksum(file_path, 'md5')
@@ -26,11 +26,19 @@ PROTOCOL_VERSION = 1
 HEADER_SIZE = 10             # Fixed header size for message packets (BBIHH struct)
 BUFFER_SIZE = 65536          # Default socket buffer size (64 KB)
 UDP_STREAM_BUFFER = 65536    # 64 KB for UDP sockets
+UDP_TUNED_BUFFER = 2097152   # 2 MB target for streaming sockets (kernel may grant less)
 MAX_MESSAGE_SIZE = 1048576   # 1 MB maximum for non-file payloads <--- ADDED THIS LINE
 
 # File Transfer Limits
 FILE_CHUNK_SIZE = 32768      # 32 KB chunk size for TCP file transfer
+MAX_FILE_CHUNK_SIZE = 4194304 # 4 MB ceiling for chunks grown on fast links
+VERIFY_MIN_SIZE = 52428800   # 50 MB: smaller transfers rely on TCP checksums unless verify=True
+FILE_KEEPALIVE_IDLE = 30     # Seconds a file connection may sit idle between transfers
+FILE_POOL_SIZE = 4           # Idle file connections a client keeps for reuse
 MAX_FILE_SIZE = 104857600    # 100 MB maximum file size
+FILE_SOCKET_BUFFER = 4194304 # 4 MB SO_SNDBUF/SO_RCVBUF ceiling for file transfer sockets
+SCREEN_SOCKET_BUFFER = 4194304 # 4 MB SO_SNDBUF/SO_RCVBUF target for screen share sockets
+CHECKSUM_ALGO = 'xxh3_128'   # Preferred transfer checksum (xxh3_128/blake3/blake2b/sha256); sha256 or md5 if not installed
 
 # --- Streaming Settings ---
 # Video (Simplified to JPEG/H.264 compatible settings for robust socket implementation)
@@ -41,10 +49,13 @@ VIDEO_QUALITY = 55           # JPEG compression quality (0-100) - Reduced for fa
 VIDEO_STREAM_FORMAT = 'BGR'  # OpenCV default
 
 # Audio (Simplified to raw PCM for robust socket implementation)
-AUDIO_RATE = 44100      # Sample rate in Hz
+AUDIO_RATE = 44100      # Sample rate in Hz (STREAM_AUDIO PCM wire format and server mixer)
 AUDIO_CHANNELS = 1      # Mono (Simplifies mixing)
-AUDIO_CHUNK = 1024      # Frames per buffer (common PyAudio chunk size)
-AUDIO_FORMAT_PCM = 2    # pyaudio.paInt16 (2 bytes per sample)
+AUDIO_CHUNK = 1024      # Frames per buffer
+AUDIO_FORMAT_PCM = 2    # int16 PCM (2 bytes per sample)
+OPUS_RATE = 48000       # Opus clients capture/play at this rate (Opus has no 44.1 kHz mode)
+OPUS_FRAME = 960        # Samples per Opus frame (20 ms at OPUS_RATE)
+OPUS_BITRATE = 32000    # Opus target bitrate (bps) when the codec is available
 
 # --- Timeouts and Retries ---
 CONNECTION_TIMEOUT = 5.0
@@ -3,13 +3,68 @@ Helper functions for message serialization and deserialization (FIXED)
 Uses struct for efficient binary packing/unpacking
 Enhanced with JSON support for file metadata
 """
+import os
+import socket
 import struct
 import json
 from shared.constants import HEADER_SIZE, PROTOCOL_VERSION, MAX_MESSAGE_SIZE
 
+# Optional C JSON codec; orjson.JSONDecodeError subclasses json.JSONDecodeError
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Header layout: version, msg_type, payload_length, sequence_number, reserved.
+# Packing stays in Python: one precompiled Struct call per packet, and Sapora
+# ships no compiled extensions (a Cython _utils.pyx would need a build step).
+HEADER_STRUCT = struct.Struct('!BBIHH')
+PAYLOAD_LENGTH_OFFSET = 2    # Byte offset of the '!I' payload length inside the header
+
+# Scatter/gather sends are POSIX-only; Windows sockets have no sendmsg
+HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')
+
+# Binary upload metadata: magic, flags, filesize, then the lengths of the
+# algorithm name, raw checksum digest, UTF-8 filename and UTF-8 target that follow
+UPLOAD_METADATA_STRUCT = struct.Struct('<2sBQBBHH')
+UPLOAD_METADATA_MAGIC = b'SF'
+UPLOAD_FLAG_CHECKSUM_DEFERRED = 0x01
+
+
+def pack_header(msg_type, payload_length):
+    """Packs only the fixed-size header for a payload of payload_length bytes"""
+    return HEADER_STRUCT.pack(PROTOCOL_VERSION, msg_type, payload_length, 0, 0)
+
+
+def json_dumps(obj):
+    """Serializes obj to UTF-8 JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def json_loads(data):
+    """Parses JSON from bytes, bytearray, memoryview or str (orjson when available)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def peek_msg_type(data):
+    """Returns the msg_type byte of a packed message without unpacking it (None if too short)."""
+    if len(data) < HEADER_SIZE:
+        return None
+    return data[1]
+
+
 def pack_message(msg_type, payload=b""):
     """Packs a message with header and payload"""
-    if not isinstance(payload, bytes):
+    if isinstance(payload, (bytearray, memoryview)):
+        # Bytes-like views (e.g. mmap slices) are framed as-is
+        pass
+    elif not isinstance(payload, bytes):
         payload = str(payload).encode('utf-8')
     
     payload_length = len(payload)
@@ -17,23 +72,32 @@ def pack_message(msg_type, payload=b""):
     if payload_length > MAX_MESSAGE_SIZE:
         raise ValueError(f"Payload size {payload_length} exceeds maximum {MAX_MESSAGE_SIZE}")
     
-    sequence_number = 0
-    reserved = 0
-    
-    header = struct.pack(
-        '!BBIHH',
-        PROTOCOL_VERSION,
-        msg_type,
-        payload_length,
-        sequence_number,
-        reserved
-    )
-    
-    return header + payload
+    return pack_header(msg_type, payload_length) + payload
+
+
+def send_buffers(sock, buffers):
+    """Writes every buffer in order using gather sendmsg() calls, resuming after partial sends.
+    Platforms without sendmsg (Windows) send the joined buffers with one sendall().
+    """
+    if not HAS_SENDMSG:
+        sock.sendall(b''.join(buffers))
+        return
+    pending = [memoryview(b) for b in buffers]
+    while pending:
+        sent = sock.sendmsg(pending)
+        while pending and sent >= len(pending[0]):
+            sent -= len(pending[0])
+            pending.pop(0)
+        if sent:
+            pending[0] = pending[0][sent:]
 
 
 def unpack_message(data):
-    """Unpack a message into header components and payload"""
+    """Unpack a message into header components and payload.
+
+    Accepts bytes, bytearray or memoryview; the payload is a slice of the
+    same type, so a memoryview input is parsed without copying.
+    """
     if len(data) < HEADER_SIZE:
         raise ValueError(f"Data too short: {len(data)} bytes (minimum {HEADER_SIZE})")
     
@@ -41,10 +105,7 @@ def unpack_message(data):
     payload = data[HEADER_SIZE:]
     
     try:
-        version, msg_type, payload_length, sequence_number, reserved = struct.unpack(
-            '!BBIHH',
-            header
-        )
+        version, msg_type, payload_length, sequence_number, reserved = HEADER_STRUCT.unpack(header)
     except struct.error as e:
         raise ValueError(f"Failed to unpack header: {e}")
     
@@ -63,19 +124,59 @@ def unpack_message(data):
 
 # --- File Metadata Helpers (ENHANCED WITH JSON) ---
 
-def pack_file_metadata(filename, filesize, checksum="", target="all"):
+def pack_file_metadata(filename, filesize, checksum="", target="all", checksum_algo="md5"):
     """Packs file metadata as JSON for extensibility."""
     metadata_obj = {
         'filename': filename,
         'filesize': filesize,
         'checksum': checksum,
+        'checksum_algo': checksum_algo,
         'target': target
     }
     return json.dumps(metadata_obj).encode('utf-8')
 
 
+def pack_upload_metadata(filename, filesize, checksum="", target="all", checksum_algo="md5",
+                         checksum_deferred=False):
+    """Packs upload metadata as a fixed struct header plus length-prefixed fields."""
+    algo_bytes = checksum_algo.encode('ascii')
+    digest = bytes.fromhex(checksum) if checksum else b''
+    name_bytes = filename.encode('utf-8')
+    target_bytes = str(target).encode('utf-8')
+    flags = UPLOAD_FLAG_CHECKSUM_DEFERRED if checksum_deferred else 0
+    header = UPLOAD_METADATA_STRUCT.pack(
+        UPLOAD_METADATA_MAGIC, flags, filesize,
+        len(algo_bytes), len(digest), len(name_bytes), len(target_bytes)
+    )
+    return b''.join((header, algo_bytes, digest, name_bytes, target_bytes))
+
+
+def _unpack_upload_metadata(data):
+    """Parses a pack_upload_metadata() blob into the unpack_file_metadata() dict."""
+    _, flags, filesize, algo_len, digest_len, name_len, target_len = \
+        UPLOAD_METADATA_STRUCT.unpack_from(data)
+    offset = UPLOAD_METADATA_STRUCT.size
+    fields = []
+    for length in (algo_len, digest_len, name_len, target_len):
+        fields.append(bytes(data[offset:offset + length]))
+        offset += length
+    if offset > len(data):
+        raise ValueError("Truncated upload metadata")
+    algo, digest, name, target = fields
+    return {
+        'filename': name.decode('utf-8'),
+        'filesize': filesize,
+        'checksum': digest.hex(),
+        'checksum_algo': algo.decode('ascii') or 'md5',
+        'checksum_deferred': bool(flags & UPLOAD_FLAG_CHECKSUM_DEFERRED),
+        'target': target.decode('utf-8') or 'all'
+    }
+
+
 def unpack_file_metadata(data):
-    """Unpacks file metadata from JSON."""
+    """Unpacks file metadata from the binary upload header or JSON."""
+    if data[:2] == UPLOAD_METADATA_MAGIC:
+        return _unpack_upload_metadata(data)
     try:
         # Try JSON first (new format)
         metadata_obj = json.loads(data.decode('utf-8'))
@@ -83,6 +184,10 @@ def unpack_file_metadata(data):
             'filename': metadata_obj.get('filename', ''),
             'filesize': metadata_obj.get('filesize', 0),
             'checksum': metadata_obj.get('checksum', ''),
+            # Peers that predate checksum_algo always send MD5
+            'checksum_algo': metadata_obj.get('checksum_algo') or 'md5',
+            # Upload checksum follows the data in a FILE_METADATA_CHECKSUM trailer
+            'checksum_deferred': bool(metadata_obj.get('checksum_deferred', False)),
             'target': metadata_obj.get('target', 'all')
         }
     except (json.JSONDecodeError, UnicodeDecodeError):
@@ -108,5 +213,24 @@ def unpack_file_metadata(data):
             'filename': filename,
             'filesize': filesize,
             'checksum': checksum,
+            'checksum_algo': 'md5',
+            'checksum_deferred': False,
             'target': 'all'  # Legacy format doesn't have target
-        }
\ No newline at end of file
+        }
+
+
+# --- File Storage Helpers ---
+
+def preallocate_file(f, size):
+    """Reserves size bytes for an open file before it is written.
+
+    posix_fallocate gives real, mostly contiguous extents up front so writes
+    never extend the inode; elsewhere (Windows) the file is truncated to size.
+    """
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+            return
+        except OSError:
+            pass  # Filesystem without fallocate support
+    f.truncate(size)
@@ -23,6 +23,10 @@ FILE_REQUEST_DOWNLOAD = 0x23
 FILE_ACK_SUCCESS = 0x24
 FILE_ACK_FAILURE = 0x25
 FILE_NOTIFY_AVAILABLE = 0x26
+FILE_CHUNK_STREAM = 0x27  # Header only: payload_length raw file bytes follow unframed (sendfile)
+FILE_METADATA_CHECKSUM = 0x28  # Upload trailer: checksum hashed while the data was being sent
+FILE_REQUEST_END = 0x29  # Client is done with a kept-alive file connection
+FILE_REQUEST_DOWNLOAD_OPTS = 0x2A  # Download with options: JSON {"filename", "verify", "algos"} payload
 
 # SCREEN SHARE (TCP: 5003)
 SCREEN_FRAME = 0x30
@@ -33,6 +37,7 @@ SCREEN_SHARE_STOP = 0x33  # New explicit stop control
 # STREAMING (UDP: 6000/6001)
 STREAM_VIDEO = 0x40
 STREAM_AUDIO = 0x41
+STREAM_AUDIO_OPUS = 0x42  # Opus-encoded OPUS_FRAME at OPUS_RATE (falls back to STREAM_AUDIO PCM)
 
 # --- Message Type Names (for debugging/logging) ---
 MESSAGE_TYPES = {
@@ -51,6 +56,10 @@ MESSAGE_TYPES = {
     FILE_ACK_SUCCESS: "FILE_ACK_SUCCESS",
     FILE_ACK_FAILURE: "FILE_ACK_FAILURE",
     FILE_NOTIFY_AVAILABLE: "FILE_NOTIFY_AVAILABLE",
+    FILE_CHUNK_STREAM: "FILE_CHUNK_STREAM",
+    FILE_METADATA_CHECKSUM: "FILE_METADATA_CHECKSUM",
+    FILE_REQUEST_END: "FILE_REQUEST_END",
+    FILE_REQUEST_DOWNLOAD_OPTS: "FILE_DOWNLOAD_OPTS_REQ",
 
     SCREEN_FRAME: "SCREEN_FRAME",
     SCREEN_START: "SCREEN_START",
@@ -59,6 +68,7 @@ MESSAGE_TYPES = {
 
     STREAM_VIDEO: "VIDEO",
     STREAM_AUDIO: "AUDIO",
+    STREAM_AUDIO_OPUS: "AUDIO_OPUS",
 }
 
 def get_message_type_name(msg_type):
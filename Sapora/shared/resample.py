@@ -0,0 +1,36 @@
+"""
+Sapora LAN Collaboration Suite - PCM rate conversion
+Bridges the 44.1 kHz PCM wire format and Opus' 48 kHz on both sides.
+"""
+import numpy as np
+
+
+class LinearResampler:
+    """Streaming linear-interpolation resampler for mono int16 PCM.
+
+    Keeps the last input sample and the fractional read position between
+    calls, so consecutive chunks join without clicks and the output length
+    averages out to exactly in_rate -> out_rate over time.
+    """
+
+    def __init__(self, in_rate, out_rate):
+        self.step = float(in_rate) / float(out_rate)  # input samples per output sample
+        # Position of the next output sample relative to the next chunk's first
+        # sample; -1.0 .. 0.0 falls between the previous chunk's last sample and it
+        self._pos = 0.0
+        self._last = 0.0
+
+    def process(self, pcm):
+        """Resamples one chunk of int16 PCM bytes; returns int16 PCM bytes (may be empty)."""
+        x = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        n = len(x)
+        if not n:
+            return b''
+        count = int((n - 1 - self._pos) // self.step) + 1 if self._pos <= n - 1 else 0
+        positions = self._pos + self.step * np.arange(count, dtype=np.float64)
+        # Index 0 of the padded input is the previous chunk's last sample
+        padded = np.concatenate(([self._last], x))
+        out = np.interp(positions + 1.0, np.arange(n + 1, dtype=np.float64), padded)
+        self._pos += self.step * count - n
+        self._last = x[-1]
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16).tobytes()
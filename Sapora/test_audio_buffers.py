@@ -0,0 +1,130 @@
+"""
+Sapora audio buffering tests: the playback ring buffer and the PCM resampler.
+Run with: python -m pytest -q
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def ring_class():
+    """PCMRingBuffer, skipping where sounddevice cannot load the PortAudio library."""
+    try:
+        from client.audio_client import PCMRingBuffer
+    except (ImportError, OSError) as e:
+        pytest.skip(f"client.audio_client unavailable: {e}")
+    return PCMRingBuffer
+
+
+def _read(ring, n):
+    out = bytearray(n)
+    ring.read_into(out)
+    return bytes(out)
+
+
+# --- PCMRingBuffer ---
+
+def test_ring_write_then_read(ring_class):
+    ring = ring_class(16, 16)
+    ring.write(b'abcdef')
+    assert ring.available() == 6
+    assert _read(ring, 4) == b'abcd'
+    assert ring.available() == 2
+
+
+def test_ring_wraparound(ring_class):
+    ring = ring_class(8, 8)
+    ring.write(b'abcdef')
+    assert _read(ring, 5) == b'abcde'
+    # Write position 6 -> wraps after two bytes
+    ring.write(b'ghijkl')
+    assert _read(ring, 7) == b'fghijkl'
+    assert ring.overruns == 0 and ring.underruns == 0
+
+
+def test_ring_underrun_pads_with_silence(ring_class):
+    ring = ring_class(8, 8)
+    ring.write(b'ab')
+    assert _read(ring, 5) == b'ab\x00\x00\x00'
+    assert ring.underruns == 1
+
+
+def test_ring_overrun_drops_oldest(ring_class):
+    ring = ring_class(8, 8)
+    ring.write(b'abcdef')
+    ring.write(b'ghijkl')
+    assert ring.overruns == 1
+    assert ring.available() == 8
+    assert _read(ring, 8) == b'efghijkl'
+
+
+def test_ring_oversized_write_keeps_newest(ring_class):
+    ring = ring_class(8, 8)
+    ring.write(b'0123456789')
+    assert _read(ring, 8) == b'23456789'
+
+
+def test_ring_trims_to_max_latency(ring_class):
+    ring = ring_class(16, 4)
+    ring.write(b'abcdefgh')
+    # Only the newest max_latency bytes are still worth playing
+    assert _read(ring, 4) == b'efgh'
+
+
+def test_ring_clear(ring_class):
+    ring = ring_class(8, 8)
+    ring.write(b'abc')
+    ring.clear()
+    assert ring.available() == 0
+    assert _read(ring, 2) == b'\x00\x00'
+
+
+# --- LinearResampler ---
+
+def _resampler(in_rate, out_rate):
+    from shared.resample import LinearResampler
+    return LinearResampler(in_rate, out_rate)
+
+
+def _pcm(samples):
+    return np.asarray(samples, dtype=np.int16).tobytes()
+
+
+def test_resampler_identity():
+    resampler = _resampler(48000, 48000)
+    data = _pcm(range(-500, 500, 7))
+    assert resampler.process(data) == data
+
+
+def test_resampler_empty_chunk():
+    assert _resampler(44100, 48000).process(b'') == b''
+
+
+@pytest.mark.parametrize('in_rate, out_rate, chunk', [(44100, 48000, 1024), (48000, 44100, 960)])
+def test_resampler_streaming_length(in_rate, out_rate, chunk):
+    resampler = _resampler(in_rate, out_rate)
+    chunks = 200
+    total = sum(len(resampler.process(_pcm(np.zeros(chunk)))) // 2 for _ in range(chunks))
+    # Fractional positions carry over, so the output tracks the exact ratio
+    assert abs(total - chunks * chunk * out_rate / in_rate) <= 1
+
+
+def test_resampler_is_continuous_across_chunks():
+    # A ramp stays a ramp: interpolating across chunk edges must not click
+    ramp = np.arange(0, 4410 * 4, 4, dtype=np.int16)
+    whole = np.frombuffer(_resampler(44100, 48000).process(ramp.tobytes()), dtype=np.int16)
+    resampler = _resampler(44100, 48000)
+    pieces = b''.join(resampler.process(ramp[i:i + 441].tobytes()) for i in range(0, len(ramp), 441))
+    split = np.frombuffer(pieces, dtype=np.int16)
+    assert len(whole) == len(split)
+    # Positions accumulate in floating point, so rounding may differ by one LSB
+    assert np.abs(whole.astype(np.int32) - split).max() <= 1
+    assert np.all(np.diff(split.astype(np.int32)) >= 0)
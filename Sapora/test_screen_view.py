@@ -0,0 +1,153 @@
+"""
+Sapora video view tests: tile grid layout and screen share dirty rectangles.
+Run with: python -m pytest -q
+"""
+
+import math
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
+# Widgets are created without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+pytest.importorskip('PyQt6.QtWidgets')
+try:
+    import client.main_ui as main_ui
+except (ImportError, OSError) as e:  # sounddevice raises OSError without PortAudio
+    pytest.skip(f"client.main_ui unavailable: {e}", allow_module_level=True)
+
+from PyQt6.QtWidgets import QApplication, QGridLayout, QLabel, QWidget
+
+
+@pytest.fixture(scope='module')
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+# --- Tile grid ---
+
+def test_grid_cols_is_ceil_sqrt():
+    assert main_ui._grid_cols(0) == 0
+    for n in range(1, 200):
+        assert main_ui._grid_cols(n) == math.ceil(math.sqrt(n))
+
+
+class _ForgetfulVideoClient:
+    def __init__(self):
+        self.forgotten = []
+
+    def forget_source(self, source_id):
+        self.forgotten.append(source_id)
+
+
+class _TileGrid:
+    """Just the state the main window's tile grid methods use."""
+
+    reorganize_video_grid = main_ui.SaporaMainWindow.reorganize_video_grid
+    remove_video_tile = main_ui.SaporaMainWindow.remove_video_tile
+
+    def __init__(self, names):
+        self.container = QWidget()
+        self.video_grid_layout = QGridLayout(self.container)
+        self.video_tiles = {name: QLabel(name) for name in names}
+        self._tile_sizes = {}
+        self._frame_arrivals = {}
+        self._fast_scaled = {}
+        self._grid_cols = 0
+        self.video_client = _ForgetfulVideoClient()
+        self.reorganize_video_grid()
+
+    def positions(self):
+        layout = self.video_grid_layout
+        return {
+            layout.itemAt(i).widget().text(): layout.getItemPosition(i)[:2]
+            for i in range(layout.count())
+        }
+
+
+def test_remove_tile_moves_last_tile_into_hole(qapp):
+    grid = _TileGrid('abcdef')   # 6 tiles, 3 columns
+    before = grid.positions()
+    grid.remove_video_tile('b')
+    after = grid.positions()
+    # 5 tiles still need 3 columns: only the tile in the last slot moves
+    assert after['f'] == before['b']
+    assert {k: v for k, v in after.items() if k != 'f'} == {k: before[k] for k in 'acde'}
+    assert sorted(after.values()) == [(i // 3, i % 3) for i in range(5)]
+    assert grid.video_client.forgotten == ['b']
+
+
+def test_remove_last_slot_tile_leaves_others(qapp):
+    grid = _TileGrid('abcdef')
+    before = grid.positions()
+    grid.remove_video_tile('f')
+    assert grid.positions() == {k: before[k] for k in 'abcde'}
+
+
+def test_remove_tile_reflows_when_columns_change(qapp):
+    grid = _TileGrid('abcde')    # 5 tiles, 3 columns -> 4 tiles, 2 columns
+    grid.remove_video_tile('a')
+    assert grid._grid_cols == 2
+    assert sorted(grid.positions().values()) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+
+
+# --- Screen share dirty rectangles ---
+
+def test_union_rect():
+    assert main_ui._union_rect((0, 0, 2, 2), (4, 4, 2, 2)) == (0, 0, 6, 6)
+    assert main_ui._union_rect((1, 1, 2, 2), (0, 0, 0, 0)) == (1, 1, 2, 2)
+    assert main_ui._union_rect(None, (0, 0, 1, 1)) is None
+
+
+def _frame(h=90, w=160, value=40):
+    return np.full((h, w, 3), value, dtype=np.uint8)
+
+
+def test_tracker_first_frame_is_full():
+    tracker = main_ui.DirtyRectTracker()
+    fitted, rect = tracker.update(_frame(), 160, 90)
+    assert rect is None
+    assert fitted.shape == (90, 160, 3)
+
+
+def test_tracker_reports_changed_box():
+    tracker = main_ui.DirtyRectTracker()
+    frame = _frame()
+    tracker.update(frame, 160, 90)
+    assert tracker.update(frame.copy(), 160, 90)[1] == (0, 0, 0, 0)
+
+    changed = frame.copy()
+    changed[10:20, 30:45] = 200
+    fitted, rect = tracker.update(changed, 160, 90)
+    assert rect == (30, 10, 15, 10)
+    assert np.array_equal(fitted, changed)
+
+
+def test_tracker_large_change_is_full_frame():
+    tracker = main_ui.DirtyRectTracker()
+    tracker.update(_frame(), 160, 90)
+    assert tracker.update(_frame(value=200), 160, 90)[1] is None
+
+
+def test_tracker_reset_forces_full_frame():
+    tracker = main_ui.DirtyRectTracker()
+    frame = _frame()
+    tracker.update(frame, 160, 90)
+    tracker.reset()
+    assert tracker.update(frame, 160, 90)[1] is None
+    # The reset is consumed once
+    assert tracker.update(frame, 160, 90)[1] == (0, 0, 0, 0)
+
+
+def test_tracker_fits_and_drops_alpha():
+    tracker = main_ui.DirtyRectTracker()
+    bgra = np.zeros((180, 320, 4), dtype=np.uint8)
+    fitted, rect = tracker.update(bgra, 160, 160)
+    assert fitted.shape == (90, 160, 3)
+    assert rect is None
@@ -0,0 +1,209 @@
+"""
+Sapora wire format tests: message framing, upload metadata, gather sends,
+the streaming frame reader and the file transfer checksum helpers.
+Run with: python -m pytest -q
+"""
+
+import hashlib
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+import shared.helpers as helpers
+from shared.constants import HEADER_SIZE, PROTOCOL_VERSION
+from shared.helpers import (
+    pack_message, unpack_message, pack_header, peek_msg_type, HEADER_STRUCT,
+    pack_file_metadata, pack_upload_metadata, unpack_file_metadata, send_buffers
+)
+from shared.protocol import MSG_CHAT, FILE_CHUNK, FILE_METADATA_CHECKSUM
+from shared import checksum
+
+
+# --- Message framing ---
+
+def test_pack_unpack_round_trip():
+    packet = pack_message(MSG_CHAT, b'hello')
+    assert len(packet) == HEADER_SIZE + 5
+    version, msg_type, length, _, payload = unpack_message(packet)
+    assert (version, msg_type, length, payload) == (PROTOCOL_VERSION, MSG_CHAT, 5, b'hello')
+
+
+def test_unpack_memoryview_returns_view():
+    packet = bytearray(pack_message(FILE_CHUNK, b'\x00\x01\x02'))
+    _, _, _, _, payload = unpack_message(memoryview(packet))
+    assert isinstance(payload, memoryview)
+    assert bytes(payload) == b'\x00\x01\x02'
+
+
+def test_pack_header_matches_pack_message():
+    payload = b'x' * 300
+    assert pack_header(FILE_CHUNK, len(payload)) + payload == pack_message(FILE_CHUNK, payload)
+    assert peek_msg_type(pack_message(FILE_CHUNK, payload)) == FILE_CHUNK
+    assert peek_msg_type(b'\x01') is None
+
+
+def test_unpack_rejects_bad_frames():
+    packet = pack_message(MSG_CHAT, b'abc')
+    with pytest.raises(ValueError):
+        unpack_message(packet[:-1])
+    bad_version = HEADER_STRUCT.pack(PROTOCOL_VERSION + 1, MSG_CHAT, 3, 0, 0) + b'abc'
+    with pytest.raises(ValueError):
+        unpack_message(bad_version)
+
+
+def test_checksum_trailer_round_trip():
+    digest = hashlib.md5(b'data').hexdigest()
+    _, msg_type, _, _, payload = unpack_message(pack_message(FILE_METADATA_CHECKSUM, digest.encode('ascii')))
+    assert msg_type == FILE_METADATA_CHECKSUM
+    assert bytes(payload).decode('ascii') == digest
+
+
+# --- File metadata ---
+
+def test_upload_metadata_round_trip():
+    digest = hashlib.sha256(b'contents').hexdigest()
+    blob = pack_upload_metadata('résumé.pdf', 12345, digest, target='Alice', checksum_algo='sha256')
+    assert unpack_file_metadata(blob) == {
+        'filename': 'résumé.pdf',
+        'filesize': 12345,
+        'checksum': digest,
+        'checksum_algo': 'sha256',
+        'checksum_deferred': False,
+        'target': 'Alice',
+    }
+
+
+def test_upload_metadata_deferred_checksum():
+    meta = unpack_file_metadata(pack_upload_metadata('a.bin', 1, checksum_deferred=True))
+    assert meta['checksum'] == ''
+    assert meta['checksum_deferred'] is True
+    assert meta['target'] == 'all'
+
+
+def test_upload_metadata_truncated():
+    blob = pack_upload_metadata('a.bin', 1, target='everyone')
+    with pytest.raises(ValueError):
+        unpack_file_metadata(blob[:-3])
+
+
+def test_json_metadata_defaults_to_md5():
+    meta = unpack_file_metadata(b'{"filename": "old.txt", "filesize": 7, "checksum": "abc"}')
+    assert meta['checksum_algo'] == 'md5'
+    assert meta['checksum_deferred'] is False
+    assert unpack_file_metadata(pack_file_metadata('n.txt', 3, 'ff', checksum_algo='blake2b'))['checksum_algo'] == 'blake2b'
+
+
+# --- Gather sends ---
+
+class _PartialSocket:
+    """Accepts at most `limit` bytes per sendmsg() call, like a full socket buffer."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.data = bytearray()
+
+    def sendmsg(self, buffers):
+        sent = 0
+        for buf in buffers:
+            take = min(len(buf), self.limit - sent)
+            self.data += bytes(buf[:take])
+            sent += take
+            if sent == self.limit:
+                break
+        return sent
+
+    def sendall(self, data):
+        self.data += data
+
+
+@pytest.mark.parametrize('limit', [1, 3, 7, 1000])
+def test_send_buffers_resumes_partial_sends(monkeypatch, limit):
+    monkeypatch.setattr(helpers, 'HAS_SENDMSG', True)
+    sock = _PartialSocket(limit)
+    parts = [b'head', memoryview(b'payload-one'), b'', bytearray(b'tail')]
+    send_buffers(sock, parts)
+    assert sock.data == b'headpayload-onetail'
+
+
+def test_send_buffers_without_sendmsg(monkeypatch):
+    monkeypatch.setattr(helpers, 'HAS_SENDMSG', False)
+    sock = _PartialSocket(1)
+    send_buffers(sock, [b'a', b'bc'])
+    assert sock.data == b'abc'
+
+
+# --- Streaming frame reader ---
+
+class _ChunkedSocket:
+    """recv_into() hands out the queued bytes in fixed-size pieces, then EOF."""
+
+    def __init__(self, data, piece):
+        self.data = memoryview(data)
+        self.piece = piece
+
+    def recv_into(self, view):
+        n = min(self.piece, len(view), len(self.data))
+        view[:n] = self.data[:n]
+        self.data = self.data[n:]
+        return n
+
+
+@pytest.mark.parametrize('piece', [1, 5, 64, 4096])
+def test_frame_reader_splits_stream(piece):
+    utils = pytest.importorskip('client.utils')
+    payloads = [b'a' * 10, b'', b'b' * 100, b'c' * 37]
+    stream = b''.join(pack_message(FILE_CHUNK, p) for p in payloads)
+    # A small buffer forces both the slide-to-front and the grow paths
+    reader = utils.FrameReader(_ChunkedSocket(stream, piece), bufsize=48)
+    got = [(t, bytes(p)) for t, p in reader.frames()]
+    assert got == [(FILE_CHUNK, p) for p in payloads]
+
+
+def test_frame_reader_stops_on_truncated_frame():
+    utils = pytest.importorskip('client.utils')
+    stream = pack_message(FILE_CHUNK, b'whole') + pack_message(FILE_CHUNK, b'cut off')[:-2]
+    reader = utils.FrameReader(_ChunkedSocket(stream, 8), bufsize=32)
+    assert [bytes(p) for _, p in reader.frames()] == [b'whole']
+
+
+# --- Checksums ---
+
+def test_file_checksum_matches_hashlib(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(os.urandom(70000))
+    for algo in ('md5', 'sha256', 'blake2b'):
+        assert checksum.file_checksum(path, algo) == hashlib.new(algo, path.read_bytes()).hexdigest()
+    empty = tmp_path / 'empty.bin'
+    empty.write_bytes(b'')
+    assert checksum.file_checksum(empty, 'md5') == hashlib.md5(b'').hexdigest()
+
+
+def test_cached_checksum_follows_file_changes(tmp_path):
+    path = tmp_path / 'shared.txt'
+    path.write_bytes(b'first version')
+    first = checksum.cached_file_checksum(path, 'md5')
+    assert checksum.cached_checksum(checksum.checksum_cache_key(path, 'md5')) == first
+
+    path.write_bytes(b'second, longer version')
+    assert checksum.cached_file_checksum(path, 'md5') == hashlib.md5(b'second, longer version').hexdigest()
+
+
+def test_checksum_cache_is_bounded():
+    for i in range(checksum.CHECKSUM_CACHE_SIZE + 5):
+        checksum.remember_checksum(('/nonexistent', i, i, 'md5'), f'{i:032x}')
+    assert checksum.cached_checksum(('/nonexistent', 0, 0, 'md5')) is None
+    last = checksum.CHECKSUM_CACHE_SIZE + 4
+    assert checksum.cached_checksum(('/nonexistent', last, last, 'md5')) == f'{last:032x}'
+
+
+def test_negotiate_algo():
+    assert checksum.negotiate_algo(['sha256', 'md5'], 'sha256') == 'sha256'
+    assert checksum.negotiate_algo(['blake2b', 'sha256'], 'no-such-algo') == 'blake2b'
+    assert checksum.negotiate_algo(['no-such-algo'], 'sha256') == 'md5'
+    assert checksum.negotiate_algo(None, 'sha256') == 'md5'
+    assert checksum.supported_algos('sha256')[0] == 'sha256'
+    assert checksum.new_hasher('no-such-algo') is None